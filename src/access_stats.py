@@ -0,0 +1,214 @@
+# Module records which charts the sessions of the app ask for, and warms the figure cache with the most requested ones
+# when a process starts, so the first sessions after a deploy or a scale-out do not pay for building them
+# Usage : python -m src.access_stats [--top N]
+# The counts are kept per league, chart and its arguments (e.g. topRunsYearGraph for 2023 of the IPL), independently of
+# the version of the data, in a json file under the artifacts directory shared by all the processes. Each process adds
+# the requests it recorded to the file every so often, and when it exits, holding a lock on the file while it reads and
+# replaces it so that the counts of concurrent processes are not lost. Every league is warmed when first shown.
+
+import argparse
+import atexit
+import json
+import os
+import sys
+import threading
+from collections import Counter
+
+from src.cache import artifactPath
+from src.data_loader import DEFAULT_LEAGUE
+from src.export import chartKeys
+from src.player_search import playerSearchIndex
+from src.views import *
+from src.exception import CustomException
+from src.logger import logging
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Switch for recording the requests, turned off with the IPL_ACCESS_STATS=0 environment variable
+
+ACCESS_STATS = os.environ.get('IPL_ACCESS_STATS', '1') != '0'
+
+# Number of the most requested charts built when a process starts, set with the IPL_WARM_TOP environment variable
+# Nothing is warmed when it is 0
+
+WARM_TOP = int(os.environ.get('IPL_WARM_TOP', '30'))
+
+# Number of requests recorded by a process before they are added to the file
+
+FLUSH_EVERY = 100
+
+def statsPath():
+
+    return artifactPath('access_stats.json')
+
+# Returns the key of a chart as stored in the file, and back
+
+def _encode(key):
+
+    return json.dumps(list(key), default=lambda value: value.item())
+
+def _decode(text):
+
+    return tuple(json.loads(text))
+
+# Returns the request counts of every chart of every league recorded so far, by all the processes
+
+def _readLeagueStats():
+
+    try:
+        with open(statsPath(), encoding='utf-8') as f:
+            counts = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    return {league: Counter({_decode(key): count for key, count in league_counts.items()})
+            for league, league_counts in counts.items() if isinstance(league_counts, dict)}
+
+# Returns the request counts of every chart of a league recorded so far, by all the processes
+
+def readStats(league=None):
+
+    return _readLeagueStats().get(league or DEFAULT_LEAGUE, Counter())
+
+# Counts of the requests recorded by this process, not yet added to the file
+
+_pending = Counter()
+_pending_lock = threading.Lock()
+
+# Records a request for a chart of a league, given by its key in the chart registry of the views
+
+def recordAccess(key, league=None):
+
+    if not ACCESS_STATS:
+        return
+
+    with _pending_lock:
+        _pending[(league or DEFAULT_LEAGUE, tuple(key))] += 1
+        flush = sum(_pending.values()) >= FLUSH_EVERY
+
+    if flush:
+        flushStats()
+
+# Adds the requests recorded by this process to the file, which is replaced in one go so it is never read half written
+# The file is read and replaced under an exclusive lock on a lock file next to it, so the flushes of the processes add
+# up rather than overwriting each other (where file locks are not available, concurrent flushes may lose counts)
+# The pending requests are taken out under the lock of this process only, so recording a request never waits on the
+# file, and are put back when they could not be written
+
+def flushStats():
+
+    global _pending
+    with _pending_lock:
+        if not _pending:
+            return
+        pending, _pending = _pending, Counter()
+
+    try:
+        path = statsPath()
+        with open(f'{path}.lock', 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+
+            counts = _readLeagueStats()
+            for (league, key), count in pending.items():
+                counts.setdefault(league, Counter())[key] += count
+
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({league: {_encode(key): count for key, count in league_counts.most_common()}
+                           for league, league_counts in counts.items()}, f, indent=0)
+            os.replace(tmp_path, path)
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        with _pending_lock:
+            _pending.update(pending)
+
+atexit.register(flushStats)
+
+# Returns the keys of the charts the tabs show when they are first opened, warmed when nothing was recorded yet
+
+def defaultKeys(data):
+
+    year = years(data)[0]
+    franchise1, franchise2 = franchises(data)[:2]
+
+    return chartKeys([allTimeView(data, nationalities(data)[0]),
+                      yearView(data, year), yearFranchiseView(data, year, yearFranchises(data, year)[0]),
+                      franchiseView(data, franchise1), headToHeadView(data, franchise1, franchise2),
+                      playerView(data, playerSearchIndex(data.player_stats).names[0])])
+
+# Returns the keys of the charts of the league of the view data to warm : the most requested ones, or the default ones
+# of the tabs
+
+def warmKeys(data, top=None):
+
+    top = WARM_TOP if top is None else top
+    counts = readStats(data.league)
+
+    keys = [key for key, _ in counts.most_common(top)] if counts else defaultKeys(data)[:top]
+
+    return [key for key in keys if key and key[0] in CHARTS]
+
+# Builds the figures of the charts to warm for a league into the figure cache, from the data the app draws them from,
+# returning the number built
+# A chart that fails to build (e.g. a franchise gone from the data) is logged and skipped, and warming goes on with the
+# next one. An error loading the data is logged rather than raised, as warming runs in a background thread
+
+def warmFigures(league=None, top=None):
+
+    built = 0
+    try:
+        keys = warmKeys(leagueData(league), top)
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        return built
+
+    for key in keys:
+        try:
+            viewChart(chartData(league, key), key)
+            built += 1
+        except Exception as e:
+            logging.info(f'Cache warming : skipped {key}, {e}')
+
+    logging.info(f'Cache warming : {built} figures built')
+
+    return built
+
+# Threads warming the figure cache, by league
+
+_warming = {}
+_warming_lock = threading.Lock()
+
+# Starts warming the figure cache with the charts of a league in a background thread, once per league and process
+# Sessions asking for a chart while it is being warmed wait for that build rather than starting their own
+
+def startWarming(league=None):
+
+    league = league or DEFAULT_LEAGUE
+    with _warming_lock:
+        if league not in _warming and WARM_TOP > 0:
+            _warming[league] = threading.Thread(target=warmFigures, args=(league,), name=f'warm-cache-{league}', daemon=True)
+            _warming[league].start()
+        return _warming.get(league)
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Shows the most requested charts, which are warmed when a process starts')
+    parser.add_argument('--top', type=int, default=WARM_TOP)
+    parser.add_argument('--league', default=DEFAULT_LEAGUE)
+    args = parser.parse_args()
+
+    try:
+        counts = readStats(args.league)
+        if not counts:
+            print('No requests recorded yet, the charts of the tabs as first opened are warmed :')
+        for key in warmKeys(leagueData(args.league), args.top):
+            print(f'{counts[key]:>8}  {key[0]} {list(key[1:])}')
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
@@ -0,0 +1,277 @@
+# Module ingests ball-by-ball feeds into the player season and match tables of the app, streaming them in chunks
+# Usage : python -m src.ball_ingest FEED.csv [--chunk-rows 200000] [--out data/ball_by_ball] [--phases-only]
+# A feed has one row per ball bowled, with the columns of BALL_COLUMNS. It is read a chunk of rows at a time, and each
+# chunk is aggregated into partial totals per innings of a player (batting and bowling), per over of a bowler and per
+# innings of a match. The partial totals of a chunk are added to the running totals, so an innings or an over split
+# across two chunks is counted once, and the memory held is that of a chunk and of the running totals, whatever the
+# size of the feed. The season statistics (averages, best figures, fifties ...) are only derived from the totals once
+# the whole feed is read, under the column names and dtypes of the player stats and matches tables.
+# The totals of every player season and team season are also split by phase of the innings, saved as the phase file of
+# src.phase_stats. Ingesting with --phases-only into the directory of the data files of a league adds the phase charts
+# to its tabs, leaving its tables as they are.
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import DATA_FILES
+from src.phase_stats import PHASE_FILE, PhaseTable, overPhase, savePhaseStats
+from src.exception import CustomException
+from src.logger import logging
+
+# Columns of a feed, along with their dtypes
+# Innings is 1 or 2, Over starts at 1, ExtraType is one of wides, noballs, byes, legbyes or penalty (empty for a ball
+# with no extras), IsWicket is 1 when a batter is dismissed on the ball, PlayerOut being the batter dismissed
+
+BALL_COLUMNS = {
+    'MatchRow': 'int64', 'Year': 'int64', 'Innings': 'int8', 'Over': 'int8', 'Ball': 'int8',
+    'BattingTeam': 'object', 'BowlingTeam': 'object', 'Batter': 'object', 'NonStriker': 'object', 'Bowler': 'object',
+    'BatterRuns': 'int8', 'ExtraRuns': 'int8', 'ExtraType': 'object', 'IsWicket': 'int8', 'DismissalKind': 'object',
+    'PlayerOut': 'object'
+}
+
+# Number of rows of a feed read at a time, set with the IPL_INGEST_CHUNK_ROWS environment variable
+
+CHUNK_ROWS = int(os.environ.get('IPL_INGEST_CHUNK_ROWS', '200000'))
+
+# Dismissals not credited to the bowler, and those which do not count as an out
+
+NOT_BOWLER_WICKETS = ['run out', 'retired hurt', 'retired out', 'obstructing the field']
+NOT_OUTS = ['retired hurt']
+
+# Keys and totals of every kind of partial totals
+
+PARTIALS = {
+    'batting': (['Year','MatchRow','TeamName','Name'], ['TotalRuns','Balls','Fours','Sixes','Outs']),
+    'bowling': (['Year','MatchRow','TeamName','Name'], ['TotalRunsConceded','BallsBowled','DotBallsBowled','FoursConceded','SixesConceded','Wickets']),
+    'overs': (['Year','MatchRow','TeamName','Name','Innings','Over'], ['TotalRunsConceded','BallsBowled']),
+    'innings': (['Year','MatchRow','Innings','TeamName'], ['Runs','Wickets','Balls']),
+    'player_phases': (['Year','TeamName','Name','Phase'], ['Runs','Balls','Fours','Sixes','Outs','RunsConceded','BallsBowled','DotBalls','Wickets']),
+    'team_phases': (['Year','TeamName','Phase'], ['Runs','Balls','Wickets','RunsConceded','BallsBowled','WicketsTaken'])
+}
+
+# Returns the partial totals of a chunk of balls
+
+def chunkPartials(balls):
+
+    extra_type = balls['ExtraType'].fillna('')
+    wide = extra_type == 'wides'
+    legal = ~wide & (extra_type != 'noballs')
+    conceded = balls['BatterRuns'] + np.where(wide | (extra_type == 'noballs'), balls['ExtraRuns'], 0)
+    dismissal = balls['DismissalKind'].fillna('')
+    out = (balls['IsWicket'] == 1) & ~dismissal.isin(NOT_OUTS)
+
+    faced = pd.DataFrame({'Year': balls['Year'], 'MatchRow': balls['MatchRow'], 'TeamName': balls['BattingTeam'], 'Name': balls['Batter'],
+                          'TotalRuns': balls['BatterRuns'].astype('int64'), 'Balls': (~wide).astype('int64'),
+                          'Fours': (balls['BatterRuns'] == 4).astype('int64'), 'Sixes': (balls['BatterRuns'] == 6).astype('int64'), 'Outs': 0})
+
+    # The batter dismissed is not always the striker, e.g. the non striker run out
+
+    dismissed = balls[out]
+    outs = pd.DataFrame({'Year': dismissed['Year'], 'MatchRow': dismissed['MatchRow'], 'TeamName': dismissed['BattingTeam'], 'Name': dismissed['PlayerOut'],
+                         'TotalRuns': 0, 'Balls': 0, 'Fours': 0, 'Sixes': 0, 'Outs': 1})
+
+    bowled = pd.DataFrame({'Year': balls['Year'], 'MatchRow': balls['MatchRow'], 'TeamName': balls['BowlingTeam'], 'Name': balls['Bowler'],
+                           'Innings': balls['Innings'], 'Over': balls['Over'],
+                           'TotalRunsConceded': conceded.astype('int64'), 'BallsBowled': legal.astype('int64'),
+                           'DotBallsBowled': (legal & (balls['BatterRuns'] + balls['ExtraRuns'] == 0)).astype('int64'),
+                           'FoursConceded': (balls['BatterRuns'] == 4).astype('int64'), 'SixesConceded': (balls['BatterRuns'] == 6).astype('int64'),
+                           'Wickets': ((balls['IsWicket'] == 1) & ~dismissal.isin(NOT_BOWLER_WICKETS)).astype('int64')})
+
+    innings = pd.DataFrame({'Year': balls['Year'], 'MatchRow': balls['MatchRow'], 'Innings': balls['Innings'], 'TeamName': balls['BattingTeam'],
+                            'Runs': (balls['BatterRuns'] + balls['ExtraRuns']).astype('int64'), 'Wickets': out.astype('int64'), 'Balls': legal.astype('int64')})
+
+    # Phase splits of the players and of the teams, on both sides of every ball
+
+    phase = overPhase(balls['Over'])
+    faced['Phase'], outs['Phase'], bowled['Phase'], innings['Phase'] = phase, phase[out.to_numpy()], phase, phase
+
+    player_phases = pd.concat([faced.rename(columns={'TotalRuns': 'Runs'}), outs.rename(columns={'TotalRuns': 'Runs'}),
+                               bowled.rename(columns={'TotalRunsConceded': 'RunsConceded', 'DotBallsBowled': 'DotBalls'})], ignore_index=True)
+    team_phases = pd.concat([innings, pd.DataFrame({'Year': balls['Year'], 'TeamName': balls['BowlingTeam'], 'Phase': phase,
+                                                    'RunsConceded': innings['Runs'], 'BallsBowled': innings['Balls'], 'WicketsTaken': innings['Wickets']})],
+                            ignore_index=True)
+
+    frames = {'batting': pd.concat([faced, outs], ignore_index=True), 'bowling': bowled, 'overs': bowled, 'innings': innings,
+              'player_phases': player_phases.fillna(0), 'team_phases': team_phases.fillna(0)}
+
+    return {name: frames[name].groupby(keys, sort=False)[columns].sum() for name, (keys, columns) in PARTIALS.items()}
+
+# Adds partial totals to the running totals
+
+def mergePartials(totals, partials):
+
+    return {name: pd.concat([part[name] for part in [totals] + partials if part is not None]).groupby(level=list(range(len(PARTIALS[name][0]))), sort=False).sum()
+            for name in PARTIALS}
+
+# Returns the totals of a feed, read a chunk of rows at a time, or all at once when chunk_rows is None
+# The partial totals of the chunks are added to the running totals once they hold as many rows as a chunk, or as the
+# running totals when larger, rather than after every chunk, so small chunks do not regroup the running totals over and
+# over
+
+def ingestTotals(path, chunk_rows=CHUNK_ROWS):
+
+    try:
+        if chunk_rows is None:
+            return chunkPartials(pd.read_csv(path, usecols=list(BALL_COLUMNS), dtype=BALL_COLUMNS))
+
+        totals, pending = None, []
+        with pd.read_csv(path, usecols=list(BALL_COLUMNS), dtype=BALL_COLUMNS, chunksize=chunk_rows) as chunks:
+            for balls in chunks:
+                pending.append(chunkPartials(balls))
+                size = 0 if totals is None else len(totals['batting']) + len(totals['overs'])
+                if sum(len(part['batting']) + len(part['overs']) for part in pending) >= max(chunk_rows, size):
+                    totals, pending = mergePartials(totals, pending), []
+
+        return mergePartials(totals, pending)
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+def _ratio(numerator, denominator, default):
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, np.round(numerator / denominator, 2), default)
+
+def _overs(balls):
+
+    return balls // 6 + (balls % 6) / 10
+
+# Returns the columns and dtypes of a table of the app, which the derived tables follow
+
+def _schema(name):
+
+    return pd.read_csv(DATA_FILES[name]).dtypes
+
+def _conform(table, name):
+
+    schema = _schema(name)
+    columns = [column for column in schema.index if column in table]
+
+    return table[columns].astype(schema[columns].to_dict())
+
+# Derives the statistics of every player season from the totals, under the columns of the player stats table they have
+
+def playerSeasons(totals):
+
+    try:
+        keys = ['Year','TeamName','Name']
+
+        batting = totals['batting'].reset_index()
+        batting['NotOut'] = batting['Outs'] == 0
+        batting['FiftyPlusRuns'] = (batting['TotalRuns'] >= 50) & (batting['TotalRuns'] < 100)
+        batting['Centuries'] = batting['TotalRuns'] >= 100
+        batting_seasons = batting.groupby(keys)[['TotalRuns','Balls','Fours','Sixes','Outs','FiftyPlusRuns','Centuries']].sum()
+        batting_seasons['Innings'] = batting.groupby(keys).size()
+
+        best = batting.sort_values(['TotalRuns','NotOut'], ascending=False, kind='stable').drop_duplicates(keys).set_index(keys)
+        batting_seasons['HighestScore'] = best['TotalRuns']
+        batting_seasons['IsNotDismissed'] = best['NotOut'].astype(float)
+        batting_seasons['BestScore'] = best['TotalRuns'].astype(str) + np.where(best['NotOut'], '*', '')
+
+        bowling = totals['bowling'].reset_index()
+        bowling['FourWickets'] = bowling['Wickets'] == 4
+        bowling['FiveWickets'] = bowling['Wickets'] >= 5
+        bowling_seasons = bowling.groupby(keys)[['TotalRunsConceded','DotBallsBowled','FoursConceded','SixesConceded','Wickets','BallsBowled','FourWickets','FiveWickets']].sum()
+
+        best = bowling.sort_values(['Wickets','TotalRunsConceded'], ascending=[False,True], kind='stable').drop_duplicates(keys).set_index(keys)
+        bowling_seasons['BestBowlingWickets'] = best['Wickets']
+        bowling_seasons['BestBowlingRuns'] = best['TotalRunsConceded']
+
+        overs = totals['overs'].reset_index()
+        maidens = (overs['BallsBowled'] >= 6) & (overs['TotalRunsConceded'] == 0)
+        bowling_seasons['Maidens'] = maidens.groupby([overs[key] for key in keys]).sum()
+
+        matches = pd.concat([batting[keys + ['MatchRow']], bowling[keys + ['MatchRow']]]).drop_duplicates()
+        seasons = batting_seasons.join(bowling_seasons, how='outer')
+        seasons['Matches'] = matches.groupby(keys).size()
+        seasons = seasons.fillna(0).reset_index()
+
+        seasons['NotOuts'] = seasons['Innings'] - seasons['Outs']
+        seasons['StrikeRate'] = _ratio(seasons['TotalRuns'] * 100, seasons['Balls'], 0.0)
+        seasons['BattingAverage'] = _ratio(seasons['TotalRuns'], seasons['Outs'], -1.0)
+        seasons['OversBowled'] = _overs(seasons['BallsBowled'])
+        seasons['EconomyRate'] = _ratio(seasons['TotalRunsConceded'] * 6, seasons['BallsBowled'], 0.0)
+        seasons['BowlingAverage'] = _ratio(seasons['TotalRunsConceded'], seasons['Wickets'], 0.0)
+        seasons['BowlingStrikeRate'] = _ratio(seasons['BallsBowled'], seasons['Wickets'], 0.0)
+        seasons['BestScore'] = seasons['BestScore'].replace(0, 'Not Available')
+        seasons['BestBowling'] = seasons['BestBowlingWickets'].astype(int).astype(str) + '/' + seasons['BestBowlingRuns'].astype(int).astype(str)
+
+        return _conform(seasons, 'player_stats')
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Derives the scores of both innings of every match from the totals, under the columns of the matches table they have
+
+def matchScores(totals):
+
+    try:
+        innings = totals['innings'].reset_index()
+        innings['Overs'] = _overs(innings['Balls'])
+        innings['Summary'] = (innings['Runs'].astype(str) + '/' + innings['Wickets'].astype(str)
+                              + ' (' + innings['Overs'].map('{:g}'.format) + ' Overs)')
+
+        first = innings[innings['Innings'] == 1].set_index(['Year','MatchRow'])
+        second = innings[innings['Innings'] == 2].set_index(['Year','MatchRow'])
+
+        matches = pd.DataFrame({'FirstBattingTeamName': first['TeamName'], '1Summary': first['Summary'],
+                                'Runs1': first['Runs'], 'Wickets1': first['Wickets'], 'Overs1': first['Overs']})
+        matches = matches.join(pd.DataFrame({'SecondBattingTeamName': second['TeamName'], '2Summary': second['Summary'],
+                                             'Runs2': second['Runs'], 'Wickets2': second['Wickets'], 'Overs2': second['Overs']}), how='outer')
+
+        return _conform(matches.reset_index(), 'matches')
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Returns the phase tables of the players and of the teams from the totals
+
+def phaseTables(totals):
+
+    return {'players': PhaseTable.fromFrame(totals['player_phases'].reset_index()),
+            'teams': PhaseTable.fromFrame(totals['team_phases'].reset_index())}
+
+# Ingests a feed, returning the player seasons and the match scores derived from it
+
+def ingestFeed(path, chunk_rows=CHUNK_ROWS):
+
+    totals = ingestTotals(path, chunk_rows)
+
+    return {'player_stats': playerSeasons(totals), 'matches': matchScores(totals)}
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Ingests a ball-by-ball feed into player season and match tables, in chunks')
+    parser.add_argument('feed')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--out', default=os.path.join('data', 'ball_by_ball'))
+    parser.add_argument('--phases-only', action='store_true', help='only write the phase file, not the tables')
+    args = parser.parse_args()
+
+    try:
+        start = time.perf_counter()
+
+        totals = ingestTotals(args.feed, args.chunk_rows)
+        tables = {} if args.phases_only else {'player_stats': playerSeasons(totals), 'matches': matchScores(totals)}
+        phases = phaseTables(totals)
+
+        os.makedirs(args.out, exist_ok=True)
+        for name, table in tables.items():
+            table.to_csv(os.path.join(args.out, os.path.basename(DATA_FILES[name])), index=False)
+        savePhaseStats(os.path.join(args.out, PHASE_FILE), phases)
+
+        sizes = ', '.join(f'{name} {len(table)} rows' for name, table in tables.items())
+        phase_sizes = ', '.join(f'{name} phases {len(table)} rows ({table.nbytes/1024:.0f} KB)' for name, table in phases.items())
+        print(f'{args.feed} ingested into {args.out} in {time.perf_counter() - start:.1f} s : {", ".join(filter(None, [sizes, phase_sizes]))}')
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
@@ -0,0 +1,509 @@
+# Module benchmarks the optimized code paths against the regular ones
+# Usage : python -m src.benchmark <suite> [--repeat N]
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+from src import cache, figure_templates
+from src.components.all_time_analysis import *
+from src.components.yearwise_analysis import *
+from src.components.franchisewise_analysis import *
+from src.components.playerwise_analysis import *
+from src.figure_serialization import payloadReport
+from src.data_loader import STRING_TYPES, loadTables, publishTables, filesVersion
+from src.access_stats import warmFigures, warmKeys
+from src.ball_ingest import CHUNK_ROWS, ingestFeed
+from src.cache import memoryCache, memoryCaches
+from src.figure_serialization import browserFigure
+from src.pipeline import NODES, Pipeline
+from src.synthetic import generateTables, writeBallFeed
+from src.render_scheduler import ABOVE_THE_FOLD, RenderScheduler
+from src.views import CHARTS, chartData, leagueData, viewData, viewChart, viewTable, viewHtml, nationalities, years, franchises, yearFranchises, allTimeView, yearView, yearFranchiseView, franchiseView, headToHeadView, playerView
+from src.repository import repository
+from src.exception import CustomException
+from src.logger import logging
+
+# Runs a function a number of times and returns the average time taken, in milliseconds
+
+def timeit(function, repeat):
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+
+    return (time.perf_counter() - start) / repeat * 1000
+
+# Prints the rows of a benchmark as a table
+
+def report(rows, columns):
+
+    print(pd.DataFrame(rows, columns=columns).to_string(index=False))
+
+# Compares building the charts through the regular plotly calls against building them from the figure templates
+
+def templatesSuite(repeat):
+
+    player_stats = pd.read_csv('data/player_stats_all_time.csv')
+
+    year = int(player_stats['Year'].max())
+    franchise = player_stats[player_stats['Year'] == year]['TeamName'].iloc[0]
+    player = player_stats[player_stats['Year'] == year]['Name'].iloc[0]
+
+    charts = [('topRunsYearGraph', lambda: topRunsYearGraph(player_stats,year)),
+              ('topWicketsYearGraph', lambda: topWicketsYearGraph(player_stats,year)),
+              ('franchiseRunsGraph', lambda: franchiseRunsGraph(player_stats,year,franchise)),
+              ('franchiseWicketsGraph', lambda: franchiseWicketsGraph(player_stats,year,franchise)),
+              ('runsPerSeason', lambda: runsPerSeason(player_stats,player)),
+              ('economyPerSeason', lambda: economyPerSeason(player_stats,player))]
+
+    rows = []
+    for name, chart in charts:
+
+        figure_templates.setFastPath(False)
+        regular = timeit(chart, repeat)
+
+        figure_templates.setFastPath(True)
+        chart()
+        fast = timeit(chart, repeat)
+
+        rows.append((name, round(regular,2), round(fast,2), round(regular/fast,1)))
+
+    report(rows, ['Chart','Regular (ms)','Template (ms)','Speedup'])
+
+# Measures the payload size of every chart of each tab, before and after compaction
+
+def payloadSuite(repeat):
+
+    player_stats = pd.read_csv('data/player_stats_all_time.csv')
+    points_table = pd.read_csv('data/points_table_all_time.csv')
+    matches = pd.read_csv('data/matches_all_time.csv')
+
+    nationality = 'Indian and Overseas'
+    year = int(player_stats['Year'].max())
+    franchise = 'Mumbai Indians'
+    player = 'Virat Kohli'
+
+    table = points_table[points_table['Year'] == year][['Standings','TeamName','Matches','Wins','Loss','Tied','NoResult','Points','NetRunRate']]
+    table = table.rename(columns={'TeamName':'Team','Wins':'Win','Tied':'Tie','NoResult':'No Result','NetRunRate':'Net Run Rate'})
+
+    tabs = {
+        'All-time': [('topWinsTeamGraph', topWinsTeamGraph(matches)),
+                     ('playerStrength', playerStrength(player_stats)),
+                     ('topRunsGraph', topRunsGraph(player_stats,nationality)),
+                     ('topWicketsGraph', topWicketsGraph(player_stats,nationality)),
+                     ('battingLandmark', battingLandmark(player_stats,nationality)),
+                     ('bowlingLandmark', bowlingLandmark(player_stats,nationality)),
+                     ('boundaryCount', boundaryCount(player_stats,nationality))],
+        'Year-wise': [('pointsTableGraph', pointsTableGraph(table)),
+                      ('topRunsYearGraph', topRunsYearGraph(player_stats,year)),
+                      ('topWicketsYearGraph', topWicketsYearGraph(player_stats,year)),
+                      ('topStrikerBat', topStrikerBat(player_stats,year)),
+                      ('topStrikerBowl', topStrikerBowl(player_stats,year)),
+                      ('franchiseRunsGraph', franchiseRunsGraph(player_stats,year,franchise)),
+                      ('franchiseWicketsGraph', franchiseWicketsGraph(player_stats,year,franchise))],
+        'Franchise-wise': [('franchiseTotalRuns', franchiseTotalRuns(player_stats,franchise)),
+                           ('franchiseTotalWickets', franchiseTotalWickets(player_stats,franchise)),
+                           ('standings', standings(points_table,franchise)),
+                           ('avgAge', avgAge(player_stats,franchise))],
+        'Player-wise': [('batStats', batStats(player_stats,player)),
+                        ('bowlStats', bowlStats(player_stats,player)),
+                        ('runsPerSeason', runsPerSeason(player_stats,player)),
+                        ('strikeRatePerSeason', strikeRatePerSeason(player_stats,player)),
+                        ('averagePerSeason', averagePerSeason(player_stats,player)),
+                        ('wicketsPerSeason', wicketsPerSeason(player_stats,player)),
+                        ('bowlingStrikeRatePerSeason', bowlingStrikeRatePerSeason(player_stats,player)),
+                        ('economyPerSeason', economyPerSeason(player_stats,player))]
+    }
+
+    totals = []
+    for tab, figures in tabs.items():
+        rows = payloadReport(figures)
+        print(f'{tab}')
+        report([list(row.values()) for row in rows], list(rows[0].keys()))
+        print()
+
+        original = sum(row['Original (bytes)'] for row in rows)
+        compact = sum(row['Compact (bytes)'] for row in rows)
+        totals.append((tab, original, compact, round((1 - compact/original)*100, 1)))
+
+    report(totals, ['Tab','Original (bytes)','Compact (bytes)','Saved (%)'])
+
+# Compares answering the queries of the app from the dataframes in memory against answering them from the embedded database
+
+def backendSuite(repeat):
+
+    tables = loadTables()
+    player_stats = tables['player_stats']
+
+    year = int(player_stats['Year'].max())
+    franchise = 'Mumbai Indians'
+    opponent = 'Chennai Super Kings'
+    player = 'Virat Kohli'
+
+    start = time.perf_counter()
+    repos = {backend: repository(tables, backend) for backend in ['pandas','sqlite']}
+    print(f'Repositories ready in {(time.perf_counter() - start)*1000:.1f} ms\n')
+
+    queries = [('Season of a year', lambda repo: repo.playerStats(year=year)),
+               ('Top 5 run scorers of a franchise in a year', lambda repo: repo.franchiseTopScorers(year,franchise)),
+               ('Seasons of a player', lambda repo: repo.playerStats(player=player)),
+               ('Seasons of a franchise', lambda repo: repo.playerStats(franchise=franchise)),
+               ('Matches of a franchise in a year', lambda repo: repo.matches(year=year,franchise=franchise)),
+               ('Head to head matches', lambda repo: repo.matches(franchise=franchise,opponent=opponent)),
+               ('franchiseRunsGraph', lambda repo: franchiseRunsGraph(repo.franchiseTopScorers(year,franchise),year,franchise)),
+               ('runsPerSeason', lambda repo: runsPerSeason(repo.playerStats(player=player),player))]
+
+    rows = []
+    for name, query in queries:
+        timings = [round(timeit(lambda: query(repos[backend]), repeat),3) for backend in ['pandas','sqlite']]
+        rows.append((name, *timings))
+
+    report(rows, ['Query','pandas (ms)','sqlite (ms)'])
+
+# Returns the proportional set size of the current process in KB, from /proc (Linux only), None elsewhere
+
+def _pss():
+
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+# Loads the tables the way a worker of the app does, and returns the bytes of table data it holds privately and through
+# the shared mapped files, along with its proportional set size
+
+def _workerMemory(shared):
+
+    tables = loadTables(shared=shared)
+
+    private = mapped = 0
+    for table in tables.values():
+        usage = table.memory_usage(deep=True, index=False)
+        for column in table.columns:
+            values = table[column].values
+            wrapped = table[column].dtype in STRING_TYPES.values() or (values.dtype.kind in 'iuf' and not values.flags.writeable)
+            if shared and wrapped:
+                mapped += int(usage[column])
+            else:
+                private += int(usage[column])
+
+    return private, mapped, _pss()
+
+# Compares the memory held by several worker processes loading their own copy of the tables against mapping the shared tables
+
+def sharedSuite(repeat, workers=4):
+
+    publishTables(filesVersion())
+
+    context = multiprocessing.get_context('spawn')
+
+    rows = []
+    for shared in [False, True]:
+        with context.Pool(workers) as pool:
+            results = pool.map(_workerMemory, [shared]*workers)
+
+        private = sum(result[0] for result in results)
+        mapped = results[0][1]
+        pss = [result[2] for result in results]
+
+        rows.append(('Shared Arrow files' if shared else 'Csv files', workers, round(private/1024), round(mapped/1024),
+                     round((private + mapped)/1024), sum(pss) if None not in pss else 'n/a'))
+
+    report(rows, ['Tables','Workers','Private table data (KB)','Shared table data (KB)','Host table data (KB)','Host PSS (KB)'])
+
+# Compares building the charts of each tab one after the other against building them concurrently, from cold caches,
+# with and without building the charts above the fold first
+# Reports the time until the first chart is ready to be drawn, until all the charts above the fold are and until all are
+
+def renderSuite(repeat):
+
+    data = viewData(loadTables())
+
+    tabs = [('All-time', allTimeView(data, 'Indian and Overseas')),
+            ('Year-wise', yearView(data, 2023) + yearFranchiseView(data, 2023, 'Mumbai Indians')),
+            ('Franchise-wise', franchiseView(data, 'Mumbai Indians') + headToHeadView(data, 'Mumbai Indians', 'Chennai Super Kings')),
+            ('Player-wise', playerView(data, 'Virat Kohli'))]
+
+    def render(view, workers, progressive):
+        memoryCache('figures').clear()
+        memoryCache('view_tables').clear()
+
+        start = time.perf_counter()
+
+        scheduler = RenderScheduler(workers)
+        for position, key in enumerate(block[0] for kind, *block in view if kind == 'chart'):
+            priority = int(progressive and position >= ABOVE_THE_FOLD)
+            scheduler.submit(position, lambda key=key: browserFigure(viewChart(data, key)), priority)
+
+        first = above_the_fold = None
+        remaining = set(range(ABOVE_THE_FOLD))
+        for position, _ in scheduler.completed():
+            elapsed = time.perf_counter() - start
+            first = elapsed if first is None else first
+            remaining.discard(position)
+            if not remaining and above_the_fold is None:
+                above_the_fold = elapsed
+        return first * 1000, above_the_fold * 1000, (time.perf_counter() - start) * 1000
+
+    rows = []
+    for tab, view in tabs:
+        for workers in [1, 4]:
+            for progressive in [False, True]:
+                timings = [render(view, workers, progressive) for _ in range(repeat)]
+                rows.append((tab, workers, 'yes' if progressive else 'no', *[round(sum(t[i] for t in timings)/repeat, 1) for i in range(3)]))
+
+    report(rows, ['Tab','Workers','Above the fold first','First chart (ms)','Above the fold (ms)','All charts (ms)'])
+
+# Compares a burst of sessions opening the same selection at once on cold caches, each building the charts it misses,
+# against the same burst with the requests for the same chart coalesced into a single build
+
+def herdSuite(repeat):
+
+    data = viewData(loadTables())
+    keys = [block[0] for kind, *block in yearView(data, 2023) + yearFranchiseView(data, 2023, 'Mumbai Indians') if kind == 'chart']
+
+    def burst(sessions, coalesce):
+        cache = memoryCache('figures')
+        cache.clear()
+        memoryCache('view_tables').clear()
+
+        builds = []
+        def build(key):
+            builds.append(key)
+            return CHARTS[key[0]](data, *key[1:])
+
+        def session(barrier):
+            barrier.wait()
+            for key in keys:
+                if coalesce:
+                    cache.getOrCompute((data.version, key), lambda: build(key))
+                elif cache.get((data.version, key)) is None:
+                    cache.set((data.version, key), build(key))
+
+        barrier = threading.Barrier(sessions)
+        threads = [threading.Thread(target=session, args=(barrier,)) for _ in range(sessions)]
+
+        start, cpu = time.perf_counter(), time.process_time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return (time.perf_counter() - start) * 1000, (time.process_time() - cpu) * 1000, len(builds)
+
+    rows = []
+    for sessions in [1, 10, 50]:
+        for coalesce in [False, True]:
+            timings = [burst(sessions, coalesce) for _ in range(repeat)]
+            rows.append((sessions, 'yes' if coalesce else 'no', *[round(sum(t[i] for t in timings)/repeat, 1) for i in range(3)]))
+
+    report(rows, ['Sessions','Coalesced','Wall time (ms)','CPU time (ms)','Chart builds'])
+
+# Compares the time the first sessions after a start wait for the most requested charts, on cold caches and once the
+# cache has been warmed with them
+
+def warmSuite(repeat):
+
+    keys = warmKeys(leagueData())
+
+    def firstRequests(warm):
+        memoryCache('figures').clear()
+        memoryCache('view_tables').clear()
+
+        start = time.perf_counter()
+        if warm:
+            warmFigures()
+        warming = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for key in keys:
+            try:
+                viewChart(chartData(None, key), key)
+            except CustomException:
+                pass
+
+        return warming * 1000, (time.perf_counter() - start) * 1000
+
+    rows = []
+    for warm in [False, True]:
+        timings = [firstRequests(warm) for _ in range(repeat)]
+        rows.append((len(keys), 'yes' if warm else 'no', *[round(sum(t[i] for t in timings)/repeat, 1) for i in range(2)]))
+
+    report(rows, ['Charts','Warmed','Warming at start (ms)','First requests (ms)'])
+
+# Compares building every derived table of the pipeline from the tables against reading them back from disk, and times a
+# refresh after a change to the matches only, which rebuilds the nodes depending on them and reads back the others
+
+def pipelineSuite(repeat):
+
+    tables = loadTables()
+    changed = dict(tables, matches=tables['matches'].iloc[:-1])
+
+    def run(tables, rebuild):
+        memoryCache('pipeline').clear()
+        pipeline = Pipeline(tables, enabled=True)
+
+        start = time.perf_counter()
+        pipeline.buildAll(rebuild)
+        for name in NODES:
+            pipeline.node(name)
+
+        return (time.perf_counter() - start) * 1000, len(pipeline.built)
+
+    rows = []
+    for case, case_tables, rebuild in [('Build every node', tables, True), ('Read back from disk', tables, False),
+                                       ('Refresh after a change to the matches', changed, False)]:
+        timings = []
+        for _ in range(repeat):
+            run(tables, False)
+            timings.append(run(case_tables, rebuild))
+        rows.append((case, round(sum(t[0] for t in timings)/repeat, 1), timings[-1][1], len(NODES)))
+
+    run(tables, False)
+
+    report(rows, ['Case','Time (ms)','Nodes built','Nodes'])
+
+# Times every tab on synthetic tables at a multiple of the size of the real data (scale 1 is the real data)
+# A tab is rendered first right after the tables are loaded, building the derived tables, indexes and repository it needs
+# (cold), and then again with only its figures, tables and views cleared (warm). The artifacts are written to a temporary
+# directory, leaving those of the real data untouched
+
+def scalingSuite(repeat, scales=[1, 10, 100]):
+
+    cache_dir = cache.CACHE_DIR
+    cache.CACHE_DIR = tempfile.mkdtemp(prefix='ipl_scaling_')
+
+    def render(data, views):
+        for view in views:
+            for kind, *block in view:
+                if kind == 'chart':
+                    try:
+                        viewChart(data, block[0])
+                    except CustomException:
+                        pass
+                elif kind == 'table':
+                    viewTable(data, block[0])
+                elif kind == 'html':
+                    viewHtml(data, block[0])
+
+    def clearViews():
+        for name in ['figures','view_tables','views']:
+            memoryCache(name).clear()
+
+    rows = []
+    try:
+        for scale in scales:
+            for memory_cache in memoryCaches():
+                memory_cache.clear()
+
+            tables = loadTables() if scale == 1 else generateTables(scale)
+
+            start = time.perf_counter()
+            data = viewData(tables)
+            load = (time.perf_counter() - start) * 1000
+
+            year = max(years(data))
+            franchise = franchises(data)[0]
+            tabs = [('All-time', lambda: [allTimeView(data, nationalities(data)[0])]),
+                    ('Year-wise', lambda: [yearView(data, year), yearFranchiseView(data, year, yearFranchises(data, year)[0])]),
+                    ('Franchise-wise', lambda: [franchiseView(data, franchise), headToHeadView(data, franchise, franchises(data)[1])]),
+                    ('Player-wise', lambda: [playerView(data, data.player_stats['Name'].iloc[-1])])]
+
+            for tab, views in tabs:
+                start = time.perf_counter()
+                render(data, views())
+                cold = (time.perf_counter() - start) * 1000
+
+                warm = 0
+                for _ in range(repeat):
+                    clearViews()
+                    start = time.perf_counter()
+                    render(data, views())
+                    warm += (time.perf_counter() - start) * 1000
+
+                rows.append((scale, len(tables['player_stats']), len(tables['matches']), tab, '' if load is None else round(load, 1), round(cold, 1), round(warm/repeat, 1)))
+                load = None
+
+    finally:
+        shutil.rmtree(cache.CACHE_DIR, ignore_errors=True)
+        cache.CACHE_DIR = cache_dir
+
+    report(rows, ['Scale','Player seasons','Matches','Tab','Load (ms)','Cold (ms)','Warm (ms)'])
+
+# Compares ingesting a ball-by-ball feed all at once against streaming it in chunks, timing it and tracing the peak of
+# the memory allocated, for synthetic feeds of the matches at the given scales, written to a temporary directory
+
+def ingestSuite(repeat, scales=[1, 10]):
+
+    feed_dir = tempfile.mkdtemp(prefix='ipl_ingest_')
+
+    rows = []
+    try:
+        for scale in scales:
+            path = os.path.join(feed_dir, f'ball_by_ball_x{scale}.csv')
+            writeBallFeed(loadTables() if scale == 1 else generateTables(scale), path)
+            with open(path) as f:
+                balls = sum(1 for _ in f) - 1
+
+            for chunk_rows in [None, CHUNK_ROWS, 20000]:
+                timings = []
+                for run in range(repeat):
+                    if run == 0:
+                        tracemalloc.start()
+                    start = time.perf_counter()
+                    ingestFeed(path, chunk_rows)
+                    timings.append((time.perf_counter() - start) * 1000)
+                    if run == 0:
+                        peak = tracemalloc.get_traced_memory()[1]
+                        tracemalloc.stop()
+
+                rows.append((scale, balls, 'all at once' if chunk_rows is None else chunk_rows, round(sum(timings)/repeat, 1), round(peak/1024/1024, 1)))
+
+    finally:
+        shutil.rmtree(feed_dir, ignore_errors=True)
+
+    report(rows, ['Scale','Balls','Chunk rows','Time (ms)','Peak memory (MB)'])
+
+SUITES = {
+    'templates': templatesSuite,
+    'payload': payloadSuite,
+    'backend': backendSuite,
+    'shared': sharedSuite,
+    'render': renderSuite,
+    'herd': herdSuite,
+    'warm': warmSuite,
+    'pipeline': pipelineSuite,
+    'scaling': scalingSuite,
+    'ingest': ingestSuite
+}
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Benchmarks the optimized code paths against the regular ones')
+    parser.add_argument('suite', choices=sorted(SUITES))
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--scales', type=int, nargs='+', help='scales of the synthetic tables of the scaling and ingest benchmarks')
+    args = parser.parse_args()
+
+    try:
+        logging.info(f'Running the {args.suite} benchmark')
+        if args.scales:
+            SUITES[args.suite](args.repeat, args.scales)
+        else:
+            SUITES[args.suite](args.repeat)
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
@@ -0,0 +1,254 @@
+# Module holds the caches shared by all the sessions of the app, along with the directory of their on-disk artifacts
+# The caches share a memory budget : once the entries of all the caches hold more than the budget, the least recently
+# used entries across all of them are evicted until they fit again
+# Concurrent requests for the same missing entry are coalesced into a single computation, so a burst of sessions opening
+# the same selection at once computes each of its charts only once
+
+import hashlib
+import itertools
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from plotly.basedatatypes import BaseFigure
+
+# Directory where the artifacts built from the data (e.g. the ground map) are persisted
+
+CACHE_DIR = os.environ.get('IPL_CACHE_DIR', 'artifacts')
+
+# Memory budget of all the caches together in MB, set with the IPL_CACHE_BUDGET_MB environment variable
+# No budget is enforced when it is 0
+
+BUDGET_MB = float(os.environ.get('IPL_CACHE_BUDGET_MB', '0'))
+
+def setBudget(budget_mb):
+
+    global BUDGET_MB
+    BUDGET_MB = budget_mb
+    enforceBudget()
+
+# Returns a short hash identifying the content of the given dataframes, used to key everything derived from them
+
+def dataVersion(*frames):
+
+    digest = hashlib.sha1()
+    for frame in frames:
+        digest.update(str(frame.shape).encode())
+        digest.update(','.join(map(str, frame.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(frame, index=False).values.tobytes())
+
+    return digest.hexdigest()[:16]
+
+# Returns the path of an artifact within the cache directory, creating its parent directories
+
+def artifactPath(*parts):
+
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    return path
+
+# Returns the deep size of an object in bytes, counting every object reachable from it once
+
+def deepSize(obj, seen=None):
+
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (obj.nbytes if obj.base is not None else 0)
+    if isinstance(obj, BaseFigure):
+        return deepSize(obj.to_plotly_json(), seen)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(deepSize(k, seen) + deepSize(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(deepSize(item, seen) for item in obj)
+    if hasattr(obj, '__dict__') and not isinstance(obj, type):
+        return sys.getsizeof(obj) + deepSize(vars(obj), seen)
+
+    return sys.getsizeof(obj)
+
+# Ticks of the shared clock, telling when an entry of any cache was last used
+
+_clock = itertools.count()
+
+# Computation of a missing entry in flight, which the other requests for the entry wait on
+
+class _Flight:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+    def result(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+# In-memory cache shared by all the sessions, entries are kept in the order they were last used
+
+class MemoryCache:
+
+    def __init__(self, name):
+        self.name = name
+        self.evictions = 0
+        self.coalesced = 0
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._sizes = {}
+        self._ticks = {}
+        self._lock = threading.RLock()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            self._ticks[key] = next(_clock)
+            return self._entries[key]
+
+    def set(self, key, value):
+        size = deepSize(value) if BUDGET_MB > 0 else None
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._sizes[key] = size
+            self._ticks[key] = next(_clock)
+        enforceBudget(protect=(self, key))
+
+    # Returns the value of an entry, computing it with build when missing
+    # The first request for a missing entry computes it while the concurrent requests for the same entry wait for its
+    # value, or its error, rather than computing it again
+
+    def getOrCompute(self, key, build):
+        with self._lock:
+            if key in self._entries:
+                return self.get(key)
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                flight = self._flights[key] = _Flight()
+                leader = True
+
+        if not leader:
+            return flight.result()
+
+        try:
+            flight.value = build()
+            self.set(key, flight.value)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+        return flight.value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._ticks.clear()
+
+    def items(self):
+        with self._lock:
+            return list(self._entries.items())
+
+    # Deep size of an entry in bytes, measured when first needed
+
+    def size(self, key):
+        with self._lock:
+            if self._sizes.get(key) is None:
+                self._sizes[key] = deepSize(self._entries[key])
+            return self._sizes[key]
+
+    def totalSize(self):
+        with self._lock:
+            return sum(self.size(key) for key in self._entries)
+
+    # Least recently used entry, along with the tick it was last used at
+
+    def coldest(self):
+        with self._lock:
+            if not self._entries:
+                return None
+            key = next(iter(self._entries))
+            return key, self._ticks[key]
+
+    def evict(self, key):
+        with self._lock:
+            if key in self._entries:
+                del self._entries[key]
+                del self._sizes[key]
+                del self._ticks[key]
+                self.evictions += 1
+
+# Caches created so far, keyed by their name
+
+_caches = {}
+_caches_lock = threading.Lock()
+_budget_lock = threading.Lock()
+
+# Returns the cache with the given name, creating it on first use
+
+def memoryCache(name):
+
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = MemoryCache(name)
+        return _caches[name]
+
+# Returns all the caches created so far
+
+def memoryCaches():
+
+    with _caches_lock:
+        return list(_caches.values())
+
+# Evicts the least recently used entries across all the caches until they fit within the budget
+# The entry given as protect, usually the one just added, is never evicted
+
+def enforceBudget(protect=None):
+
+    if BUDGET_MB <= 0:
+        return
+
+    with _budget_lock:
+        budget = BUDGET_MB * 1024 * 1024
+        caches = memoryCaches()
+        total = sum(cache.totalSize() for cache in caches)
+
+        while total > budget:
+            candidates = []
+            for cache in caches:
+                coldest = cache.coldest()
+                if coldest is not None and (cache, coldest[0]) != protect:
+                    candidates.append((coldest[1], cache, coldest[0]))
+            if not candidates:
+                break
+
+            _, cache, key = min(candidates, key=lambda candidate: candidate[0])
+            total -= cache.size(key)
+            cache.evict(key)
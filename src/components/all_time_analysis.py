@@ -451,6 +451,202 @@ def boundaryCount(player_stats,nationality):
         logging.error(CustomException(e,sys))
         raise CustomException(e,sys)
 
+# Generates the graph of the share of the matches won by the team winning the toss and by the team chasing, per season
+# seasons holds a row per season of the toss and chase cube, with their rates
+
+def tossChaseSeasonGraph(seasons):
+
+    try:
+        fig = go.Figure()
+
+        for column, name, color in [('TossWinRate','Toss Winner Won','#2F435A'), ('ChaseWinRate','Chasing Team Won','#ffa500')]:
+            fig.add_trace(go.Scatter(x = seasons.Year,
+                                    y = seasons[column],
+                                    name = name,
+                                    mode = 'lines+markers',
+                                    customdata = seasons['Matches'],
+                                    hovertemplate = '%{x} : %{y}% of %{customdata} matches',
+                                    marker = dict(size = 8),
+                                    line = dict(width = 1, color = color)))
+
+        fig.add_hline(y = 50, line_dash = 'dot', line_width = 1, line_color = '#A8BBB0')
+
+        fig.update_xaxes(title = 'Year', showgrid=False)
+        fig.update_yaxes(title = 'Matches Won (%)', range = [0,100], showgrid=False)
+
+        chase_rate = round(seasons['ChaseWins'].sum() * 100 / seasons['Matches'].sum(), 1)
+        title_text = f"Teams chasing won <span style='color:#ffa500'>{chase_rate}%</span> of the matches"
+
+        fig.update_layout(plot_bgcolor = 'white',
+                        title = dict(text = title_text),
+                        legend = dict(orientation = 'h', y = -0.2),
+                        width = 900,
+                        height = 500,
+                        font = dict(family='Verdana',size = 11,color='#444444'))
+
+        return fig
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Generates the bar chart of the share of the chases won by band of target
+# bands holds a row per band of target of the toss and chase cube, with their rates
+
+def chaseTargetGraph(bands):
+
+    try:
+        fig = go.Figure()
+
+        fig.add_trace(go.Bar(x = bands.TargetBand.astype(str),
+                            y = bands.ChaseWinRate,
+                            name = '',
+                            text = bands.ChaseWinRate.map(lambda rate: f'{rate}%'),
+                            textposition = 'outside',
+                            customdata = bands[['ChaseWins','Matches']],
+                            hovertemplate = 'Target %{x} : %{customdata[0]} won out of %{customdata[1]}',
+                            width = 0.5,
+                            marker = dict(color = '#02894B', line_width = 0)))
+
+        fig.update_xaxes(title = 'Target', showgrid=False)
+        fig.update_yaxes(showticklabels=False, range = [0,110], showgrid=False)
+
+        fig.update_layout(plot_bgcolor = 'white',
+                        title = dict(text = '<b>Chases Won by Target</b>'),
+                        width = 800,
+                        height = 450,
+                        font = dict(family='Verdana',size = 11,color='#444444'))
+
+        return fig
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Generates the bar chart of the share of the chases won at every ground having held at least a number of matches
+# grounds holds a row per ground of the toss and chase cube, with their rates
+
+def chaseGroundGraph(grounds, min_matches=15):
+
+    try:
+        grounds = grounds[grounds['Matches'] >= min_matches].sort_values('ChaseWinRate')
+
+        fig = go.Figure()
+
+        fig.add_trace(go.Bar(x = grounds.ChaseWinRate,
+                            y = grounds.GroundName,
+                            orientation = 'h',
+                            name = '',
+                            text = grounds.ChaseWinRate.map(lambda rate: f'{rate}%'),
+                            textposition = 'inside',
+                            insidetextanchor = 'middle',
+                            customdata = grounds[['City','Matches']],
+                            hovertemplate = '%{y}, %{customdata[0]} : %{x}% of %{customdata[1]} matches',
+                            marker = dict(color = np.where(grounds.ChaseWinRate >= 50, '#02894B', '#EF3340'), line_width = 0)))
+
+        fig.add_vline(x = 50, line_dash = 'dot', line_width = 1, line_color = '#A8BBB0')
+
+        fig.update_xaxes(title = 'Chases Won (%)', range = [0,100], showgrid=False)
+        fig.update_yaxes(showgrid=False)
+
+        fig.update_layout(plot_bgcolor = 'white',
+                        title = dict(text = f'<b>Chases Won by Ground</b> (at least {min_matches} matches)'),
+                        width = 900,
+                        height = max(400, 30 * len(grounds) + 150),
+                        font = dict(family='Verdana',size = 11,color='#444444'))
+
+        return fig
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Generates the graphs of the largest wins by runs and by wickets, the wins by wickets with the most balls to spare first
+# margins holds a row per match won by runs or wickets, with its typed margin
+
+def largestWinsGraph(margins):
+
+    try:
+        fig = make_subplots(cols=2, rows=1, subplot_titles=['<b>By Runs</b>','<b>By Wickets</b>'], horizontal_spacing = 0.35)
+
+        by_runs = margins[margins['MarginType'] == 'Runs'].sort_values(['MarginValue','Year'], ascending=[False,True], kind='stable').head(10)
+        by_wickets = margins[margins['MarginType'] == 'Wickets'].sort_values(['MarginValue','Overs2'], ascending=[False,True], kind='stable').head(10)
+
+        for col, wins, color in [(1, by_runs, '#02894B'), (2, by_wickets, '#2F435A')]:
+            labels = wins['Winner'] + ' vs ' + wins['Loser'] + ', ' + wins['Year'].astype(str)
+
+            fig.add_trace(go.Bar(x = wins.MarginValue,
+                                y = labels,
+                                orientation = 'h',
+                                name = '',
+                                text = wins.MarginValue,
+                                textposition = 'inside',
+                                insidetextanchor = 'middle',
+                                customdata = wins[['Date','GroundName']],
+                                hovertemplate = '%{y}<br>%{customdata[0]}, %{customdata[1]} : %{x}',
+                                marker = dict(color = color, line_width = 0)),
+                        row = 1,
+                        col = col)
+
+            fig.update_yaxes(autorange = 'reversed', row = 1, col = col)
+
+        fig.update_xaxes(showticklabels=False, showgrid=False)
+        fig.update_yaxes(showgrid=False, tickfont_size = 9)
+
+        fig.update_layout(plot_bgcolor = 'white',
+                        showlegend = False,
+                        width = 1000,
+                        height = 500,
+                        font = dict(family='Verdana',size = 10,color='#444444'))
+
+        return fig
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Generates the box plots of the margins of the wins by runs and by wickets, per winning team or per ground, for the
+# groups with at least a number of wins
+# margins holds a row per match won by runs or wickets, with its typed margin
+
+def marginDistributionGraph(margins, by, min_wins=1):
+
+    try:
+        counts = margins[by].value_counts()
+        margins = margins[margins[by].isin(counts.index[counts >= min_wins])]
+        GROUP_ORDER = sorted(margins[by].unique().tolist(), reverse=True)
+
+        fig = make_subplots(cols=2, rows=1, subplot_titles=['<b>Wins by Runs</b>','<b>Wins by Wickets</b>'], shared_yaxes=True)
+
+        for col, margin_type, color in [(1, 'Runs', '#02894B'), (2, 'Wickets', '#2F435A')]:
+            wins = margins[margins['MarginType'] == margin_type]
+
+            fig.add_trace(go.Box(x = wins.MarginValue,
+                                y = wins[by],
+                                orientation = 'h',
+                                name = '',
+                                boxpoints = 'outliers',
+                                hovertemplate = '%{y} : %{x}',
+                                marker = dict(color = color, size = 4),
+                                line = dict(width = 1)),
+                        row = 1,
+                        col = col)
+
+        fig.update_xaxes(showgrid=False)
+        fig.update_yaxes(showgrid=False, categoryorder = 'array', categoryarray = GROUP_ORDER, tickfont_size = 9)
+
+        fig.update_layout(plot_bgcolor = 'white',
+                        showlegend = False,
+                        width = 900,
+                        height = max(400, 28 * len(GROUP_ORDER) + 150),
+                        font = dict(family='Verdana',size = 10,color='#444444'))
+
+        return fig
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
 # Generates the html to be displayed on clicking the marker on the folium map
 
 def popup_html(row,ground_data,matches):
@@ -509,10 +705,20 @@ def popup_html(row,ground_data,matches):
             else:
                 no_result = 0
 
-            left_col_color = "#EAFBFF"
-            right_col_color = "#EAFBFF"
+            return groundPopup(ground_name,ground_city,matches_held,most_wins_team,wins,avg_first_inns,wins_batting_first,wins_batting_second,no_result)
+        
+        except Exception as e:
+            logging.error(CustomException(e,sys))
+            raise CustomException(e,sys)
 
-            html = f"""
+# Generates the html for the statistics of a ground, displayed on clicking its marker on the folium map
+
+def groundPopup(ground_name,ground_city,matches_held,most_wins_team,wins,avg_first_inns,wins_batting_first,wins_batting_second,no_result):
+
+    left_col_color = "#EAFBFF"
+    right_col_color = "#EAFBFF"
+
+    html = f"""
                         <!DOCTYPE html>
                         
                         <html>
@@ -554,8 +760,4 @@ def popup_html(row,ground_data,matches):
                         </html>
                     """
 
-            return html
-        
-        except Exception as e:
-            logging.error(CustomException(e,sys))
-            raise CustomException(e,sys)
\ No newline at end of file
+    return html
\ No newline at end of file
@@ -153,6 +153,57 @@ def standings(points_table,franchise):
         logging.error(CustomException(e,sys))
         raise CustomException(e,sys)
 
+# Generates the graph of the Elo rating of a franchise after every match it played, over those of the other franchises
+# rating_history holds a row per franchise and match, as returned by src.elo
+
+def eloRating(rating_history,franchise,initial_rating):
+
+    try:
+        fig = go.Figure()
+
+        for team in rating_history['Team'].unique():
+            if team == franchise:
+                continue
+            history = rating_history.loc[rating_history['Team'] == team]
+
+            fig.add_trace(go.Scatter(x = history.Date,
+                                    y = history.Rating,
+                                    name = '',
+                                    mode = 'lines',
+                                    hovertemplate = f'{team}<br>%{{x|%d %b %Y}}: %{{y}}',
+                                    line = dict(width = 0.5, color = '#A8BBB0')))
+
+        history = rating_history.loc[rating_history['Team'] == franchise]
+
+        fig.add_trace(go.Scatter(x = history.Date,
+                                y = history.Rating,
+                                name = '',
+                                mode = 'lines',
+                                customdata = history[['Opponent','Change']],
+                                hovertemplate = '%{x|%d %b %Y}: %{y}<br>vs %{customdata[0]} (%{customdata[1]:+})',
+                                line = dict(width = 2, color = '#970C10')))
+
+        fig.add_hline(y = initial_rating, line_dash = 'dot', line_width = 1, line_color = '#738580')
+
+        fig.update_xaxes(title = 'Year',showgrid=False)
+        fig.update_yaxes(showticklabels=True, title = 'Elo Rating',showgrid=False)
+
+        peak = history.loc[history['Rating'].idxmax()]
+        title_text = f"Current rating <span style='color:#970C10'>{history['Rating'].iloc[-1]}</span>, peaking at <span style='color:#970C10'>{peak['Rating']}</span> in {peak['Year']}"
+
+        fig.update_layout(plot_bgcolor='white',
+                        title = dict(text=title_text),
+                        width = 800,
+                        height = 500,
+                        showlegend = False,
+                        font = dict(family='Verdana',size = 12,color='#444444'))
+
+        return fig
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
 # Generates the graph for the average age of a franchise's squad over the years
 
 def avgAge(player_stats,franchise):
@@ -4,7 +4,9 @@ import plotly.graph_objects as go
 import sys
 
 from src.exception import CustomException
+from src.figure_templates import figureFromTemplate
 from src.logger import logging
+from src.phase_stats import PHASES, PHASE_COLORS
 
 # Generates the table showing the career batting stats of a player
 
@@ -114,33 +116,40 @@ def bowlStats(player_stats,player):
         logging.error(CustomException(e,sys))
         raise CustomException(e,sys)
 
+# Builds the template of a graph showing a stat over the seasons, with the layout and styling but without any data
+
+def _perSeasonTemplate(title,yaxis_title,marker_size,hovertemplate):
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(mode = 'lines+markers',
+                            name = '',
+                            hovertemplate = hovertemplate,
+                            marker = dict(size = marker_size, color = '#970C10'),
+                            line = dict(width = 1, color = '#970C10')))
+
+    fig.update_xaxes(title = 'Year',showgrid=False)
+    fig.update_yaxes(title = yaxis_title,showgrid=False)
+
+    fig.update_layout(plot_bgcolor = 'white',
+                    title = dict(text = title),
+                    height = 600,
+                    width = 800,
+                    font = dict(family='Verdana',size = 12,color='#444444'),
+                    showlegend=False)
+
+    return fig
+
 # Generates the graph showing the runs scored over the seasons
 
 def runsPerSeason(player_stats,player):
 
     try:
         runs = player_stats[['Year','TotalRuns']][player_stats['Name'] == player]
-        fig = go.Figure()
-
-        fig.add_trace(go.Scatter(x = runs['Year'],
-                                y = runs['TotalRuns'],
-                                mode = 'lines+markers',
-                                name = '',
-                                hovertemplate = '%{x} : %{y} Runs',
-                                marker = dict(size = 8, color = '#970C10'),
-                                line = dict(width = 1, color = '#970C10')))
 
-        fig.update_xaxes(title = 'Year',showgrid=False)
-        fig.update_yaxes(title = 'Runs',showgrid=False)
+        build = lambda: _perSeasonTemplate('<b>Runs per Season</b>','Runs',8,'%{x} : %{y} Runs')
 
-        fig.update_layout(plot_bgcolor = 'white',
-                        title = dict(text = '<b>Runs per Season</b>'),
-                        height = 600,
-                        width = 800,
-                        font = dict(family='Verdana',size = 12,color='#444444'),
-                        showlegend=False)
-
-        return fig
+        return figureFromTemplate('runsPerSeason', build, [dict(x = runs['Year'], y = runs['TotalRuns'])])
     
     except Exception as e:
         logging.error(CustomException(e,sys))
@@ -152,27 +161,10 @@ def strikeRatePerSeason(player_stats,player):
 
     try:
         strikerate = player_stats[['Year','StrikeRate']][player_stats['Name'] == player]
-        fig = go.Figure()
 
-        fig.add_trace(go.Scatter(x = strikerate['Year'],
-                                y = strikerate['StrikeRate'],
-                                name = '',
-                                hovertemplate = '%{x} : %{y}',
-                                mode = 'lines+markers',
-                                marker = dict(size = 8, color = '#970C10'),
-                                line = dict(width = 1, color = '#970C10')))
+        build = lambda: _perSeasonTemplate('<b>Strike Rate (Batting) per Season</b>','Strike Rate',8,'%{x} : %{y}')
 
-        fig.update_xaxes(title = 'Year',showgrid=False)
-        fig.update_yaxes(title = 'Strike Rate',showgrid=False)
-
-        fig.update_layout(plot_bgcolor = 'white',
-                        title = dict(text = '<b>Strike Rate (Batting) per Season</b>'),
-                        height = 600,
-                        width = 800,
-                        font = dict(family='Verdana',size = 12,color='#444444'),
-                        showlegend=False)
-        
-        return fig
+        return figureFromTemplate('strikeRatePerSeason', build, [dict(x = strikerate['Year'], y = strikerate['StrikeRate'])])
     
     except Exception as e:
         logging.error(CustomException(e,sys))
@@ -185,27 +177,9 @@ def averagePerSeason(player_stats,player):
         average = player_stats[['Year','BattingAverage']][player_stats['Name'] == player]
         average['BattingAverage'] = average['BattingAverage'].apply(lambda x: 0 if x<0 else x)
 
-        fig = go.Figure()
-
-        fig.add_trace(go.Scatter(x = average['Year'],
-                                y = average['BattingAverage'],
-                                name = '',
-                                hovertemplate = '%{x} : %{y}',
-                                mode = 'lines+markers',
-                                marker = dict(size = 6, color = '#970C10'),
-                                line = dict(width = 1, color = '#970C10')))
+        build = lambda: _perSeasonTemplate('<b>Average (Batting) per Season</b>','Average',6,'%{x} : %{y}')
 
-        fig.update_xaxes(title = 'Year',showgrid=False)
-        fig.update_yaxes(title = 'Average',showgrid=False)
-
-        fig.update_layout(plot_bgcolor = 'white',
-                        title = dict(text = '<b>Average (Batting) per Season</b>'),
-                        height = 600,
-                        width = 800,
-                        font = dict(family='Verdana',size = 12,color='#444444'),
-                        showlegend=False)
-
-        return fig
+        return figureFromTemplate('averagePerSeason', build, [dict(x = average['Year'], y = average['BattingAverage'])])
     
     except Exception as e:
         logging.error(CustomException(e,sys))
@@ -216,27 +190,10 @@ def averagePerSeason(player_stats,player):
 def wicketsPerSeason(player_stats,player):
     try:
         wickets = player_stats[['Year','Wickets']][player_stats['Name'] == player]
-        fig = go.Figure()
 
-        fig.add_trace(go.Scatter(x = wickets['Year'],
-                                y = wickets['Wickets'],
-                                name = '',
-                                hovertemplate = '%{x} : %{y}',
-                                mode = 'lines+markers',
-                                marker = dict(size = 6, color = '#970C10'),
-                                line = dict(width = 1, color = '#970C10')))
+        build = lambda: _perSeasonTemplate('<b>Wickets per Season</b>','Wickets',6,'%{x} : %{y}')
 
-        fig.update_xaxes(title = 'Year',showgrid=False)
-        fig.update_yaxes(title = 'Wickets',showgrid=False)
-
-        fig.update_layout(plot_bgcolor = 'white',
-                        title = dict(text = '<b>Wickets per Season</b>'),
-                        height = 600,
-                        width = 800,
-                        font = dict(family='Verdana',size = 12,color='#444444'),
-                        showlegend=False)
-
-        return fig
+        return figureFromTemplate('wicketsPerSeason', build, [dict(x = wickets['Year'], y = wickets['Wickets'])])
     
     except Exception as e:
         logging.error(CustomException(e,sys))
@@ -247,27 +204,10 @@ def wicketsPerSeason(player_stats,player):
 def bowlingStrikeRatePerSeason(player_stats,player):
     try:
         strikerate = player_stats[['Year','BowlingStrikeRate']][player_stats['Name'] == player]
-        fig = go.Figure()
-
-        fig.add_trace(go.Scatter(x = strikerate['Year'],
-                                y = strikerate['BowlingStrikeRate'],
-                                name = '',
-                                hovertemplate = '%{x} : %{y}',
-                                mode = 'lines+markers',
-                                marker = dict(size = 6, color = '#970C10'),
-                                line = dict(width = 1, color = '#970C10')))
-
-        fig.update_xaxes(title = 'Year',showgrid=False)
-        fig.update_yaxes(title = 'Strike Rate (Bowling)',showgrid=False)
 
-        fig.update_layout(plot_bgcolor = 'white',
-                        title = dict(text = '<b>Strike Rate (Bowling) per Season</b>'),
-                        height = 600,
-                        width = 800,
-                        font = dict(family='Verdana',size = 12,color='#444444'),
-                        showlegend=False)
+        build = lambda: _perSeasonTemplate('<b>Strike Rate (Bowling) per Season</b>','Strike Rate (Bowling)',6,'%{x} : %{y}')
 
-        return fig
+        return figureFromTemplate('bowlingStrikeRatePerSeason', build, [dict(x = strikerate['Year'], y = strikerate['BowlingStrikeRate'])])
     
     except Exception as e:
         logging.error(CustomException(e,sys))
@@ -278,28 +218,117 @@ def bowlingStrikeRatePerSeason(player_stats,player):
 def economyPerSeason(player_stats,player):
     try:
         economy = player_stats[['Year','EconomyRate']][player_stats['Name'] == player]
+
+        build = lambda: _perSeasonTemplate('<b>Economy per Season</b>','Economy',6,'%{x} : %{y}')
+
+        return figureFromTemplate('economyPerSeason', build, [dict(x = economy['Year'], y = economy['EconomyRate'])])
+    
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Builds the template of a graph with a line per phase of the innings over the seasons
+
+def _phasePerSeasonTemplate(title,yaxis_title):
+
+    fig = go.Figure()
+
+    for phase, color in zip(PHASES, PHASE_COLORS):
+        fig.add_trace(go.Scatter(mode = 'lines+markers',
+                                name = phase,
+                                hovertemplate = f'{phase} %{{x}} : %{{y}}<extra></extra>',
+                                marker = dict(size = 6, color = color),
+                                line = dict(width = 1, color = color)))
+
+    fig.update_xaxes(title = 'Year',showgrid=False)
+    fig.update_yaxes(title = yaxis_title,showgrid=False)
+
+    fig.update_layout(plot_bgcolor = 'white',
+                    title = dict(text = title),
+                    height = 600,
+                    width = 800,
+                    font = dict(family='Verdana',size = 12,color='#444444'),
+                    legend = dict(orientation = 'h', y = -0.15))
+
+    return fig
+
+# Generates the graph showing the batting strike rate in every phase of the innings over the seasons
+# player_phases holds a row per season and phase of the player, with their rates
+
+def phaseStrikeRatePerSeason(player_phases,player):
+
+    try:
+        batting = player_phases[player_phases['Balls'] > 0]
+
+        build = lambda: _phasePerSeasonTemplate('<b>Strike Rate (Batting) per Phase</b>','Strike Rate')
+
+        return figureFromTemplate('phaseStrikeRatePerSeason', build, [dict(x = batting.loc[batting['Phase'] == phase,'Year'], y = batting.loc[batting['Phase'] == phase,'StrikeRate']) for phase in PHASES])
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Generates the graph showing the economy rate in every phase of the innings over the seasons
+
+def phaseEconomyPerSeason(player_phases,player):
+
+    try:
+        bowling = player_phases[player_phases['BallsBowled'] > 0]
+
+        build = lambda: _phasePerSeasonTemplate('<b>Economy per Phase</b>','Economy')
+
+        return figureFromTemplate('phaseEconomyPerSeason', build, [dict(x = bowling.loc[bowling['Phase'] == phase,'Year'], y = bowling.loc[bowling['Phase'] == phase,'Economy']) for phase in PHASES])
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Generates the bar graph of the players with the most similar statistical profile to a player
+# similar is the dataframe returned by the player similarity index, whose undefined ratios are shown as '-'
+
+def similarPlayersGraph(similar,player):
+
+    try:
+        similar = similar.copy()
+
+        if 'Year' in similar.columns:
+            similar['Label'] = similar['Name'] + ' (' + similar['Year'].astype(str) + ')'
+        else:
+            similar['Label'] = similar['Name']
+
+        NAME_ORDER = similar['Label'].tolist()
+        NAME_ORDER.reverse()
+
+        similar['Color'] = '#C5C5C5'
+        similar.loc[similar.index[0],'Color'] = '#970C10'
+
         fig = go.Figure()
 
-        fig.add_trace(go.Scatter(x = economy['Year'],
-                                y = economy['EconomyRate'],
-                                name = '',
-                                hovertemplate = '%{x} : %{y}',
-                                mode = 'lines+markers',
-                                marker = dict(size = 6, color = '#970C10'),
-                                line = dict(width = 1, color = '#970C10')))
+        fig.add_trace(go.Bar(x = similar['Similarity'],
+                            y = similar['Label'],
+                            orientation = 'h',
+                            text = similar['Similarity'],
+                            textposition = 'inside',
+                            insidetextanchor = 'middle',
+                            customdata = similar[['Runs','StrikeRate','Average','Wickets','Economy']].astype(object).fillna('-'),
+                            hovertemplate = '%{y}<br>Runs: %{customdata[0]:.0f}, Strike Rate: %{customdata[1]}, Average: %{customdata[2]}<br>Wickets: %{customdata[3]:.0f}, Economy: %{customdata[4]}',
+                            name = '',
+                            marker = dict(color = similar['Color'])))
+
+        fig.update_xaxes(showticklabels=False, showgrid=False)
 
-        fig.update_xaxes(title = 'Year',showgrid=False)
-        fig.update_yaxes(title = 'Economy',showgrid=False)
+        title_text = f'<b>Players most similar to <span style="color:#970C10">{player}</span> (Similarity %)</b>'
 
         fig.update_layout(plot_bgcolor = 'white',
-                        title = dict(text = '<b>Economy per Season</b>'),
-                        height = 600,
+                        height = 500,
                         width = 800,
-                        font = dict(family='Verdana',size = 12,color='#444444'),
-                        showlegend=False)
+                        font = dict(color = '#444444',family='Verdana',size=12),
+                        title = dict(text = title_text),
+                        showlegend = False,
+                        yaxis = dict(linecolor = 'white',categoryorder = 'array',categoryarray = NAME_ORDER))
 
         return fig
-    
+
     except Exception as e:
         logging.error(CustomException(e,sys))
-        raise CustomException(e,sys)
\ No newline at end of file
+        raise CustomException(e,sys)
@@ -5,7 +5,9 @@ from plotly.subplots import make_subplots
 import sys
 
 from src.exception import CustomException
+from src.figure_templates import figureFromTemplate
 from src.logger import logging
+from src.phase_stats import PHASES, PHASE_COLORS
 
 # Generates the visualization of the points table for a particular year
 
@@ -79,178 +81,218 @@ def pointsTableGraph(table):
         logging.error(CustomException(e,sys))
         raise CustomException(e,sys)
 
-# Generates the graph for top run scorers for a particular year
+# Generates the graph of the chances of every team to finish in the top 4 after every league match of a particular year
+# race holds a row per team and number of matches played, with its chance to reach the playoffs
 
-def topRunsYearGraph(player_stats,year):
+def playoffRaceGraph(race,year):
 
     try:
+        final = race[race['Played'] == race['Played'].max()]
+        qualified = final.loc[final['Top4'] >= 0.5, 'TeamName'].tolist()
 
-        top_runs = player_stats[(player_stats['Year'] == year) & (player_stats['TotalRuns']>0)][['Name','TotalRuns','StrikeRate','BattingAverage']].head(10)
+        fig = go.Figure()
 
-        NAME_ORDER = top_runs['Name'].tolist()
-        NAME_ORDER.reverse()
+        for team in sorted(race['TeamName'].unique(), key=lambda team: team in qualified):
+            odds = race[race['TeamName'] == team]
+            color = '#02894B' if team in qualified else '#A8BBB0'
 
-        fig = make_subplots(cols=3, rows=1, subplot_titles=['<b>Total Runs</b>','<b>Strike Rate</b>','<b>Average</b>'], shared_yaxes=True, column_widths = [0.4,0.3,0.3])
+            fig.add_trace(go.Scatter(x = odds['Played'],
+                                    y = odds['Top4'] * 100,
+                                    name = team,
+                                    mode = 'lines',
+                                    hovertemplate = f'{team}<br>After %{{x}} matches : %{{y:.1f}}%<extra></extra>',
+                                    line = dict(width = 2 if team in qualified else 1, color = color)))
 
-        top_scorer = top_runs.Name.iloc[0]
+        fig.update_xaxes(title = 'League Matches Played',showgrid=False)
+        fig.update_yaxes(title = 'Chance of a Top 4 Finish (%)',range = [0,102],showgrid=False)
 
-        top_runs['Color'] = '#C5C5C5'
-        top_runs.loc[top_runs['Name'] == top_scorer,'Color'] = '#ffa500'
+        fig.add_hrect(y0=50, y1=102, fillcolor='#02894B', opacity=0.05, line_width=0)
 
-        top_scorer_df = top_runs.loc[top_runs['Name'] == top_scorer]
-        non_top_scorer_df = top_runs.loc[top_runs['Name'] != top_scorer]
+        fig.update_layout(plot_bgcolor='white',
+                        title = dict(text =f"<b>Race to the Playoffs : <span style='color:#02894B'>{', '.join(qualified)}</span></b>"),
+                        font = dict(family='Verdana',size = 11,color='#444444'),
+                        showlegend = False,
+                        height = 600,
+                        width = 900)
 
-        fig.add_trace(go.Bar(x = non_top_scorer_df['TotalRuns'],
-                            y = non_top_scorer_df['Name'],
-                            orientation = 'h',
-                            text = non_top_scorer_df['TotalRuns'],
-                            marker = dict(color = non_top_scorer_df.Color.iloc[0])),
-                    row = 1,
-                    col = 1)
+        return fig
 
-        fig.add_trace(go.Bar(x = top_scorer_df['TotalRuns'],
-                            y = top_scorer_df['Name'],
-                            orientation = 'h',
-                            text = top_scorer_df['TotalRuns'],
-                            marker = dict(color = top_scorer_df.Color.iloc[0])),
-                    row = 1,
-                    col = 1)
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
 
-        fig.add_trace(go.Scatter(x = top_runs['StrikeRate'],
-                                y = top_runs['Name'],
-                                mode = 'lines+markers',
-                                line = dict(width=1,color=non_top_scorer_df.Color.iloc[0])),
+# Generates the graph of the toss decisions in a particular year, and of how often the team winning the toss won the match
+# decisions holds a row per toss decision of the toss and chase cube, with their rates
+
+def tossDecisionGraph(decisions,year):
+
+    try:
+        fig = make_subplots(cols=2, rows=1, subplot_titles=['<b>Toss Decisions</b>','<b>Toss Winner Won (%)</b>'])
+
+        fig.add_trace(go.Bar(x = decisions.TossDecision,
+                            y = decisions.Matches,
+                            name = '',
+                            text = decisions.Matches,
+                            textposition = 'inside',
+                            insidetextanchor = 'middle',
+                            hovertemplate = 'Chose to %{x} : %{y} matches',
+                            width = 0.5,
+                            marker = dict(color = ['#2F435A','#ffa500'][:len(decisions)], line_width = 0)),
                     row = 1,
-                    col = 2)
+                    col = 1)
 
-        fig.add_trace(go.Scatter(x = top_scorer_df['StrikeRate'],
-                                y = top_scorer_df['Name'],
-                                mode = 'markers',
-                                marker = dict(size=10,color=top_scorer_df.Color.iloc[0])),
+        fig.add_trace(go.Bar(x = decisions.TossDecision,
+                            y = decisions.TossWinRate,
+                            name = '',
+                            text = decisions.TossWinRate.map(lambda rate: f'{rate}%'),
+                            textposition = 'inside',
+                            insidetextanchor = 'middle',
+                            hovertemplate = 'Chose to %{x} : won %{y}%',
+                            width = 0.5,
+                            marker = dict(color = ['#2F435A','#ffa500'][:len(decisions)], line_width = 0)),
                     row = 1,
                     col = 2)
 
-        fig.add_trace(go.Scatter(x = top_runs['BattingAverage'],
-                                y = top_runs['Name'],
-                                mode = 'lines+markers',
-                                line = dict(width=1,color=non_top_scorer_df.Color.iloc[0])),
-                    row = 1,
-                    col = 3)
+        fig.add_hline(y = 50, line_dash = 'dot', line_width = 1, line_color = '#A8BBB0', row = 1, col = 2)
 
-        fig.add_trace(go.Scatter(x = top_scorer_df['BattingAverage'],
-                                y = top_scorer_df['Name'],
-                                mode = 'markers',
-                                marker = dict(size=10,color=top_scorer_df.Color.iloc[0])),
-                    row = 1,
-                    col = 3)
-        
-        fig.update_xaxes(showticklabels=False, row=1, col=1,showgrid=False)
-        fig.update_yaxes(showgrid=False)
-        
-        fig.update_traces(textposition='inside', insidetextanchor='middle', hovertemplate='(%{y}: %{x} Runs)', row=1, col=1)
-        fig.update_traces(hovertemplate='(%{y}: %{x})', row=1, col=2)
-        fig.update_traces(hovertemplate='(%{y}: %{x})', row=1, col=3)
-        fig.update_traces(name='')
+        fig.update_xaxes(showgrid=False)
+        fig.update_yaxes(showticklabels=False, showgrid=False)
+        fig.update_yaxes(range = [0,100], row = 1, col = 2)
 
-        title_text = f'<b><span style="color:{top_scorer_df.Color.iloc[0]}">{top_scorer}</span></b> leads the list of top run scorers in IPL {year} with <b><span style="color:{top_scorer_df.Color.iloc[0]}">{top_runs.TotalRuns.iloc[0]}</span></b> runs, at a strike rate of <b><span style="color:{top_scorer_df.Color.iloc[0]}">{top_runs.StrikeRate.iloc[0]}</span></b>'
+        toss_rate = round(decisions['TossWinnerWins'].sum() * 100 / decisions['Matches'].sum(), 1)
+        title_text = f"The team winning the toss won <span style='color:#ffa500'>{toss_rate}%</span> of the matches in {year}"
 
-        fig.update_layout(plot_bgcolor = 'white',
-                        font = dict(color = '#444444',family='Verdana',size=12),
-                        title = dict(text = title_text, font_size = 14),
+        fig.update_layout(plot_bgcolor='white',
+                        title = dict(text = title_text),
                         showlegend = False,
-                        height = 500,
-                        yaxis = dict(linecolor = 'white',categoryorder = 'array',categoryarray = NAME_ORDER))
+                        font = dict(family='Verdana',size = 11,color='#444444'),
+                        height = 450,
+                        width = 800)
 
         return fig
-    
+
     except Exception as e:
         logging.error(CustomException(e,sys))
         raise CustomException(e,sys)
 
-# Generates the graph for the top wicket takers for a particular year
+# Builds the template of the top run scorers graph, with the layout and styling but without any data
 
-def topWicketsYearGraph(player_stats,year):
+def _topRunsYearTemplate():
+
+    fig = make_subplots(cols=3, rows=1, subplot_titles=['<b>Total Runs</b>','<b>Strike Rate</b>','<b>Average</b>'], shared_yaxes=True, column_widths = [0.4,0.3,0.3])
+
+    fig.add_trace(go.Bar(orientation = 'h', marker = dict(color = '#C5C5C5')), row = 1, col = 1)
+    fig.add_trace(go.Bar(orientation = 'h', marker = dict(color = '#ffa500')), row = 1, col = 1)
+
+    for col in [2,3]:
+        fig.add_trace(go.Scatter(mode = 'lines+markers', line = dict(width=1,color='#C5C5C5')), row = 1, col = col)
+        fig.add_trace(go.Scatter(mode = 'markers', marker = dict(size=10,color='#ffa500')), row = 1, col = col)
+
+    fig.update_xaxes(showticklabels=False, row=1, col=1,showgrid=False)
+    fig.update_yaxes(showgrid=False)
+
+    fig.update_traces(textposition='inside', insidetextanchor='middle', hovertemplate='(%{y}: %{x} Runs)', row=1, col=1)
+    fig.update_traces(hovertemplate='(%{y}: %{x})', row=1, col=2)
+    fig.update_traces(hovertemplate='(%{y}: %{x})', row=1, col=3)
+    fig.update_traces(name='')
+
+    fig.update_layout(plot_bgcolor = 'white',
+                    font = dict(color = '#444444',family='Verdana',size=12),
+                    title = dict(font_size = 14),
+                    showlegend = False,
+                    height = 500,
+                    yaxis = dict(linecolor = 'white',categoryorder = 'array'))
+
+    return fig
+
+# Generates the graph for top run scorers for a particular year
+
+def topRunsYearGraph(player_stats,year):
 
     try:
 
-        top_wickets = player_stats[(player_stats['Year'] == year) & (player_stats['Wickets']>0)][['Name','Wickets','BowlingStrikeRate','BowlingAverage']].sort_values('Wickets',ascending=False).head(10)
+        top_runs = player_stats[(player_stats['Year'] == year) & (player_stats['TotalRuns']>0)][['Name','TotalRuns','StrikeRate','BattingAverage']].head(10)
 
-        NAME_ORDER = top_wickets['Name'].tolist()
+        NAME_ORDER = top_runs['Name'].tolist()
         NAME_ORDER.reverse()
 
-        fig = make_subplots(cols=3, rows=1, subplot_titles=['<b>Total Wickets</b>','<b>Strike Rate</b>','<b>Average</b>'], shared_yaxes=True, column_widths = [0.4,0.3,0.3])
+        top_scorer = top_runs.Name.iloc[0]
 
-        top_wicket_taker = top_wickets.Name.iloc[0]
+        top_scorer_df = top_runs.loc[top_runs['Name'] == top_scorer]
+        non_top_scorer_df = top_runs.loc[top_runs['Name'] != top_scorer]
 
-        top_wickets['Color'] = '#C5C5C5'
-        top_wickets.loc[top_wickets['Name'] == top_wicket_taker,'Color'] = '#A020F0'
+        traces = [dict(x = non_top_scorer_df['TotalRuns'], y = non_top_scorer_df['Name'], text = non_top_scorer_df['TotalRuns']),
+                  dict(x = top_scorer_df['TotalRuns'], y = top_scorer_df['Name'], text = top_scorer_df['TotalRuns']),
+                  dict(x = top_runs['StrikeRate'], y = top_runs['Name']),
+                  dict(x = top_scorer_df['StrikeRate'], y = top_scorer_df['Name']),
+                  dict(x = top_runs['BattingAverage'], y = top_runs['Name']),
+                  dict(x = top_scorer_df['BattingAverage'], y = top_scorer_df['Name'])]
 
-        top_wicket_taker_df = top_wickets.loc[top_wickets['Name'] == top_wicket_taker]
-        non_top_wicket_taker_df = top_wickets.loc[top_wickets['Name'] != top_wicket_taker]
+        title_text = f'<b><span style="color:#ffa500">{top_scorer}</span></b> leads the list of top run scorers in IPL {year} with <b><span style="color:#ffa500">{top_runs.TotalRuns.iloc[0]}</span></b> runs, at a strike rate of <b><span style="color:#ffa500">{top_runs.StrikeRate.iloc[0]}</span></b>'
 
-        fig.add_trace(go.Bar(x = non_top_wicket_taker_df['Wickets'],
-                            y = non_top_wicket_taker_df['Name'],
-                            orientation = 'h',
-                            text = non_top_wicket_taker_df['Wickets'],
-                            marker = dict(color = non_top_wicket_taker_df.Color.iloc[0])),
-                    row = 1,
-                    col = 1)
+        return figureFromTemplate('topRunsYearGraph', _topRunsYearTemplate, traces, {'title.text':title_text, 'yaxis.categoryarray':NAME_ORDER})
+    
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
 
-        fig.add_trace(go.Bar(x = top_wicket_taker_df['Wickets'],
-                            y = top_wicket_taker_df['Name'],
-                            orientation = 'h',
-                            text = top_wicket_taker_df['Wickets'],
-                            marker = dict(color = top_wicket_taker_df.Color.iloc[0])),
-                    row = 1,
-                    col = 1)
+# Builds the template of the top wicket takers graph, with the layout and styling but without any data
 
-        fig.add_trace(go.Scatter(x = top_wickets['BowlingStrikeRate'],
-                                y = top_wickets['Name'],
-                                mode = 'lines+markers',
-                                line = dict(width=1,color=non_top_wicket_taker_df.Color.iloc[0])),
-                    row = 1,
-                    col = 2)
+def _topWicketsYearTemplate():
 
-        fig.add_trace(go.Scatter(x = top_wicket_taker_df['BowlingStrikeRate'],
-                                y = top_wicket_taker_df['Name'],
-                                mode = 'markers',
-                                marker = dict(size=10,color=top_wicket_taker_df.Color.iloc[0])),
-                    row = 1,
-                    col = 2)
+    fig = make_subplots(cols=3, rows=1, subplot_titles=['<b>Total Wickets</b>','<b>Strike Rate</b>','<b>Average</b>'], shared_yaxes=True, column_widths = [0.4,0.3,0.3])
 
-        fig.add_trace(go.Scatter(x = top_wickets['BowlingAverage'],
-                                y = top_wickets['Name'],
-                                mode = 'lines+markers',
-                                line = dict(width=1,color=non_top_wicket_taker_df.Color.iloc[0])),
-                    row = 1,
-                    col = 3)
+    fig.add_trace(go.Bar(orientation = 'h', marker = dict(color = '#C5C5C5')), row = 1, col = 1)
+    fig.add_trace(go.Bar(orientation = 'h', marker = dict(color = '#A020F0')), row = 1, col = 1)
 
-        fig.add_trace(go.Scatter(x = top_wicket_taker_df['BowlingAverage'],
-                                y = top_wicket_taker_df['Name'],
-                                mode = 'markers',
-                                marker = dict(size=10,color=top_wicket_taker_df.Color.iloc[0])),
-                    row = 1,
-                    col = 3)
-        
-        fig.update_traces(textposition='inside', insidetextanchor='middle', hovertemplate='(%{y}: %{x} Wickets)', row=1, col=1)
-        fig.update_traces(hovertemplate='(%{y}: %{x})', row=1, col=2)
-        fig.update_traces(hovertemplate='(%{y}: %{x})', row=1, col=3)
+    for col in [2,3]:
+        fig.add_trace(go.Scatter(mode = 'lines+markers', line = dict(width=1,color='#C5C5C5')), row = 1, col = col)
+        fig.add_trace(go.Scatter(mode = 'markers', marker = dict(size=10,color='#A020F0')), row = 1, col = col)
 
-        fig.update_xaxes(showticklabels=False, row=1, col=1, showgrid=False)
-        fig.update_yaxes(showgrid=False)
+    fig.update_traces(textposition='inside', insidetextanchor='middle', hovertemplate='(%{y}: %{x} Wickets)', row=1, col=1)
+    fig.update_traces(hovertemplate='(%{y}: %{x})', row=1, col=2)
+    fig.update_traces(hovertemplate='(%{y}: %{x})', row=1, col=3)
 
-        title_text = f'<b><span style="color:{top_wicket_taker_df.Color.iloc[0]}">{top_wicket_taker}</span></b> leads the list of top wicket takers in IPL {year} with <b><span style="color:{top_wicket_taker_df.Color.iloc[0]}">{top_wickets.Wickets.iloc[0]}</span></b> wickets, at a strike rate of <b><span style="color:{top_wicket_taker_df.Color.iloc[0]}">{top_wickets.BowlingStrikeRate.iloc[0]}</span></b>'
+    fig.update_xaxes(showticklabels=False, row=1, col=1, showgrid=False)
+    fig.update_yaxes(showgrid=False)
 
-        fig.update_layout(plot_bgcolor = 'white',
-                        font = dict(color = '#444444',family='Verdana',size=12),
-                        height = 500,
-                        title = dict(text = title_text, font_size = 14),
-                        showlegend = False,
-                        yaxis = dict(linecolor = 'white',categoryorder = 'array',categoryarray = NAME_ORDER))
+    fig.update_layout(plot_bgcolor = 'white',
+                    font = dict(color = '#444444',family='Verdana',size=12),
+                    height = 500,
+                    title = dict(font_size = 14),
+                    showlegend = False,
+                    yaxis = dict(linecolor = 'white',categoryorder = 'array'))
 
-        fig.update_traces(name='')
+    fig.update_traces(name='')
 
-        return fig
+    return fig
+
+# Generates the graph for the top wicket takers for a particular year
+
+def topWicketsYearGraph(player_stats,year):
+
+    try:
+
+        top_wickets = player_stats[(player_stats['Year'] == year) & (player_stats['Wickets']>0)][['Name','Wickets','BowlingStrikeRate','BowlingAverage']].sort_values('Wickets',ascending=False).head(10)
+
+        NAME_ORDER = top_wickets['Name'].tolist()
+        NAME_ORDER.reverse()
+
+        top_wicket_taker = top_wickets.Name.iloc[0]
+
+        top_wicket_taker_df = top_wickets.loc[top_wickets['Name'] == top_wicket_taker]
+        non_top_wicket_taker_df = top_wickets.loc[top_wickets['Name'] != top_wicket_taker]
+
+        traces = [dict(x = non_top_wicket_taker_df['Wickets'], y = non_top_wicket_taker_df['Name'], text = non_top_wicket_taker_df['Wickets']),
+                  dict(x = top_wicket_taker_df['Wickets'], y = top_wicket_taker_df['Name'], text = top_wicket_taker_df['Wickets']),
+                  dict(x = top_wickets['BowlingStrikeRate'], y = top_wickets['Name']),
+                  dict(x = top_wicket_taker_df['BowlingStrikeRate'], y = top_wicket_taker_df['Name']),
+                  dict(x = top_wickets['BowlingAverage'], y = top_wickets['Name']),
+                  dict(x = top_wicket_taker_df['BowlingAverage'], y = top_wicket_taker_df['Name'])]
+
+        title_text = f'<b><span style="color:#A020F0">{top_wicket_taker}</span></b> leads the list of top wicket takers in IPL {year} with <b><span style="color:#A020F0">{top_wickets.Wickets.iloc[0]}</span></b> wickets, at a strike rate of <b><span style="color:#A020F0">{top_wickets.BowlingStrikeRate.iloc[0]}</span></b>'
+
+        return figureFromTemplate('topWicketsYearGraph', _topWicketsYearTemplate, traces, {'title.text':title_text, 'yaxis.categoryarray':NAME_ORDER})
     
     except Exception as e:
         logging.error(CustomException(e,sys))
@@ -398,6 +440,78 @@ def topStrikerBowl(player_stats,year):
         logging.error(CustomException(e,sys))
         raise CustomException(e,sys)
 
+# Builds the template of the phase graph of the teams of a year, with the layout and styling but without any data
+
+def _teamPhaseTemplate():
+
+    fig = make_subplots(cols=2, rows=1, subplot_titles=['<b>Run Rate (Batting)</b>','<b>Economy (Bowling)</b>'], shared_yaxes=True)
+
+    for col in [1,2]:
+        for phase, color in zip(PHASES, PHASE_COLORS):
+            fig.add_trace(go.Bar(orientation = 'h', name = phase, legendgroup = phase, showlegend = col == 1, marker = dict(color = color),
+                                hovertemplate = f'{phase} (%{{y}}: %{{x}})<extra></extra>'), row = 1, col = col)
+
+    fig.update_xaxes(showgrid=False)
+    fig.update_yaxes(showgrid=False)
+
+    fig.update_layout(plot_bgcolor = 'white',
+                    font = dict(color = '#444444',family='Verdana',size=12),
+                    barmode = 'group',
+                    height = 700,
+                    legend = dict(orientation = 'h', y = -0.05),
+                    yaxis = dict(linecolor = 'white',categoryorder = 'array'))
+
+    return fig
+
+# Generates the graph of the run rate and economy of the teams in every phase of the innings (powerplay, middle and
+# death overs) in a particular year
+# team_phases holds a row per team and phase, with their rates
+
+def teamPhaseGraph(team_phases,year):
+
+    try:
+        TEAM_ORDER = sorted(team_phases['TeamName'].unique().tolist(), reverse=True)
+
+        traces = []
+        for column in ['RunRate','Economy']:
+            for phase in PHASES:
+                rows = team_phases[team_phases['Phase'] == phase]
+                traces.append(dict(x = rows[column], y = rows['TeamName']))
+
+        return figureFromTemplate('teamPhaseGraph', _teamPhaseTemplate, traces, {'yaxis.categoryarray':TEAM_ORDER})
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Builds the template of the top run scorers graph for a franchise, with the layout and styling but without any data
+
+def _franchiseRunsTemplate():
+
+    fig = make_subplots(cols=3, rows=1, subplot_titles=['<b>Total Runs</b>','<b>Strike Rate</b>','<b>Average</b>'], shared_yaxes=True, column_widths = [0.4,0.3,0.3])
+
+    fig.add_trace(go.Bar(orientation = 'h', marker = dict(color = '#C5C5C5')), row = 1, col = 1)
+    fig.add_trace(go.Bar(orientation = 'h', marker = dict(color = '#ffa500')), row = 1, col = 1)
+
+    fig.update_traces(textposition='inside', insidetextanchor='middle', hovertemplate='(%{y}:%{x})', row=1, col=1)
+
+    fig.update_xaxes(showticklabels=False, row=1, col=1, showgrid=False)
+    fig.update_yaxes(showgrid=False)
+
+    for col in [2,3]:
+        fig.add_trace(go.Scatter(mode = 'lines+markers', line = dict(width=1,color='#C5C5C5')), row = 1, col = col)
+        fig.add_trace(go.Scatter(mode = 'markers', marker = dict(size=10,color='#ffa500')), row = 1, col = col)
+
+    fig.update_layout(plot_bgcolor = 'white',
+                    font = dict(color = '#444444',family='Verdana',size=12),
+                    showlegend = False,
+                    height = 400,
+                    yaxis = dict(linecolor = 'white',categoryorder = 'array'))
+
+    fig.update_traces(name='')
+
+    return fig
+
 # Generates the graphs for the top run scorers for a franchise in a particular year
 
 def franchiseRunsGraph(player_stats,year,franchise):
@@ -408,86 +522,57 @@ def franchiseRunsGraph(player_stats,year,franchise):
         franchise_runs.Matches = franchise_runs.Matches.astype(int)
         franchise_runs.rename(columns={'TotalRuns':'Runs','StrikeRate':'Strike Rate','BattingAverage':'Average'},inplace=True)
         franchise_runs.Average = franchise_runs.Average.apply(lambda x:round(x,1))
-        franchise_runs['Color'] = '#C5C5C5'
-        franchise_runs.iloc[0,-1] = '#ffa500'
 
         NAME_ORDER = franchise_runs.Name.tolist()
         NAME_ORDER.reverse()
 
-        fig = make_subplots(cols=3, rows=1, subplot_titles=['<b>Total Runs</b>','<b>Strike Rate</b>','<b>Average</b>'], shared_yaxes=True, column_widths = [0.4,0.3,0.3])
-
         top_scorer = franchise_runs.Name.iloc[0]
 
         top_scorer_df = franchise_runs.loc[franchise_runs['Name'] == top_scorer]
         non_top_scorer_df = franchise_runs.loc[franchise_runs['Name'] != top_scorer]
 
-        fig.add_trace(go.Bar(x = non_top_scorer_df['Runs'],
-                            y = non_top_scorer_df['Name'],
-                            orientation = 'h',
-                            text = non_top_scorer_df['Runs'],
-                            marker = dict(color = non_top_scorer_df.Color.iloc[0])),
-                    row = 1,
-                    col = 1)
+        traces = [dict(x = non_top_scorer_df['Runs'], y = non_top_scorer_df['Name'], text = non_top_scorer_df['Runs']),
+                  dict(x = top_scorer_df['Runs'], y = top_scorer_df['Name'], text = top_scorer_df['Runs']),
+                  dict(x = franchise_runs['Strike Rate'], y = franchise_runs['Name']),
+                  dict(x = top_scorer_df['Strike Rate'], y = top_scorer_df['Name']),
+                  dict(x = franchise_runs['Average'], y = franchise_runs['Name']),
+                  dict(x = top_scorer_df['Average'], y = top_scorer_df['Name'])]
 
-        fig.add_trace(go.Bar(x = top_scorer_df['Runs'],
-                            y = top_scorer_df['Name'],
-                            orientation = 'h',
-                            text = top_scorer_df['Runs'],
-                            marker = dict(color = top_scorer_df.Color.iloc[0])),
-                    row = 1,
-                    col = 1)
+        title_text = f'<b><span style="color:#ffa500">{top_scorer}</span> leads the list with <span style="color:#ffa500">{top_scorer_df.Runs.iloc[0]}</span> runs, at a strike rate of <span style="color:#ffa500">{top_scorer_df["Strike Rate"].iloc[0]}</span></b>'
 
-        fig.update_traces(textposition='inside', insidetextanchor='middle', hovertemplate='(%{y}:%{x})', row=1, col=1)
-        fig.update_traces(hovertemplate='(%{y}:%{x})', row=1, col=2)
-        fig.update_traces(hovertemplate='(%{y}:%{x})', row=1, col=3)
+        return figureFromTemplate('franchiseRunsGraph', _franchiseRunsTemplate, traces, {'title.text':title_text, 'yaxis.categoryarray':NAME_ORDER})
+    
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
 
-        fig.update_xaxes(showticklabels=False, row=1, col=1, showgrid=False)
-        fig.update_yaxes(showgrid=False)
+# Builds the template of the top wicket takers graph for a franchise, with the layout and styling but without any data
 
-        fig.add_trace(go.Scatter(x = franchise_runs['Strike Rate'],
-                                y = franchise_runs['Name'],
-                                mode = 'lines+markers',
-                                line = dict(width=1,color=non_top_scorer_df.Color.iloc[0])),
-                    row = 1,
-                    col = 2)
+def _franchiseWicketsTemplate():
 
-        fig.add_trace(go.Scatter(x = top_scorer_df['Strike Rate'],
-                                y = top_scorer_df['Name'],
-                                mode = 'markers',
-                                marker = dict(size=10,color=top_scorer_df.Color.iloc[0])),
-                    row = 1,
-                    col = 2)
+    fig = make_subplots(cols=3, rows=1, subplot_titles=['<b>Wickets</b>','<b>Strike Rate</b>','<b>Average</b>'], shared_yaxes=True, column_widths = [0.4,0.3,0.3])
 
-        fig.add_trace(go.Scatter(x = franchise_runs['Average'],
-                                y = franchise_runs['Name'],
-                                mode = 'lines+markers',
-                                line = dict(width=1,color=non_top_scorer_df.Color.iloc[0])),
-                    row = 1,
-                    col = 3)
+    fig.add_trace(go.Bar(orientation = 'h', marker = dict(color = '#C5C5C5')), row = 1, col = 1)
+    fig.add_trace(go.Bar(orientation = 'h', marker = dict(color = '#A020F0')), row = 1, col = 1)
 
-        fig.add_trace(go.Scatter(x = top_scorer_df['Average'],
-                                y = top_scorer_df['Name'],
-                                mode = 'markers',
-                                marker = dict(size=10,color=top_scorer_df.Color.iloc[0])),
-                    row = 1,
-                    col = 3)
+    fig.update_traces(textposition='inside', insidetextanchor='middle', hovertemplate='%{y}: %{x} Wickets', row=1, col=1)
 
-        title_text = f'<b><span style="color:{top_scorer_df.Color.iloc[0]}">{top_scorer}</span> leads the list with <span style="color:{top_scorer_df.Color.iloc[0]}">{top_scorer_df.Runs.iloc[0]}</span> runs, at a strike rate of <span style="color:{top_scorer_df.Color.iloc[0]}">{top_scorer_df["Strike Rate"].iloc[0]}</span></b>'
+    fig.update_xaxes(showticklabels=False, row=1, col=1, showgrid=False)
+    fig.update_yaxes(showgrid=False)
 
-        fig.update_layout(plot_bgcolor = 'white',
-                        font = dict(color = '#444444',family='Verdana',size=12),
-                        title = dict(text = title_text),
-                        showlegend = False,
-                        height = 400,
-                        yaxis = dict(linecolor = 'white',categoryorder = 'array',categoryarray = NAME_ORDER))
+    for col in [2,3]:
+        fig.add_trace(go.Scatter(mode = 'lines+markers', line = dict(width=1,color='#C5C5C5')), row = 1, col = col)
+        fig.add_trace(go.Scatter(mode = 'markers', marker = dict(size=10,color='#A020F0')), row = 1, col = col)
 
-        fig.update_traces(name='')
+    fig.update_layout(plot_bgcolor = 'white',
+                    font = dict(color = '#444444',family='Verdana',size=12),
+                    showlegend = False,
+                    height = 400,
+                    yaxis = dict(linecolor = 'white',categoryorder = 'array'))
 
-        return fig
-    
-    except Exception as e:
-        logging.error(CustomException(e,sys))
-        raise CustomException(e,sys)
+    fig.update_traces(name='')
+
+    return fig
 
 # Generates the graphs for the wicket takers for a franchise in a particular year
 
@@ -500,81 +585,24 @@ def franchiseWicketsGraph(player_stats,year,franchise):
         franchise_wickets.rename(columns={'BowlingStrikeRate':'Strike Rate','BowlingAverage':'Average'},inplace=True)
         franchise_wickets.Average = franchise_wickets.Average.apply(lambda x:round(x,1))
 
-        franchise_wickets['Color'] = '#C5C5C5'
-        franchise_wickets.iloc[0,-1] = '#A020F0'
-
         NAME_ORDER = franchise_wickets.Name.tolist()
         NAME_ORDER.reverse()
 
-        fig = make_subplots(cols=3, rows=1, subplot_titles=['<b>Wickets</b>','<b>Strike Rate</b>','<b>Average</b>'], shared_yaxes=True, column_widths = [0.4,0.3,0.3])
-
         top_wicket_taker = franchise_wickets.Name.iloc[0]
 
         top_wicket_taker_df = franchise_wickets.loc[franchise_wickets['Name'] == top_wicket_taker]
         non_top_wicket_taker_df = franchise_wickets.loc[franchise_wickets['Name'] != top_wicket_taker]
 
-        fig.add_trace(go.Bar(x = non_top_wicket_taker_df['Wickets'],
-                            y = non_top_wicket_taker_df['Name'],
-                            orientation = 'h',
-                            text = non_top_wicket_taker_df['Wickets'],
-                            marker = dict(color = non_top_wicket_taker_df.Color.iloc[0])),
-                    row = 1,
-                    col = 1)
-
-        fig.add_trace(go.Bar(x = top_wicket_taker_df['Wickets'],
-                            y = top_wicket_taker_df['Name'],
-                            orientation = 'h',
-                            text = top_wicket_taker_df['Wickets'],
-                            marker = dict(color = top_wicket_taker_df.Color.iloc[0])),
-                    row = 1,
-                    col = 1)
-
-        fig.update_traces(textposition='inside', insidetextanchor='middle', hovertemplate='%{y}: %{x} Wickets', row=1, col=1)
-        fig.update_traces(hovertemplate='(%{y}: %{x})', row=1, col=2)
-        fig.update_traces(hovertemplate='(%{y}: %{x})', row=1, col=3)
-        fig.update_xaxes(showticklabels=False, row=1, col=1, showgrid=False)
-        fig.update_yaxes(showgrid=False)
-
-        fig.add_trace(go.Scatter(x = franchise_wickets['Strike Rate'],
-                                y = franchise_wickets['Name'],
-                                mode = 'lines+markers',
-                                line = dict(width=1,color=non_top_wicket_taker_df.Color.iloc[0])),
-                    row = 1,
-                    col = 2)
-
-        fig.add_trace(go.Scatter(x = top_wicket_taker_df['Strike Rate'],
-                                y = top_wicket_taker_df['Name'],
-                                mode = 'markers',
-                                marker = dict(size=10,color=top_wicket_taker_df.Color.iloc[0])),
-                    row = 1,
-                    col = 2)
-
-        fig.add_trace(go.Scatter(x = franchise_wickets['Average'],
-                                y = franchise_wickets['Name'],
-                                mode = 'lines+markers',
-                                line = dict(width=1,color=non_top_wicket_taker_df.Color.iloc[0])),
-                    row = 1,
-                    col = 3)
+        traces = [dict(x = non_top_wicket_taker_df['Wickets'], y = non_top_wicket_taker_df['Name'], text = non_top_wicket_taker_df['Wickets']),
+                  dict(x = top_wicket_taker_df['Wickets'], y = top_wicket_taker_df['Name'], text = top_wicket_taker_df['Wickets']),
+                  dict(x = franchise_wickets['Strike Rate'], y = franchise_wickets['Name']),
+                  dict(x = top_wicket_taker_df['Strike Rate'], y = top_wicket_taker_df['Name']),
+                  dict(x = franchise_wickets['Average'], y = franchise_wickets['Name']),
+                  dict(x = top_wicket_taker_df['Average'], y = top_wicket_taker_df['Name'])]
 
-        fig.add_trace(go.Scatter(x = top_wicket_taker_df['Average'],
-                                y = top_wicket_taker_df['Name'],
-                                mode = 'markers',
-                                marker = dict(size=10,color=top_wicket_taker_df.Color.iloc[0])),
-                    row = 1,
-                    col = 3)
+        title_text = f'<b><span style="color:#A020F0">{top_wicket_taker}</span> leads the list with <span style="color:#A020F0">{top_wicket_taker_df.Wickets.iloc[0]}</span> wickets, at a strike rate of <span style="color:#A020F0">{top_wicket_taker_df["Strike Rate"].iloc[0]}</span></b>'
 
-        title_text = f'<b><span style="color:{top_wicket_taker_df.Color.iloc[0]}">{top_wicket_taker}</span> leads the list with <span style="color:{top_wicket_taker_df.Color.iloc[0]}">{top_wicket_taker_df.Wickets.iloc[0]}</span> wickets, at a strike rate of <span style="color:{top_wicket_taker_df.Color.iloc[0]}">{top_wicket_taker_df["Strike Rate"].iloc[0]}</span></b>'
-
-        fig.update_layout(plot_bgcolor = 'white',
-                        font = dict(color = '#444444',family='Verdana',size=12),
-                        title = dict(text = title_text),
-                        showlegend = False,
-                        height = 400,
-                        yaxis = dict(linecolor = 'white',categoryorder = 'array',categoryarray = NAME_ORDER))
-
-        fig.update_traces(name='')
-
-        return fig
+        return figureFromTemplate('franchiseWicketsGraph', _franchiseWicketsTemplate, traces, {'title.text':title_text, 'yaxis.categoryarray':NAME_ORDER})
     
     except Exception as e:
         logging.error(CustomException(e,sys))
@@ -0,0 +1,319 @@
+# Module loads the tables the app is built on, for one league at a time
+# Every league has its own data files : the league of the data directory is the IPL, and any other league is a directory
+# under its leagues directory holding the same files, e.g. data/leagues/BBL/player_stats_all_time.csv. The tables get a
+# League column once loaded, and a view only loads the league, and the seasons, it shows. Read from the csv files, the
+# tables of a league are read once and its seasons sliced in memory, only the shared tables skip reading the other seasons
+# With shared tables turned on, the tables of every league are published once per version of the data files into Arrow
+# IPC files under the cache directory, which every worker process memory-maps read-only. Every season of a league is a
+# contiguous range of rows of its files, so loading a season only maps the pages of that season. The numeric columns of
+# the dataframes are then zero-copy views over the mapped files, and the string columns pandas strings backed by their
+# Arrow arrays, all of them backed by the same pages of the OS page cache in every process, so a host holds roughly one
+# copy of the tables whatever the number of workers
+
+import hashlib
+import json
+import os
+import sys
+
+import pandas as pd
+
+from src.cache import CACHE_DIR, memoryCache
+from src.exception import CustomException
+from src.logger import logging
+from src.win_margins import parseWinDetails
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+# Dtypes the string columns of the shared tables are wrapped as : pandas strings backed by the Arrow arrays of the
+# mapped files, so the strings are not copied into every process either
+
+STRING_TYPES = {} if pa is None else {pa.string(): pd.StringDtype('pyarrow')}
+
+# Directory of the data files, set with the IPL_DATA_DIR environment variable, e.g. to a synthetic dataset
+
+DATA_DIR = os.environ.get('IPL_DATA_DIR', 'data')
+
+# Csv file of every table, keyed by the name the table is known by in the app
+
+DATA_FILES = {
+    'player_stats': os.path.join(DATA_DIR, 'player_stats_all_time.csv'),
+    'points_table': os.path.join(DATA_DIR, 'points_table_all_time.csv'),
+    'matches': os.path.join(DATA_DIR, 'matches_all_time.csv'),
+    'ground_data': os.path.join(DATA_DIR, 'ground_location.csv')
+}
+
+# League of the data directory, and directory of the other leagues
+
+DEFAULT_LEAGUE = 'IPL'
+
+LEAGUES_DIR = os.path.join(DATA_DIR, 'leagues')
+
+# Switch for loading the tables from the shared Arrow files, turned on with the IPL_SHARED_TABLES=1 environment variable
+# It needs pyarrow, the tables are read from the csv files when it is not installed
+
+SHARED_TABLES = os.environ.get('IPL_SHARED_TABLES', '0') == '1'
+
+# Returns the leagues with data files, the league of the data directory first
+
+def leagues():
+
+    others = []
+    if os.path.isdir(LEAGUES_DIR):
+        others = sorted(league for league in os.listdir(LEAGUES_DIR)
+                        if all(os.path.exists(path) for path in leagueFiles(league).values()))
+
+    return [DEFAULT_LEAGUE] + others
+
+# Returns the directory of the data files of a league
+
+def leagueDir(league=None):
+
+    if league is None or league == DEFAULT_LEAGUE:
+        return DATA_DIR
+
+    return os.path.join(LEAGUES_DIR, league)
+
+# Returns the csv file of every table of a league
+
+def leagueFiles(league=None):
+
+    if league is None or league == DEFAULT_LEAGUE:
+        return DATA_FILES
+
+    return {name: os.path.join(leagueDir(league), os.path.basename(path)) for name, path in DATA_FILES.items()}
+
+# Loads every table of a league from its csv file, keyed by its name, with the exact columns of the file
+
+def readTables(league=None):
+
+    return {name: pd.read_csv(path) for name, path in leagueFiles(league).items()}
+
+# Returns the tables with the league they belong to as their last column
+
+def withLeague(tables, league):
+
+    return {name: table.assign(League=league) for name, table in tables.items()}
+
+# Adds to the tables the typed columns derived from their raw text columns, once when they are loaded, so that no chart
+# ever parses the text : the margin type, margin value and DLS flag of every match, parsed from its WinDetails
+
+def enrichTables(tables):
+
+    return {**tables, 'matches': tables['matches'].join(parseWinDetails(tables['matches']['WinDetails']))}
+
+# Version of the preparation of the tables, part of the version of the shared tables, to be bumped when enrichTables or
+# orderTables change the tables so that they are published again
+
+ENRICHMENT_VERSION = '2'
+
+# Tables with a season, which are partitioned by season, every other table is only partitioned by league
+
+SEASON_TABLES = ['player_stats', 'points_table', 'matches']
+
+# Returns the tables with the rows of the tables with a season in season order, numbered again from 0
+# The rows of a season keep the order of the csv file, which the data of the app already is in, so that every season
+# is a contiguous range of rows whether the tables are read from the csv files or mapped from the shared tables
+
+def orderTables(tables):
+
+    return {name: table.sort_values('Year', kind='stable').reset_index(drop=True) if name in SEASON_TABLES else table
+            for name, table in tables.items()}
+
+# Returns the tables of a league read from its csv files, as they are loaded : with their league, in season order and
+# enriched
+
+def leagueTables(league):
+
+    return enrichTables(orderTables(withLeague(readTables(league), league)))
+
+# Returns the rows of the tables of the given seasons
+
+def pruneTables(tables, years):
+
+    if years is None:
+        return tables
+
+    return {name: table[table['Year'].isin(years)] if name in SEASON_TABLES else table for name, table in tables.items()}
+
+# Returns the seasons of a league, in the order they appear in its player stats
+
+def leagueYears(league=None):
+
+    try:
+        if SHARED_TABLES and pa is not None:
+            return partitionManifest(publishTables(filesVersion()))[league or DEFAULT_LEAGUE]['years']
+
+        return csvTables(league)['player_stats']['Year'].unique().tolist()
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Returns the path, modification time and size of every given file, a cheap key of their content
+
+def fileStamps(paths):
+
+    stamps = []
+    for path in paths:
+        stat = os.stat(path)
+        stamps.append((path, stat.st_mtime_ns, stat.st_size))
+
+    return tuple(stamps)
+
+# Returns the tables of a league read from its csv files and enriched, once per version of the files, keeping only the
+# rows of the given seasons if any
+# A csv file can only be read whole, so the seasons are sliced in memory from the tables of the whole league, read once,
+# and every slice is kept as well. The same dataframes are returned on every call until a file changes, they must not be
+# modified in place
+
+def csvTables(league=None, years=None):
+
+    league = league or DEFAULT_LEAGUE
+    stamps = fileStamps(leagueFiles(league).values())
+    cache = memoryCache('tables')
+
+    tables = cache.getOrCompute(('csv', league, stamps, None), lambda: leagueTables(league))
+    if years is None:
+        return tables
+
+    return cache.getOrCompute(('csv', league, stamps, tuple(years)), lambda: pruneTables(tables, years))
+
+# Returns a short hash of the content of the data files of every league, used to version the shared tables
+# The files are only read and hashed again when one of them was modified, added or removed
+
+def filesVersion():
+
+    files = [(league, name, path) for league in leagues() for name, path in leagueFiles(league).items()]
+
+    def compute():
+        digest = hashlib.sha1(f'enrichment:{ENRICHMENT_VERSION}'.encode())
+        for league, name, path in files:
+            digest.update(f'{league}:{name}'.encode())
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        return digest.hexdigest()[:16]
+
+    return memoryCache('tables').getOrCompute(('filesVersion', fileStamps(path for _, _, path in files)), compute)
+
+# Returns the directory of the shared tables of a version of the data files
+
+def sharedTablesDir(version):
+
+    return os.path.join(CACHE_DIR, 'arrow', version)
+
+# Reads the manifest of the shared tables, which holds for every league its seasons, and the range of rows of every
+# season in each of its tables
+
+def partitionManifest(directory):
+
+    with open(os.path.join(directory, 'manifest.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+# Writes every table of every league into its Arrow IPC file, unless the tables of this version have already been published
+# The rows of a table are in season order (see orderTables), so that every season is a contiguous partition of the file,
+# whose range of rows is recorded in the manifest, and the rows are mapped back in the order they are written. The manifest is written last, so its presence tells that every file is complete
+# The files are written uncompressed, so that they can be mapped as they are, and each one is renamed into place
+# once complete, so a worker never maps a partially written file
+
+def publishTables(version):
+
+    try:
+        directory = sharedTablesDir(version)
+        manifest_path = os.path.join(directory, 'manifest.json')
+
+        if os.path.exists(manifest_path):
+            return directory
+
+        manifest = {}
+        for league in leagues():
+            os.makedirs(os.path.join(directory, league), exist_ok=True)
+            tables = leagueTables(league)
+            manifest[league] = {'years': tables['player_stats']['Year'].unique().tolist(), 'partitions': {}}
+
+            for name, table in tables.items():
+                if name in SEASON_TABLES:
+                    sizes = table['Year'].value_counts(sort=False).reindex(table['Year'].unique())
+                    offsets = sizes.cumsum() - sizes
+                    manifest[league]['partitions'][name] = {str(year): [int(offsets[year]), int(sizes[year])] for year in sizes.index}
+
+                path = os.path.join(directory, league, f'{name}.arrow')
+                temp_path = f'{path}.{os.getpid()}.tmp'
+                arrow_table = pa.Table.from_pandas(table, preserve_index=True)
+
+                with pa.OSFile(temp_path, 'wb') as sink:
+                    with pa.ipc.new_file(sink, arrow_table.schema) as writer:
+                        writer.write_table(arrow_table)
+
+                os.replace(temp_path, path)
+
+        with open(f'{manifest_path}.{os.getpid()}.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(f'{manifest_path}.{os.getpid()}.tmp', manifest_path)
+
+        logging.info(f'Tables published for data version {version}')
+
+        return directory
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Maps the shared tables of a league read-only and wraps them as dataframes, without copying their columns
+# Only the partitions of the given seasons are wrapped, so the pages of the other seasons are never read. The rows of
+# several seasons are concatenated, which copies them
+
+def mapTables(directory, league=None, years=None):
+
+    try:
+        league = league or DEFAULT_LEAGUE
+        partitions = partitionManifest(directory)[league]['partitions']
+
+        tables = {}
+        for name in DATA_FILES:
+            arrow_table = pa.ipc.open_file(pa.memory_map(os.path.join(directory, league, f'{name}.arrow'), 'r')).read_all()
+
+            if years is not None and name in partitions:
+                ranges = [partitions[name][str(year)] for year in years if str(year) in partitions[name]]
+                arrow_table = pa.concat_tables([arrow_table.slice(*rows) for rows in ranges]) if ranges else arrow_table.slice(0, 0)
+
+            tables[name] = arrow_table.to_pandas(split_blocks=True, types_mapper=STRING_TYPES.get)
+
+        return tables
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Loads every table of a league as a dataframe, keyed by its name, keeping only the rows of the given seasons if any
+# The tables are read and enriched once per version of the files, or mapped once per process when shared, and the same
+# dataframes are returned on every call, they must not be modified in place
+
+def loadTables(shared=None, league=None, years=None):
+
+    try:
+        shared = SHARED_TABLES if shared is None else shared
+        league = league or DEFAULT_LEAGUE
+        years = None if years is None else sorted(years)
+
+        if shared and pa is None:
+            logging.info('pyarrow is not installed, reading the tables from the csv files')
+            shared = False
+
+        if not shared:
+            return dict(csvTables(league, years))
+
+        version = filesVersion()
+        cache = memoryCache('tables')
+
+        tables = cache.getOrCompute((version, league, None if years is None else tuple(years)),
+                                    lambda: mapTables(publishTables(version), league, years))
+
+        return dict(tables)
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
@@ -0,0 +1,227 @@
+# Module rates the franchises with an Elo rating, updated after every match in the order they were played
+# Usage : python -m src.elo [--league IPL] [--replay]
+# Every franchise starts at INITIAL_RATING. After a match, the winner takes from the loser K_FACTOR times the share of
+# the match it was not expected to win, given the difference of their ratings, a tie sharing the match and a match with
+# no result leaving both ratings as they were.
+# The ratings are held in a numpy array indexed by franchise, and the rating of both teams after every match in arrays
+# growing with the matches, so rating the whole history only costs a few arithmetic operations per match. The state of
+# the engine is persisted per league under the artifacts directory, along with a hash of the matches it has rated :
+# when the matches table only gained new matches since, only those are rated, rather than the whole history again.
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.cache import artifactPath, dataVersion, memoryCache
+from src.data_loader import DEFAULT_LEAGUE, loadTables
+from src.exception import CustomException
+from src.logger import logging
+
+INITIAL_RATING = 1500.0
+K_FACTOR = 24.0
+
+# Arrays of the history of the ratings, one entry per match rated, along with their dtypes
+
+HISTORY = {'Date': 'datetime64[D]', 'Year': np.int64, 'MatchRow': np.int64, 'Team1': np.int64, 'Team2': np.int64,
+           'Rating1': np.float64, 'Rating2': np.float64, 'Change': np.float64}
+
+# Returns the matches in the order they were played, with the columns the engine needs
+# Matches played the same day are ordered by their start time, and then by their row in the season
+
+def orderMatches(matches):
+
+    dates = matches['MATCH_COMMENCE_START_DATE'].str[:10]
+    order = np.lexsort((matches['MatchRow'].to_numpy(), matches['MatchTime'].astype(str).to_numpy(), dates.to_numpy().astype(str)))
+
+    return pd.DataFrame({'Date': dates.to_numpy()[order].astype('datetime64[D]'),
+                         'Year': matches['Year'].to_numpy()[order],
+                         'MatchRow': matches['MatchRow'].to_numpy()[order].astype(np.int64),
+                         'Team1': matches['FirstBattingTeamName'].to_numpy()[order],
+                         'Team2': matches['SecondBattingTeamName'].to_numpy()[order],
+                         'Winner': matches['Winner'].to_numpy()[order]})
+
+# Returns a hash of the first matches of the ordered matches, telling whether they are the matches rated before
+
+def _prefixHash(row_hashes, count):
+
+    return hashlib.sha1(row_hashes[:count].tobytes()).hexdigest()[:16]
+
+# Rating engine, holding the current rating of every franchise and the history of the ratings
+
+class EloEngine:
+
+    def __init__(self, k_factor=K_FACTOR, initial_rating=INITIAL_RATING):
+        self.k_factor = k_factor
+        self.initial_rating = initial_rating
+        self.reset()
+
+    def reset(self):
+        self.teams = []
+        self._index = {}
+        self.ratings = np.empty(0)
+        self.history = {name: np.empty(0, dtype) for name, dtype in HISTORY.items()}
+        self.rated = 0
+        self.prefix = _prefixHash(np.empty(0, np.uint64), 0)
+
+    # Returns the index of a franchise in the ratings, adding it at the initial rating when first seen
+
+    def _team(self, team):
+        if team not in self._index:
+            self._index[team] = len(self.teams)
+            self.teams.append(team)
+            self.ratings = np.append(self.ratings, self.initial_rating)
+        return self._index[team]
+
+    # Rates the matches of the table not rated yet, returning the number of matches rated
+    # The whole history is rated again when the matches rated before are no longer the first ones of the table
+
+    def update(self, matches):
+
+        try:
+            ordered = orderMatches(matches)
+            row_hashes = pd.util.hash_pandas_object(ordered, index=False).to_numpy()
+
+            if self.rated > len(ordered) or _prefixHash(row_hashes, self.rated) != self.prefix:
+                logging.info('Elo : the matches rated before changed, rating the whole history again')
+                self.reset()
+
+            new = ordered.iloc[self.rated:]
+            team1 = np.array([self._team(team) for team in new['Team1']], dtype=np.int64)
+            team2 = np.array([self._team(team) for team in new['Team2']], dtype=np.int64)
+            score = np.select([new['Winner'] == new['Team1'], new['Winner'] == new['Team2'], new['Winner'] == 'Tie'], [1.0, 0.0, 0.5], np.nan)
+
+            # Each match depends on the ratings left by the previous ones, so the matches are rated one after the other
+            # on plain floats, the arrays being filled in as they go
+
+            ratings = self.ratings.tolist()
+            rating1, rating2, change = np.empty(len(new)), np.empty(len(new)), np.zeros(len(new))
+            for position, (a, b, s) in enumerate(zip(team1.tolist(), team2.tolist(), score.tolist())):
+                if s == s:
+                    expected = 1.0 / (1.0 + 10.0 ** ((ratings[b] - ratings[a]) / 400.0))
+                    change[position] = self.k_factor * (s - expected)
+                    ratings[a] += change[position]
+                    ratings[b] -= change[position]
+                rating1[position], rating2[position] = ratings[a], ratings[b]
+
+            self.ratings = np.array(ratings)
+
+            batch = {'Date': new['Date'].to_numpy().astype('datetime64[D]'), 'Year': new['Year'].to_numpy(), 'MatchRow': new['MatchRow'].to_numpy(),
+                     'Team1': team1, 'Team2': team2, 'Rating1': rating1, 'Rating2': rating2, 'Change': change}
+            self.history = {name: np.concatenate([self.history[name], batch[name].astype(dtype)]) for name, dtype in HISTORY.items()}
+
+            self.rated = len(ordered)
+            self.prefix = _prefixHash(row_hashes, self.rated)
+
+            return len(new)
+
+        except Exception as e:
+            logging.error(CustomException(e,sys))
+            raise CustomException(e,sys)
+
+    # Current rating of every franchise, the highest first
+
+    def currentRatings(self):
+        ratings = pd.DataFrame({'Team': self.teams, 'Rating': self.ratings.round(1)})
+        return ratings.sort_values('Rating', ascending=False, kind='stable').reset_index(drop=True)
+
+    # Rating of the franchises after every match they played, or of a single franchise
+
+    def ratingHistory(self, team=None):
+        history = self.history
+        teams = np.array(self.teams, dtype=object)
+
+        frames = []
+        for side, other, sign in [('1', '2', 1.0), ('2', '1', -1.0)]:
+            mask = np.ones(len(history['Date']), dtype=bool) if team is None else history[f'Team{side}'] == self._index.get(team, -1)
+            frames.append(pd.DataFrame({'Date': history['Date'][mask], 'Year': history['Year'][mask], 'MatchRow': history['MatchRow'][mask],
+                                        'Team': teams[history[f'Team{side}'][mask]], 'Opponent': teams[history[f'Team{other}'][mask]],
+                                        'Rating': history[f'Rating{side}'][mask].round(1), 'Change': (sign * history['Change'][mask]).round(1)}))
+
+        return pd.concat(frames).sort_values(['Date','MatchRow'], kind='stable').reset_index(drop=True)
+
+    # Saves the state of the engine, replacing the previous one in one go
+
+    def save(self, path):
+        arrays = {f'history.{name}': values for name, values in self.history.items()}
+        np.savez(f'{path}.{os.getpid()}.tmp.npz', teams=np.array(self.teams, dtype=str), ratings=self.ratings,
+                 rated=self.rated, prefix=self.prefix, settings=np.array([self.k_factor, self.initial_rating]), **arrays)
+        os.replace(f'{path}.{os.getpid()}.tmp.npz', path)
+
+    # Returns the engine saved at a path, or a new engine when there is none saved with the same settings
+
+    @classmethod
+    def load(cls, path, k_factor=K_FACTOR, initial_rating=INITIAL_RATING):
+        engine = cls(k_factor, initial_rating)
+        if not os.path.exists(path):
+            return engine
+
+        with np.load(path, allow_pickle=False) as arrays:
+            if arrays['settings'].tolist() != [k_factor, initial_rating]:
+                return engine
+            engine.teams = arrays['teams'].tolist()
+            engine._index = {team: index for index, team in enumerate(engine.teams)}
+            engine.ratings = arrays['ratings']
+            engine.history = {name: arrays[f'history.{name}'] for name in HISTORY}
+            engine.rated = int(arrays['rated'])
+            engine.prefix = str(arrays['prefix'])
+
+        return engine
+
+def statePath(league=None):
+
+    return artifactPath('elo', f'{league or DEFAULT_LEAGUE}.npz')
+
+# Returns the engine having rated the matches of a league, shared by all the sessions as long as the matches are the same
+# The engine saved for the league is brought up to date with the matches and saved again
+
+def eloEngine(matches, league=None):
+
+    def build():
+        path = statePath(league)
+        engine = EloEngine.load(path)
+        rated = engine.update(matches)
+        if rated:
+            engine.save(path)
+            logging.info(f'Elo : {rated} matches rated for {league or DEFAULT_LEAGUE}')
+        return engine
+
+    return memoryCache('elo').getOrCompute((league or DEFAULT_LEAGUE, dataVersion(matches)), build)
+
+# Returns the rating of a franchise after every match it played, or of every franchise
+
+def eloHistory(matches, team=None, league=None):
+
+    return eloEngine(matches, league).ratingHistory(team)
+
+# Returns the current rating of every franchise
+
+def eloRatings(matches, league=None):
+
+    return eloEngine(matches, league).currentRatings()
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Shows the current Elo rating of every franchise')
+    parser.add_argument('--league', default=DEFAULT_LEAGUE)
+    parser.add_argument('--replay', action='store_true', help='rate the whole history again rather than only the new matches')
+    args = parser.parse_args()
+
+    try:
+        matches = loadTables(league=args.league)['matches']
+
+        start = time.perf_counter()
+        engine = EloEngine() if args.replay else EloEngine.load(statePath(args.league))
+        rated = engine.update(matches)
+        engine.save(statePath(args.league))
+
+        print(f'{rated} matches rated in {(time.perf_counter() - start) * 1000:.1f} ms, {engine.rated} in total')
+        print(engine.currentRatings().to_string(index=False))
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
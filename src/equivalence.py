@@ -0,0 +1,306 @@
+# Module checks that the optimized code paths of the app show exactly what the original code of the app showed
+# Usage : python -m src.equivalence [--tabs all-time year franchise player] [--sample N] [--seed S]
+# Every chart and table of the tabs, for every nationality, year, franchise, pair of franchises and player (or a sample
+# of them), is built twice : once the way the original app built it, by calling the chart functions on the tables read
+# from the csv files through the regular plotly calls, and once through the views of the app, with the optimized paths
+# turned on or off by their environment variables as usual (figure templates, pipeline, backend, shared tables ...).
+# The data of the figures (type, x, y, text, labels and values of every trace, colors of the markers and titles) and the
+# tables are diffed, and each side is timed. It only reads the files under data/.
+
+import argparse
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+
+import pandas as pd
+import plotly.io as pio
+
+from src import figure_templates
+from src.cache import memoryCache
+from src.data_loader import loadTables, readTables
+from src.export import TABS, tabViews
+from src.views import *
+from src.exception import CustomException
+from src.logger import logging
+
+# Tables of the tabs as the original app built them, from the tables read from the csv files
+
+def referenceHeadToHead(tables, franchise1, franchise2):
+
+    matches = tables['matches']
+
+    head_to_head = matches[((matches['FirstBattingTeamName'] == franchise1) & (matches['SecondBattingTeamName'] == franchise2)) | ((matches['FirstBattingTeamName'] == franchise2) & (matches['SecondBattingTeamName'] == franchise1))].Winner.value_counts().reset_index().rename(columns={'index':'Team','Winner':'Wins'})
+
+    if not head_to_head.empty:
+        winners = head_to_head.Team.tolist()
+        results = head_to_head.Wins.tolist()
+
+        if 'No Result' in winners:
+            position = winners.index('No Result')
+            winners.pop(position)
+            no_result = results.pop(position)
+
+            head_to_head = pd.DataFrame({'Team':winners,'Wins':results})
+            temp = pd.DataFrame({'Team':['No Result'],'Wins':[no_result]})
+
+            head_to_head = head_to_head.sort_values('Wins',ascending=False)
+
+            head_to_head['Color'] = '#F8D210'
+            head_to_head.iloc[0,-1] = '#FA26A0'
+
+            temp['Color'] = '#2FF3E0'
+
+            head_to_head = pd.concat([head_to_head,temp],ignore_index=True)
+            head_to_head = head_to_head.sort_values('Wins',ascending=False)
+        else:
+            head_to_head['Color'] = '#F8D210'
+            head_to_head.iloc[0,-1] = '#FA26A0'
+    else:
+        head_to_head = pd.DataFrame({'Team':[franchise1,franchise2]})
+        head_to_head['Color'] = '#F8D210'
+        head_to_head.iloc[0,-1] = '#FA26A0'
+
+    return head_to_head
+
+def referenceBestBatting(tables, nationality):
+
+    player_stats = tables['player_stats']
+
+    if nationality == 'Indian and Overseas':
+        return player_stats[player_stats['BestScore'] != 'Not Available'].sort_values(['HighestScore','IsNotDismissed'],ascending=[False,True])[['Name','BestScore','Year']].head(20)
+    return player_stats[(player_stats['Nationality'] == nationality) & (player_stats['BestScore'] != 'Not Available')].sort_values(['HighestScore','IsNotDismissed'],ascending=[False,True])[['Name','BestScore','Year']].head(20)
+
+def referenceBestBowling(tables, nationality):
+
+    player_stats = tables['player_stats']
+
+    if nationality == 'Indian and Overseas':
+        return player_stats.sort_values(['BestBowlingWickets','BestBowlingRuns','Year'],ascending=[False,True,True])[['Name','BestBowling','Year']].drop_duplicates(['Name','BestBowling']).head(20)
+    return player_stats[player_stats['Nationality'] == nationality].sort_values(['BestBowlingWickets','BestBowlingRuns','Year'],ascending=[False,True,True])[['Name','BestBowling','Year']].drop_duplicates(['Name','BestBowling']).head(20)
+
+def referencePointsTable(tables, year):
+
+    points_table = tables['points_table']
+
+    table = points_table[points_table['Year'] == year][['Standings','TeamName','Matches','Wins','Loss','Tied','NoResult','Points','NetRunRate']]
+    return table.rename(columns={'TeamName':'Team','Wins':'Win','Tied':'Tie','NoResult':'No Result','NetRunRate':'Net Run Rate'})
+
+def referenceTitles(tables):
+
+    teamwise_winners = {}
+    for year,team in IPL_WINNERS.items():
+        if team in teamwise_winners.keys():
+            teamwise_winners[team].append(year)
+        else:
+            teamwise_winners[team] = [year]
+
+    win_count = {}
+    for team in teamwise_winners.keys():
+        win_count[team] = len(teamwise_winners[team])
+
+    return pd.DataFrame({'Team Name':list(win_count.keys()),'Wins':list(win_count.values())}).sort_values(['Wins','Team Name'],ascending=[False,True])
+
+REFERENCE_TABLES = {
+    'titles': referenceTitles,
+    'bestBatting': referenceBestBatting,
+    'bestBowling': referenceBestBowling,
+    'pointsTable': referencePointsTable,
+    'teamsRepresented': lambda tables, player: tables['player_stats'][tables['player_stats']['Name'] == player][['TeamName','Year']].rename(columns={'TeamName':'Team Name'}),
+    'franchiseRuns': lambda tables: tables['player_stats'][['TeamName','Name','TotalRuns']].groupby(['TeamName','Name']).sum().sort_values('TotalRuns',ascending=False).reset_index(),
+    'franchiseWickets': lambda tables: tables['player_stats'][['TeamName','Name','Wickets']].groupby(['TeamName','Name']).sum().sort_values('Wickets',ascending=False).reset_index(),
+    'headToHead': referenceHeadToHead
+}
+
+# Charts of the tabs as the original app built them, the similar players having no original implementation
+
+REFERENCE_CHARTS = {
+    'topTitlesGraph': lambda tables: topTitlesGraph(referenceTitles(tables)),
+    'topWinsTeamGraph': lambda tables: topWinsTeamGraph(tables['matches']),
+    'playerStrength': lambda tables: playerStrength(tables['player_stats']),
+    'topRunsGraph': lambda tables, nationality: topRunsGraph(tables['player_stats'],nationality),
+    'topWicketsGraph': lambda tables, nationality: topWicketsGraph(tables['player_stats'],nationality),
+    'battingLandmark': lambda tables, nationality: battingLandmark(tables['player_stats'],nationality),
+    'bowlingLandmark': lambda tables, nationality: bowlingLandmark(tables['player_stats'],nationality),
+    'boundaryCount': lambda tables, nationality: boundaryCount(tables['player_stats'],nationality),
+    'pointsTableGraph': lambda tables, year: pointsTableGraph(referencePointsTable(tables, year)),
+    'topRunsYearGraph': lambda tables, year: topRunsYearGraph(tables['player_stats'],year),
+    'topWicketsYearGraph': lambda tables, year: topWicketsYearGraph(tables['player_stats'],year),
+    'topStrikerBat': lambda tables, year: topStrikerBat(tables['player_stats'],year),
+    'topStrikerBowl': lambda tables, year: topStrikerBowl(tables['player_stats'],year),
+    'franchiseRunsGraph': lambda tables, year, franchise: franchiseRunsGraph(tables['player_stats'],year,franchise),
+    'franchiseWicketsGraph': lambda tables, year, franchise: franchiseWicketsGraph(tables['player_stats'],year,franchise),
+    'franchiseTotalRuns': lambda tables, franchise: franchiseTotalRuns(tables['player_stats'],franchise),
+    'franchiseTotalWickets': lambda tables, franchise: franchiseTotalWickets(tables['player_stats'],franchise),
+    'standings': lambda tables, franchise: standings(tables['points_table'],franchise),
+    'avgAge': lambda tables, franchise: avgAge(tables['player_stats'],franchise),
+    'headToHead': lambda tables, franchise1, franchise2: headToHead(referenceHeadToHead(tables, franchise1, franchise2)),
+    'headToHeadRuns': lambda tables, franchise1, franchise2: headToHeadRuns(REFERENCE_TABLES['franchiseRuns'](tables),franchise1,franchise2,referenceHeadToHead(tables, franchise1, franchise2)),
+    'headToHeadWickets': lambda tables, franchise1, franchise2: headToHeadWickets(REFERENCE_TABLES['franchiseWickets'](tables),franchise1,franchise2,referenceHeadToHead(tables, franchise1, franchise2)),
+    'headToHeadStandings': lambda tables, franchise1, franchise2: headToHeadStandings(tables['points_table'],franchise1,franchise2,referenceHeadToHead(tables, franchise1, franchise2)),
+    'headToHeadAge': lambda tables, franchise1, franchise2: headToHeadAge(tables['player_stats'],franchise1,franchise2,referenceHeadToHead(tables, franchise1, franchise2)),
+    'batStats': lambda tables, player: batStats(tables['player_stats'],player),
+    'bowlStats': lambda tables, player: bowlStats(tables['player_stats'],player),
+    'runsPerSeason': lambda tables, player: runsPerSeason(tables['player_stats'],player),
+    'strikeRatePerSeason': lambda tables, player: strikeRatePerSeason(tables['player_stats'],player),
+    'averagePerSeason': lambda tables, player: averagePerSeason(tables['player_stats'],player),
+    'wicketsPerSeason': lambda tables, player: wicketsPerSeason(tables['player_stats'],player),
+    'bowlingStrikeRatePerSeason': lambda tables, player: bowlingStrikeRatePerSeason(tables['player_stats'],player),
+    'economyPerSeason': lambda tables, player: economyPerSeason(tables['player_stats'],player)
+}
+
+# Properties of the traces and of the layout compared between two figures
+
+TRACE_PROPERTIES = ['type','x','y','z','text','labels','values','orientation','marker.color']
+LAYOUT_PROPERTIES = ['title.text','xaxis.title.text','yaxis.title.text']
+
+def _property(obj, path):
+
+    for part in path.split('.'):
+        if not isinstance(obj, dict) or part not in obj:
+            return None
+        obj = obj[part]
+
+    return obj
+
+# Returns the data of a figure that is compared, as plain json values
+
+def figureData(fig):
+
+    fig = json.loads(pio.to_json(fig, validate=False))
+
+    data = {f'trace {i} {path}': _property(trace, path) for i, trace in enumerate(fig.get('data', [])) for path in TRACE_PROPERTIES}
+    data.update({f'layout {path}': _property(fig.get('layout', {}), path) for path in LAYOUT_PROPERTIES})
+
+    return {name: value for name, value in data.items() if value is not None}
+
+# Returns the first difference between the data of two figures, or None when they are the same
+
+def figureDiff(reference, optimized):
+
+    reference, optimized = figureData(reference), figureData(optimized)
+    for name in sorted(set(reference) | set(optimized)):
+        if reference.get(name) != optimized.get(name):
+            return f'{name} : {str(reference.get(name))[:80]} != {str(optimized.get(name))[:80]}'
+
+    return None
+
+# Returns the first difference between two tables, or None when they are the same
+
+def tableDiff(reference, optimized):
+
+    if list(reference.columns) != list(optimized.columns):
+        return f'columns : {list(reference.columns)} != {list(optimized.columns)}'
+    if not reference.index.equals(optimized.index):
+        return f'index : {reference.index.tolist()[:10]} != {optimized.index.tolist()[:10]}'
+    for column in reference.columns:
+        if reference[column].tolist() != optimized[column].tolist():
+            return f'column {column} : {reference[column].tolist()[:10]} != {optimized[column].tolist()[:10]}'
+
+    return None
+
+# Returns the selections of every tab, or a random sample of at most the given number of them per tab
+
+def selections(data, tabs, sample=None, seed=0):
+
+    choices = {'all-time': [{'nationality': nationality} for nationality in nationalities(data)],
+               'year': [{'year': year} for year in years(data)],
+               'franchise': [{'franchise': franchise} for franchise in franchises(data)],
+               'player': [{'player': player} for player in sorted(data.player_stats['Name'].unique().tolist())]}
+
+    rng = random.Random(seed)
+    for tab in tabs:
+        tab_choices = choices[tab]
+        if sample is not None and len(tab_choices) > sample:
+            tab_choices = rng.sample(tab_choices, sample)
+        for choice in tab_choices:
+            yield tab, choice
+
+# Builds every chart and table of the selections both ways, returning a row per difference and the timings of each side
+# per chart or table, in milliseconds
+
+def checkEquivalence(tabs=TABS, sample=None, seed=0):
+
+    try:
+        reference_tables = readTables()
+        data = viewData(loadTables())
+
+        memoryCache('figures').clear()
+        memoryCache('view_tables').clear()
+
+        keys = []
+        for tab, choice in selections(data, tabs, sample, seed):
+            for view in tabViews(data, tab, **choice):
+                for kind, *block in view:
+                    if kind in ('chart', 'table') and (kind, block[0]) not in keys:
+                        keys.append((kind, block[0]))
+
+        differences, timings = [], defaultdict(lambda: [0, 0.0, 0.0])
+
+        for kind, key in keys:
+            reference_build = (REFERENCE_CHARTS if kind == 'chart' else REFERENCE_TABLES).get(key[0])
+            if reference_build is None:
+                continue
+
+            fast_path = figure_templates.FAST_PATH
+            figure_templates.setFastPath(False)
+            start = time.perf_counter()
+            try:
+                reference = reference_build(reference_tables, *key[1:])
+            except CustomException:
+                reference = None
+            reference_time = time.perf_counter() - start
+            figure_templates.setFastPath(fast_path)
+
+            start = time.perf_counter()
+            try:
+                optimized = viewChart(data, key) if kind == 'chart' else viewTable(data, key)
+            except CustomException:
+                optimized = None
+            optimized_time = time.perf_counter() - start
+
+            if reference is None or optimized is None:
+                diff = None if reference is None and optimized is None else 'only one side could be built'
+            else:
+                diff = figureDiff(reference, optimized) if kind == 'chart' else tableDiff(reference, optimized)
+
+            if diff is not None:
+                differences.append((kind, key[0], key[1:], diff))
+
+            timing = timings[(kind, key[0])]
+            timing[0] += 1
+            timing[1] += reference_time * 1000
+            timing[2] += optimized_time * 1000
+
+        return differences, timings
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Checks that the optimized code paths show exactly what the original app showed')
+    parser.add_argument('--tabs', nargs='+', choices=TABS, default=TABS)
+    parser.add_argument('--sample', type=int, help='number of selections checked per tab, all of them by default')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        differences, timings = checkEquivalence(args.tabs, args.sample, args.seed)
+
+        rows = [(kind, name, checked, round(reference, 1), round(optimized, 1), round(reference / optimized, 1) if optimized else None,
+                 sum(1 for difference in differences if difference[:2] == (kind, name)))
+                for (kind, name), (checked, reference, optimized) in timings.items()]
+        print(pd.DataFrame(rows, columns=['Kind','Name','Checked','Reference (ms)','Optimized (ms)','Speedup','Differences']).to_string(index=False))
+
+        for kind, name, key_args, diff in differences[:20]:
+            print(f'{kind} {name} {list(key_args)} : {diff}')
+
+        print(f'\n{sum(timing[0] for timing in timings.values())} charts and tables checked, {len(differences)} differences')
+        sys.exit(1 if differences else 0)
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
@@ -0,0 +1,149 @@
+# Module exports every chart of a tab for a selection to files, for the match-day reports
+# Usage : python -m src.export --tab franchise --franchise "Mumbai Indians" --format svg [--league IPL]
+# The charts are taken from the views of the tabs, so an export holds exactly what the app shows for the selection.
+# Leaving out the franchise of the year-wise tab exports the charts of every franchise of the year, and leaving out the
+# opponent of the franchise-wise tab exports the comparison with every other franchise.
+# Static images (png, svg, pdf) need kaleido, and are all rendered in a single batch through one renderer session
+# rather than starting one per figure. Html files share a single copy of plotly.js written next to them.
+
+import argparse
+import os
+import re
+import sys
+import time
+from importlib.util import find_spec
+
+import plotly.io as pio
+
+from src.data_loader import DEFAULT_LEAGUE, loadTables
+from src.figure_serialization import compactFigure
+from src.views import *
+from src.exception import CustomException
+from src.logger import logging
+
+IMAGE_FORMATS = ['png','svg','pdf']
+FORMATS = IMAGE_FORMATS + ['html','json']
+
+TABS = ['all-time','year','franchise','player']
+
+# Returns the keys of the charts a list of views holds, in the order they are shown and without duplicates
+
+def chartKeys(views):
+
+    keys = []
+    for view in views:
+        for kind, *block in view:
+            if kind == 'chart' and block[0] not in keys:
+                keys.append(block[0])
+
+    return keys
+
+# Returns the views of a tab for the given selection, expanding a missing franchise or opponent to all of them
+
+def tabViews(data, tab, nationality=None, year=None, franchise=None, opponent=None, player=None, season=None):
+
+    try:
+        if tab == 'all-time':
+            return [allTimeView(data, nationality or 'Indian and Overseas')]
+
+        if tab == 'year':
+            year = year or max(years(data))
+            selected = [franchise] if franchise else yearFranchises(data, year)
+            return [yearView(data, year)] + [yearFranchiseView(data, year, selection) for selection in selected]
+
+        if tab == 'franchise':
+            if not franchise:
+                raise ValueError('The franchise-wise tab needs a --franchise')
+            opponents = [opponent] if opponent else [team for team in franchises(data) if team != franchise]
+            return [franchiseView(data, franchise)] + [headToHeadView(data, franchise, team) for team in opponents]
+
+        if tab == 'player':
+            if not player:
+                raise ValueError('The player-wise tab needs a --player')
+            return [playerView(data, player), similarPlayersView(data, player, season)]
+
+        raise ValueError(f'Unknown tab {tab}, expected one of {", ".join(TABS)}')
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Returns the file name of a chart, made of its name and arguments
+
+def chartFileName(key, file_format):
+
+    name = '_'.join(str(part) for part in key if part is not None)
+    return re.sub(r'[^A-Za-z0-9_.-]+', '-', name) + f'.{file_format}'
+
+# Writes the figures of the given charts into the output directory, returning the paths written along with the keys of
+# the charts that could not be built for the selection, which are left out rather than failing the whole export
+
+def exportCharts(data, keys, file_format, out_dir, scale=1):
+
+    try:
+        if file_format not in FORMATS:
+            raise ValueError(f'Unknown format {file_format}, expected one of {", ".join(FORMATS)}')
+        if file_format in IMAGE_FORMATS and find_spec('kaleido') is None:
+            raise ImportError(f'Exporting to {file_format} needs kaleido, install it with pip install kaleido')
+
+        os.makedirs(out_dir, exist_ok=True)
+
+        figures, paths, failed = [], [], []
+        for key in keys:
+            try:
+                figures.append(viewChart(data, key))
+                paths.append(os.path.join(out_dir, chartFileName(key, file_format)))
+            except CustomException:
+                failed.append(key)
+
+        if file_format in IMAGE_FORMATS:
+
+            # One call renders the whole batch through a single kaleido session
+
+            pio.write_images(figures, paths, format=file_format, scale=scale, validate=False)
+
+        elif file_format == 'html':
+            for fig, path in zip(figures, paths):
+                pio.write_html(compactFigure(fig), path, include_plotlyjs='directory', validate=False)
+
+        else:
+            for fig, path in zip(figures, paths):
+                pio.write_json(compactFigure(fig), path, validate=False)
+
+        return paths, failed
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Exports every chart of a tab for a selection to files')
+    parser.add_argument('--league', default=DEFAULT_LEAGUE)
+    parser.add_argument('--tab', choices=TABS, required=True)
+    parser.add_argument('--nationality')
+    parser.add_argument('--year', type=int)
+    parser.add_argument('--franchise')
+    parser.add_argument('--opponent')
+    parser.add_argument('--player')
+    parser.add_argument('--season', type=int)
+    parser.add_argument('--format', choices=FORMATS, default='png')
+    parser.add_argument('--scale', type=float, default=1)
+    parser.add_argument('--out', default='exports')
+    args = parser.parse_args()
+
+    try:
+        start = time.perf_counter()
+
+        data = viewData(loadTables(league=args.league))
+        views = tabViews(data, args.tab, args.nationality, args.year, args.franchise, args.opponent, args.player, args.season)
+        paths, failed = exportCharts(data, chartKeys(views), args.format, args.out, args.scale)
+
+        logging.info(f'{len(paths)} charts exported to {args.out}')
+        print(f'{len(paths)} charts exported to {args.out} in {time.perf_counter() - start:.1f} s')
+        for key in failed:
+            print(f'Skipped {key[0]} {key[1:]}, it could not be built for this selection')
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
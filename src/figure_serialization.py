@@ -0,0 +1,146 @@
+# Module shrinks the chart figures before they are sent to the browser, and measures their payload size
+# A compact figure renders the same as the original one :
+# - numeric data arrays are stored as numpy arrays of the smallest dtype that holds them (sent as base64 typed arrays
+#   by plotly >= 6), whenever that is smaller than the plain JSON list
+# - floats are rounded to a fixed number of decimals
+# - the trace defaults of the embedded template are pruned to the trace types actually present in the figure
+
+import copy
+import json
+import math
+import os
+import sys
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from src.exception import CustomException
+from src.logger import logging
+
+# Switch for sending compact figures to the browser, can be turned off with the IPL_COMPACT_FIGURES=0 environment variable
+
+COMPACT = os.environ.get('IPL_COMPACT_FIGURES', '1') != '0'
+
+# Number of decimals kept for float data
+
+FLOAT_PRECISION = 4
+
+# Trace properties holding data arrays, only these are ever converted to typed arrays
+
+DATA_ARRAYS = ['x','y','z','text','customdata','base','width']
+MARKER_ARRAYS = ['color','size','opacity']
+
+INT_DTYPES = [np.int8, np.int16, np.int32]
+
+# Converts a numeric array into the smallest numpy array holding it, or returns None when the values are not all numeric
+
+def _typedArray(values, precision):
+
+    if isinstance(values, np.ndarray):
+        if values.dtype.kind not in 'iuf':
+            return None
+        array = values
+    else:
+        if not all(isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, (bool, np.bool_)) for v in values):
+            return None
+        array = np.asarray(values, dtype=float)
+
+    if array.dtype.kind == 'f':
+        if not np.isfinite(array).all():
+            return None
+        array = np.round(array, precision)
+        if not (array == np.round(array)).all():
+            return array.astype(np.float64)
+
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype)
+        if array.min() >= info.min and array.max() <= info.max:
+            return array.astype(dtype)
+
+    return array.astype(np.float64)
+
+# Returns the compact version of a data array, keeping whichever of the typed array and the rounded list is smaller
+
+def _compactArray(values, precision):
+
+    if not isinstance(values, (list, tuple, np.ndarray)) or len(values) == 0:
+        return values
+
+    array = _typedArray(values, precision)
+    if array is None:
+        return values
+
+    as_list = array.tolist()
+    typed_size = math.ceil(array.nbytes / 3) * 4 + 30
+    list_size = len(json.dumps(as_list))
+
+    return array if typed_size < list_size else as_list
+
+# Compacts the data arrays of a single trace dictionary, in place
+
+def _compactTrace(trace, precision):
+
+    for prop in DATA_ARRAYS:
+        if prop in trace:
+            trace[prop] = _compactArray(trace[prop], precision)
+
+    marker = trace.get('marker')
+    if isinstance(marker, dict):
+        for prop in MARKER_ARRAYS:
+            if prop in marker:
+                marker[prop] = _compactArray(marker[prop], precision)
+
+# Returns a compact copy of the figure, which renders the same as the original one
+
+def compactFigure(fig, precision=FLOAT_PRECISION):
+
+    try:
+        fig_dict = copy.deepcopy(fig.to_dict())
+
+        for trace in fig_dict.get('data', []):
+            _compactTrace(trace, precision)
+
+        template = fig_dict.get('layout', {}).get('template')
+        if template and 'data' in template:
+            trace_types = {trace.get('type','scatter') for trace in fig_dict.get('data', [])}
+            template['data'] = {trace_type: defaults for trace_type, defaults in template['data'].items() if trace_type in trace_types}
+
+        return go.Figure(fig_dict, _validate=False)
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Returns the size in bytes of the JSON payload of a figure, as sent to the browser
+
+def figurePayload(fig):
+
+    return len(pio.to_json(fig, validate=False).encode('utf-8'))
+
+# Returns the payload size of every figure, before and after compaction
+
+def payloadReport(figures):
+
+    rows = []
+    for name, fig in figures:
+        original = figurePayload(fig)
+        compact = figurePayload(compactFigure(fig))
+        rows.append({'Chart':name, 'Original (bytes)':original, 'Compact (bytes)':compact, 'Saved (%)':round((1 - compact/original)*100, 1)})
+
+    return rows
+
+# Returns the figure as it is sent to the browser, compacted unless turned off
+
+def browserFigure(fig):
+
+    return compactFigure(fig) if COMPACT else fig
+
+# Displays a chart in the streamlit app, or in the given container (e.g. a placeholder), compacting it first unless
+# turned off or the figure is already prepared for the browser
+
+def plotlyChart(fig, container=None, prepared=False, **kwargs):
+
+    import streamlit as st
+
+    (container or st).plotly_chart(fig if prepared else browserFigure(fig), **kwargs)
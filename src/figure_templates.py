@@ -0,0 +1,85 @@
+# Module builds the chart figures from templates
+# A template is the figure of a chart with all its layout and styling but without any data. It is built once per chart,
+# through the regular (validated) plotly calls, and every figure after that is a copy of it with only the data swapped in.
+# Only the swapped values are validated, which skips most of the work done by make_subplots, add_trace and update_*
+
+import copy
+import os
+import sys
+
+import plotly.graph_objects as go
+from plotly.validator_cache import ValidatorCache
+
+from src.cache import memoryCache
+from src.exception import CustomException
+from src.logger import logging
+
+# Switch between the template fast path and building every figure through the regular plotly calls
+# Can be turned off with the IPL_FIGURE_TEMPLATES=0 environment variable
+
+FAST_PATH = os.environ.get('IPL_FIGURE_TEMPLATES', '1') != '0'
+
+
+def setFastPath(enabled):
+
+    global FAST_PATH
+    FAST_PATH = enabled
+
+# Returns the template for a chart as a figure dictionary, building it on first use
+
+def figureTemplate(name, build):
+
+    def buildTemplate():
+        template = build().to_dict()
+        logging.info(f'Figure template built for {name}')
+        return template
+
+    return memoryCache('figure_templates').getOrCompute(name, buildTemplate)
+
+# Validates a single value, the same way plotly does when the property is set on the figure
+# path is the dotted path of the property within its parent, e.g. ('bar', 'marker.color') or ('layout', 'title.text')
+
+def _coerce(parent, path, value):
+
+    *parents, prop = path.split('.')
+    return ValidatorCache.get_validator('.'.join([parent] + parents), prop).validate_coerce(value)
+
+# Sets a value at a dotted path within a (nested) figure dictionary
+
+def _setPath(d, path, value):
+
+    *parents, prop = path.split('.')
+    for key in parents:
+        d = d.setdefault(key, {})
+    d[prop] = value
+
+# Builds the figure of a chart from its template
+# traces holds one dictionary per trace of the template, mapping dotted property paths to the values to swap in,
+# and layout maps dotted layout property paths to their values, e.g. {'title.text':title_text}
+
+def figureFromTemplate(name, build, traces, layout=None):
+
+    try:
+        layout = layout or {}
+
+        if not FAST_PATH:
+            fig = build()
+            for trace, values in zip(fig.data, traces):
+                trace.update(**{path.replace('.','_'): value for path, value in values.items()})
+            fig.update_layout(**{path.replace('.','_'): value for path, value in layout.items()})
+            return fig
+
+        fig_dict = copy.deepcopy(figureTemplate(name, build))
+
+        for trace, values in zip(fig_dict['data'], traces):
+            for path, value in values.items():
+                _setPath(trace, path, _coerce(trace['type'], path, value))
+
+        for path, value in layout.items():
+            _setPath(fig_dict['layout'], path, _coerce('layout', path, value))
+
+        return go.Figure(fig_dict, _validate=False)
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
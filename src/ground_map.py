@@ -0,0 +1,171 @@
+# Module builds the map of the grounds shown under the all-time analysis tab
+# The map html is built once per version of the data and cached, in memory and on disk, so that a rerun only serves it.
+# The marker popups are not inlined as html elements of their own, they are shipped once as a json block and turned into
+# a popup the first time their marker is clicked
+
+import json
+import os
+import re
+import sys
+
+import folium
+import numpy as np
+import pandas as pd
+from branca.element import MacroElement
+from folium.plugins import MarkerCluster
+from jinja2 import Template
+
+from src.cache import artifactPath, dataVersion, memoryCache
+from src.components.all_time_analysis import groundPopup
+from src.exception import CustomException
+from src.logger import logging
+
+CENTROID = (21.1458,79.0882)
+
+# Computes the statistics shown in the popup of every ground, in one pass over the matches
+# Rows are in the same order as ground_data
+
+def groundStats(ground_data, matches):
+
+    try:
+        avg_innings_score = matches[['GroundName','Runs1']][matches['Runs1'] > 0].groupby('GroundName')['Runs1'].mean().round(0).astype(int)
+
+        # Labelling winners batting first and second, and the matches with no result
+
+        winner_batting = pd.Series(np.where(matches['FirstBattingTeamName'] == matches['Winner'],
+                                            'First',
+                                            np.where(matches['SecondBattingTeamName'] == matches['Winner'],
+                                                    'Second',
+                                                    'No Result')),
+                                   index=matches.index)
+
+        results = matches['Winner'].groupby([matches['GroundName'], winner_batting]).count().unstack(fill_value=0)
+
+        matches_held = matches.groupby('GroundName')['MatchRow'].count()
+
+        # Getting all the teams with the most wins in each ground
+
+        most_wins = {}
+        for ground_name, ground_matches in matches.groupby('GroundName', sort=False):
+            wins = ground_matches['Winner'].value_counts()
+            most_wins[ground_name] = (', '.join(wins.index[wins == wins.max()].tolist()), wins.max())
+
+        stats = ground_data[['GroundName','City','Latitude','Longitude']].copy()
+        stats['MatchesHeld'] = stats['GroundName'].map(matches_held)
+        stats['MostWinsTeam'] = stats['GroundName'].map(lambda ground_name: most_wins.get(ground_name, ('', 0))[0])
+        stats['MostWins'] = stats['GroundName'].map(lambda ground_name: most_wins.get(ground_name, ('', 0))[1])
+        stats['AvgFirstInnings'] = stats['GroundName'].map(avg_innings_score)
+
+        for column, label in [('WinsBattingFirst','First'), ('WinsBattingSecond','Second'), ('NoResult','No Result')]:
+            counts = results[label] if label in results.columns else pd.Series(dtype=int)
+            stats[column] = stats['GroundName'].map(counts).fillna(0).astype(int)
+
+        return stats.reset_index(drop=True)
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Generates the popup html of every ground, from their statistics when already computed
+
+def groundPopups(ground_data, matches, stats=None):
+
+    stats = groundStats(ground_data, matches) if stats is None else stats
+
+    return [groundPopup(row.GroundName, row.City, row.MatchesHeld, row.MostWinsTeam, row.MostWins, row.AvgFirstInnings,
+                        row.WinsBattingFirst, row.WinsBattingSecond, row.NoResult) for row in stats.itertuples()]
+
+# Map element adding the ground markers, with their popups bound lazily from a single json block
+
+class LazyPopupMarkers(MacroElement):
+
+    _template = Template(u"""
+        {% macro html(this, kwargs) %}
+            <script type="application/json" id="{{ this.get_name() }}">{{ this.popups }}</script>
+        {% endmacro %}
+
+        {% macro script(this, kwargs) %}
+            (function() {
+                var popups = null;
+                var locations = {{ this.locations }};
+
+                locations.forEach(function(location, i) {
+                    var marker = L.marker(location).addTo({{ this.layer }});
+                    marker.on('click', function() {
+                        if (marker.getPopup()) {
+                            return;
+                        }
+                        if (popups === null) {
+                            popups = JSON.parse(document.getElementById('{{ this.get_name() }}').textContent);
+                        }
+                        marker.bindPopup(popups[i], {maxWidth: {{ this.max_width }}}).openPopup();
+                    });
+                });
+            })();
+        {% endmacro %}
+        """)
+
+    def __init__(self, locations, popups, layer, max_width=800):
+        super().__init__()
+        self._name = 'LazyPopupMarkers'
+        self.locations = json.dumps(locations)
+        self.popups = json.dumps([re.sub(r'\s+', ' ', popup).strip() for popup in popups]).replace('</', '<\\/')
+        self.layer = layer
+        self.max_width = max_width
+
+# Builds the folium map of the grounds, grouping the markers into clusters if asked to
+
+def buildGroundMap(ground_data, matches, cluster=False, stats=None):
+
+    try:
+        m = folium.Map(location=CENTROID,zoom_start=6)
+
+        if cluster:
+            layer = MarkerCluster().add_to(m).get_name()
+        else:
+            layer = m.get_name()
+
+        locations = ground_data[['Latitude','Longitude']].values.tolist()
+        m.add_child(LazyPopupMarkers(locations, groundPopups(ground_data, matches, stats), layer))
+
+        return m
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Returns the html of the ground map, built once per version of the data and cached in memory and on disk
+# The version of the data is hashed from the tables unless given, as the views give the version they already hold
+
+def groundMapHtml(ground_data, matches, cluster=False, stats=None, version=None):
+
+    try:
+        version = version or dataVersion(ground_data, matches)
+        cache = memoryCache('ground_map')
+
+        html = cache.get((version, cluster))
+        if html is not None:
+            return html
+
+        path = artifactPath('ground_map', f'{version}_cluster.html' if cluster else f'{version}.html')
+
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                html = f.read()
+        else:
+            html = buildGroundMap(ground_data, matches, cluster, stats).get_root().render()
+
+            temp_path = f'{path}.{os.getpid()}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(html)
+            os.replace(temp_path, path)
+
+            logging.info(f'Ground map built for data version {version}')
+
+        cache.set((version, cluster), html)
+
+        return html
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
@@ -0,0 +1,134 @@
+# Module reports the memory held by the app : the tables it loads and every shared cache (derived aggregates, indexes,
+# figure templates, ground map ...), and enforces the memory budget of the caches
+# Usage : python -m src.memory [--warm] [--budget MB]
+
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+from src import cache
+from src.cache import deepSize, memoryCaches
+from src.exception import CustomException
+from src.logger import logging
+from src.views import leagueData
+
+# Switch for showing the memory report in the sidebar of the app, turned on with the IPL_DIAGNOSTICS=1 environment variable
+
+DIAGNOSTICS = os.environ.get('IPL_DIAGNOSTICS', '0') == '1'
+
+# Returns the resident set size of the process in KB, from /proc (Linux only), None elsewhere
+
+def residentSize():
+
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+# Returns the memory held by every table and every cache, as a list of rows
+# Objects shared between them (e.g. the tables held by a repository) are only counted for the first row holding them
+
+def memoryReport(tables):
+
+    try:
+        seen = set()
+
+        rows = []
+        for name, table in tables.items():
+            rows.append({'Kind':'Table', 'Name':name, 'Entries':table.shape[0], 'Size (KB)':round(deepSize(table, seen)/1024, 1), 'Evictions':0,
+                         'Coalesced':0})
+
+        for memory_cache in sorted(memoryCaches(), key=lambda memory_cache: memory_cache.name):
+            size = sum(deepSize(key, seen) + deepSize(value, seen) for key, value in memory_cache.items())
+            rows.append({'Kind':'Cache', 'Name':memory_cache.name, 'Entries':len(memory_cache),
+                         'Size (KB)':round(size/1024, 1), 'Evictions':memory_cache.evictions, 'Coalesced':memory_cache.coalesced})
+
+        return rows
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Returns the memory report as a dataframe, with a row for the total and the budget of the caches
+
+def memoryReportTable(tables):
+
+    report = pd.DataFrame(memoryReport(tables), columns=['Kind','Name','Entries','Size (KB)','Evictions','Coalesced'])
+
+    caches = report[report['Kind'] == 'Cache']['Size (KB)'].sum()
+    total = report['Size (KB)'].sum()
+    budget = f'budget {cache.BUDGET_MB * 1024:.0f} KB' if cache.BUDGET_MB > 0 else 'no budget'
+
+    summary = pd.DataFrame([{'Kind':'Total', 'Name':f'caches {caches:.1f} KB, {budget}', 'Entries':'',
+                             'Size (KB)':round(total, 1), 'Evictions':report['Evictions'].sum(), 'Coalesced':report['Coalesced'].sum()}])
+
+    return pd.concat([report, summary], ignore_index=True)
+
+# Fills the caches the way a day of traffic would, opening every tab of the app on its first selection through the views
+# the app renders, so the view data, pipeline, views, figures and tables caches are filled as they are in the app
+
+def warmCaches(league=None):
+
+    from src.player_search import playerSearchIndex
+    from src.views import (allTimeView, franchiseView, franchises, headToHeadView, nationalities, playerView,
+                           similarPlayersView, viewChart, viewHtml, viewTable, yearFranchises, yearFranchiseView, yearView,
+                           years)
+
+    try:
+        data = leagueData(league)
+        player = playerSearchIndex(data.player_stats).names[0]
+        franchise1, franchise2 = franchises(data)[:2]
+
+        pages = [(data, allTimeView(data, nationality)) for nationality in nationalities(data)]
+
+        # The year-wise tab only loads the selected season
+
+        year = years(data)[0]
+        season = leagueData(league, year)
+        pages += [(season, yearView(season, year)), (season, yearFranchiseView(season, year, yearFranchises(season, year)[0]))]
+
+        pages += [(data, franchiseView(data, franchise1)), (data, headToHeadView(data, franchise1, franchise2)),
+                  (data, playerView(data, player)), (data, similarPlayersView(data, player))]
+
+        for page_data, view in pages:
+            for kind, *block in view:
+                if kind == 'chart':
+                    viewChart(page_data, block[0])
+                elif kind == 'table':
+                    viewTable(page_data, block[0])
+                elif kind == 'html':
+                    viewHtml(page_data, block[0])
+
+        return data
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Reports the memory held by the tables and the caches of the app')
+    parser.add_argument('--warm', action='store_true', help='fill the caches before reporting')
+    parser.add_argument('--budget', type=float, help='memory budget of the caches in MB')
+    args = parser.parse_args()
+
+    try:
+        if args.budget is not None:
+            cache.setBudget(args.budget)
+
+        data = warmCaches() if args.warm else leagueData()
+
+        print(memoryReportTable(data.tables).to_string(index=False))
+
+        rss = residentSize()
+        if rss is not None:
+            print(f'\nResident set size of the process : {rss/1024:.1f} MB')
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
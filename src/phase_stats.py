@@ -0,0 +1,157 @@
+# Module holds the statistics of the players and teams split by phase of the innings : the powerplay (overs 1 to 6), the
+# middle overs (7 to 15) and the death overs (16 to 20), as derived from a ball-by-ball feed by src.ball_ingest
+# The splits hold three rows per player season and per team season, so they are computed once when a feed is ingested
+# and stored as compact arrays : the names of the players and teams are dictionary encoded into integer codes, and every
+# statistic is a numpy array of the smallest integer type holding it, all saved in a single npz file next to the data
+# files of the league. The tabs only show the phase charts of a league which has the file.
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from src.cache import memoryCache
+from src.data_loader import leagueDir
+from src.exception import CustomException
+from src.logger import logging
+
+PHASES = ['Powerplay', 'Middle Overs', 'Death Overs']
+
+PHASE_COLORS = ['#2FF3E0', '#F8D210', '#FA26A0']
+
+# First over of every phase
+
+PHASE_OVERS = np.array([1, 7, 16])
+
+PHASE_FILE = 'phase_stats.npz'
+
+# Returns the phase of every over, as its position in PHASES
+
+def overPhase(overs):
+
+    return (np.searchsorted(PHASE_OVERS, np.asarray(overs), side='right') - 1).clip(0).astype(np.int8)
+
+# Table held as one array per column, the text columns being encoded as integer codes into their labels
+
+class PhaseTable:
+
+    def __init__(self, columns, labels):
+        self.columns = columns
+        self.labels = labels
+        self._codes = {name: {label: code for code, label in enumerate(values)} for name, values in labels.items()}
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    @property
+    def nbytes(self):
+        return sum(values.nbytes for values in self.columns.values()) + sum(values.nbytes for values in self.labels.values())
+
+    # Builds the table from a dataframe
+
+    @classmethod
+    def fromFrame(cls, frame):
+        columns, labels = {}, {}
+        for name in frame.columns:
+            if frame[name].dtype == object:
+                codes, uniques = pd.factorize(frame[name])
+                columns[name] = pd.to_numeric(pd.Series(codes), downcast='integer').to_numpy()
+                labels[name] = np.asarray(uniques, dtype=str)
+            else:
+                columns[name] = pd.to_numeric(frame[name].astype('int64'), downcast='integer').to_numpy()
+        return cls(columns, labels)
+
+    # Returns the rows matching every given column value as a dataframe, e.g. rows(Year=2023, TeamName='Mumbai Indians')
+    # The statistics of the rows are widened back to 64 bits, so that computing with them does not overflow
+
+    def rows(self, **filters):
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in filters.items():
+            if name in self.labels:
+                code = self._codes[name].get(value)
+                if code is None:
+                    mask[:] = False
+                    continue
+                value = code
+            mask &= self.columns[name] == value
+
+        return pd.DataFrame({name: self.labels[name][values[mask]].astype(object) if name in self.labels else values[mask].astype(np.int64)
+                             for name, values in self.columns.items()})
+
+    # Arrays of the table, keyed by their name in the npz file
+
+    def arrays(self, prefix):
+        arrays = {f'{prefix}.{name}': values for name, values in self.columns.items()}
+        arrays.update({f'{prefix}.{name}.labels': values for name, values in self.labels.items()})
+        return arrays
+
+    @classmethod
+    def fromArrays(cls, arrays, prefix):
+        names = [key[len(prefix) + 1:] for key in arrays.files if key.startswith(f'{prefix}.') and not key.endswith('.labels')]
+        return cls({name: arrays[f'{prefix}.{name}'] for name in names},
+                   {name: arrays[f'{prefix}.{name}.labels'] for name in names if f'{prefix}.{name}.labels' in arrays.files})
+
+# Saves the phase tables of the players and of the teams into an npz file
+
+def savePhaseStats(path, phases):
+
+    arrays = {}
+    for name, table in phases.items():
+        arrays.update(table.arrays(name))
+
+    np.savez(f'{path}.{os.getpid()}.tmp.npz', **arrays)
+    os.replace(f'{path}.{os.getpid()}.tmp.npz', path)
+
+def phaseStatsPath(league=None):
+
+    return os.path.join(leagueDir(league), PHASE_FILE)
+
+# Returns the phase tables of the players and of the teams of a league, or None when the league has no phase file
+# The tables are read once per version of the file and shared by all the sessions
+
+def loadPhaseStats(league=None):
+
+    try:
+        path = phaseStatsPath(league)
+        if not os.path.exists(path):
+            return None
+
+        def read():
+            with np.load(path, allow_pickle=False) as arrays:
+                return {name: PhaseTable.fromArrays(arrays, name) for name in ['players', 'teams']}
+
+        return memoryCache('tables').getOrCompute(('phases', path, os.path.getmtime(path)), read)
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Adds the rates of every phase row : strike rate and run rate of the batting, economy of the bowling
+
+def phaseRates(rows):
+
+    rows = rows.copy()
+    rows['Phase'] = np.asarray(PHASES)[rows['Phase']]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rows['StrikeRate'] = np.where(rows['Balls'] > 0, np.round(rows['Runs'] * 100 / rows['Balls'], 2), np.nan)
+        rows['RunRate'] = np.where(rows['Balls'] > 0, np.round(rows['Runs'] * 6 / rows['Balls'], 2), np.nan)
+        rows['Economy'] = np.where(rows['BallsBowled'] > 0, np.round(rows['RunsConceded'] * 6 / rows['BallsBowled'], 2), np.nan)
+
+    return rows
+
+# Returns the phase splits of every team of a season, with their rates
+
+def teamPhases(phases, year):
+
+    return phaseRates(phases['teams'].rows(Year=year))
+
+# Returns the phase splits of every season of a player, with their rates, adding up the teams of a season played for
+# several teams
+
+def playerPhases(phases, player):
+
+    rows = phases['players'].rows(Name=player)
+    rows = rows.drop(columns=['TeamName','Name']).groupby(['Year','Phase'], as_index=False).sum()
+
+    return phaseRates(rows)
@@ -0,0 +1,260 @@
+# Module builds the derived tables the charts are drawn from, as a pipeline of named nodes
+# Usage : python -m src.pipeline [--rebuild]
+# Every node declares the tables or nodes it is built from. The output of a node is persisted under the artifacts
+# directory, keyed by a hash of its code and of the content of its inputs, so a node is only recomputed when its code or
+# one of its inputs changed. The key of a node is made of the content hash of the outputs of the nodes it depends on,
+# rather than of their keys, so a node whose inputs were recomputed to the same content is not recomputed either.
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+
+from src.cache import artifactPath, dataVersion, memoryCache
+from src.data_loader import loadTables
+from src.ground_map import groundStats
+from src.toss_chase import tossChaseCube
+from src.exception import CustomException
+from src.logger import logging
+
+# Switch for the pipeline, turned off with the IPL_PIPELINE=0 environment variable
+# When off, the nodes are computed from the tables whenever asked for, and nothing is persisted
+
+PIPELINE = os.environ.get('IPL_PIPELINE', '1') != '0'
+
+# Number of keys whose outputs are kept on disk for every node, set with the IPL_PIPELINE_KEEP environment variable
+# Several sets of tables (every league, and every season of a league) share the directory of a node, so the outputs of
+# the other keys are not stale : only the least recently used ones past this number are removed
+
+PIPELINE_KEEP = int(os.environ.get('IPL_PIPELINE_KEEP', '64'))
+
+# Node of the pipeline : a derived table, the names of the tables or nodes it is built from, and the function building
+# it from them, in the same order
+
+class Node:
+
+    def __init__(self, inputs, build):
+        self.inputs = inputs
+        self.build = build
+        self.code = hashlib.sha1(inspect.getsource(build).encode()).hexdigest()[:16]
+
+# Derived tables
+
+# Career totals of every player, by name and nationality
+
+def careerTotals(player_stats):
+
+    return player_stats[['Name','Nationality','TotalRuns','Wickets']].groupby(['Name','Nationality'], dropna=False).sum().reset_index()
+
+# Totals of every player for every franchise they played for
+
+def franchiseTotals(player_stats):
+
+    return player_stats[['TeamName','Name','TotalRuns','Wickets']].groupby(['TeamName','Name'], dropna=False).sum().reset_index()
+
+# Landmarks and boundaries of every season, by nationality
+
+def seasonTotals(player_stats):
+
+    columns = ['FiftyPlusRuns','Centuries','FourWickets','FiveWickets','Fours','Sixes']
+    return player_stats[['Year','Nationality'] + columns].groupby(['Year','Nationality'], dropna=False).sum().reset_index()
+
+# Outcomes of the matches between every pair of franchises, in the order the outcomes of the matches of the pair are
+# counted (most frequent first), the pair being sorted by name
+
+def headToHeadCounts(matches):
+
+    teams = matches[['FirstBattingTeamName','SecondBattingTeamName']]
+    pairs = pd.DataFrame({'Team1': teams.min(axis=1), 'Team2': teams.max(axis=1), 'Winner': matches['Winner']})
+
+    counts = []
+    for (team1, team2), pair_matches in pairs.groupby(['Team1','Team2'], sort=True):
+        wins = pair_matches['Winner'].value_counts()
+        counts.append(pd.DataFrame({'Team1': team1, 'Team2': team2, 'Winner': wins.index, 'Wins': wins.values}))
+
+    return pd.concat(counts, ignore_index=True)
+
+NODES = {
+    'careerTotals': Node(['player_stats'], careerTotals),
+    'franchiseTotals': Node(['player_stats'], franchiseTotals),
+    'seasonTotals': Node(['player_stats'], seasonTotals),
+    'groundStats': Node(['ground_data','matches'], groundStats),
+    'headToHeadCounts': Node(['matches'], headToHeadCounts),
+    'tossChaseCube': Node(['matches','ground_data'], tossChaseCube)
+}
+
+# Returns the path of a file of a node within the pipeline directory
+
+def nodePath(name, file_name):
+
+    return artifactPath('pipeline', name, file_name)
+
+# Removes the outputs of the keys of a node directory least recently used, keeping the given number of keys
+# The last use of a key is the latest modification time of its files, as the output is touched whenever it is read
+
+def collectOutputs(directory, keep):
+
+    last_use = {}
+    for file_name in os.listdir(directory):
+        if file_name.endswith('.tmp'):
+            continue
+        try:
+            modified = os.path.getmtime(os.path.join(directory, file_name))
+        except OSError:
+            continue
+        key = file_name.split('.')[0]
+        last_use[key] = max(last_use.get(key, 0), modified)
+
+    for key in sorted(last_use, key=last_use.get, reverse=True)[keep:]:
+        for extension in ['pkl', 'json']:
+            try:
+                os.remove(os.path.join(directory, f'{key}.{extension}'))
+            except OSError:
+                pass
+
+# Derived tables of a set of tables, each one built on first use, or read back from disk when built before
+
+class Pipeline:
+
+    def __init__(self, tables, enabled=None):
+        self.tables = tables
+        self.enabled = PIPELINE if enabled is None else enabled
+        self.built = []
+        self._hashes = {}
+        self._lock = threading.RLock()
+
+    # Content hash of a table or of the output of a node
+
+    def hash(self, name):
+        with self._lock:
+            if name in self._hashes:
+                return self._hashes[name]
+
+        content_hash = dataVersion(self.tables[name]) if name in self.tables else self._manifest(name)['hash']
+        with self._lock:
+            self._hashes[name] = content_hash
+
+        return content_hash
+
+    # Key of a node, made of its name, its code and the content of its inputs
+
+    def key(self, name):
+        node = NODES[name]
+        digest = hashlib.sha1(f'{name}:{node.code}'.encode())
+        for input_name in node.inputs:
+            digest.update(f'{input_name}:{self.hash(input_name)}'.encode())
+
+        return digest.hexdigest()[:16]
+
+    # Returns the output of a table or node
+
+    def node(self, name):
+
+        try:
+            if name in self.tables:
+                return self.tables[name]
+
+            if not self.enabled:
+                node = NODES[name]
+                return node.build(*[self.node(input_name) for input_name in node.inputs])
+
+            key = self.key(name)
+            return memoryCache('pipeline').getOrCompute((name, key), lambda: self._load(name, key))
+
+        except Exception as e:
+            logging.error(CustomException(e,sys))
+            raise CustomException(e,sys)
+
+    # Reads the manifest of the current output of a node, building the node first if it is missing
+    # The files of a node may be removed by another process at any time, a missing file is built again
+
+    def _manifest(self, name):
+        key = self.key(name)
+        path = nodePath(name, f'{key}.json')
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return self._build(name, key, with_manifest=True)[1]
+
+    # Reads the output of a node back from disk, building it again if its file is missing
+
+    def _load(self, name, key):
+        path = nodePath(name, f'{key}.pkl')
+        try:
+            output = pd.read_pickle(path)
+        except FileNotFoundError:
+            return self._build(name, key)
+
+        # The modification time of the output is its last use, which the collection of the outputs goes by
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return output
+
+    # Builds a node and persists its output along with its manifest, then removes the outputs of the keys least recently
+    # used past PIPELINE_KEEP. The output is written before the manifest, so a manifest on disk always has its output next to it
+
+    def _build(self, name, key, with_manifest=False):
+        node = NODES[name]
+        start = time.perf_counter()
+        output = node.build(*[self.node(input_name) for input_name in node.inputs])
+
+        manifest = {'hash': dataVersion(output), 'code': node.code,
+                    'inputs': {input_name: self.hash(input_name) for input_name in node.inputs},
+                    'seconds': round(time.perf_counter() - start, 3)}
+
+        path = nodePath(name, f'{key}.pkl')
+        output.to_pickle(f'{path}.{os.getpid()}.tmp')
+        os.replace(f'{path}.{os.getpid()}.tmp', path)
+
+        path = nodePath(name, f'{key}.json')
+        with open(f'{path}.{os.getpid()}.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(f'{path}.{os.getpid()}.tmp', path)
+
+        collectOutputs(os.path.dirname(path), PIPELINE_KEEP)
+
+        with self._lock:
+            self._hashes[name] = manifest['hash']
+            self.built.append(name)
+        logging.info(f'Pipeline : {name} built in {manifest["seconds"]} s')
+
+        return (output, manifest) if with_manifest else output
+
+    # Builds every node missing from disk, or every node when asked to rebuild, returning the names of the nodes built
+
+    def buildAll(self, rebuild=False):
+        for name in NODES:
+            if rebuild:
+                self._build(name, self.key(name))
+            else:
+                self.hash(name)
+        return list(self.built)
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Builds the derived tables of the pipeline missing from disk')
+    parser.add_argument('--rebuild', action='store_true', help='rebuild every node, even those already on disk')
+    args = parser.parse_args()
+
+    try:
+        pipeline = Pipeline(loadTables(), enabled=True)
+        pipeline.buildAll(args.rebuild)
+
+        for name in NODES:
+            status = 'built' if name in pipeline.built else 'up to date'
+            print(f'{name:<20} {pipeline.key(name)}  {status}')
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
@@ -0,0 +1,217 @@
+# Module builds a search index over the player names, used by the player selector and for programmatic lookups
+
+import re
+import sys
+import unicodedata
+from collections import defaultdict
+
+from src.cache import memoryCache
+from src.exception import CustomException
+from src.logger import logging
+
+# Scores assigned to the different kinds of matches, exact matches always rank first
+
+EXACT_SCORE = 100.0
+TOKEN_SCORE = 60.0
+TRIGRAM_SCORE = 40.0
+
+# Maximum number of fuzzy (trigram) candidates that are scored for a single query
+
+MAX_TRIGRAM_CANDIDATES = 50
+
+# Converts a name into a lowercase, accent free string with only letters, digits and single spaces
+# e.g. 'K.S Bharat' -> 'k s bharat', 'Muñoz' -> 'munoz'
+
+def normalizeName(name):
+
+    name = unicodedata.normalize('NFKD', str(name))
+    name = ''.join(c for c in name if not unicodedata.combining(c))
+    name = re.sub(r'[^0-9a-z]+', ' ', name.lower())
+
+    return name.strip()
+
+# Generates the set of trigrams of a normalized name, padded so that short names and word starts are represented
+
+def nameTrigrams(text):
+
+    padded = f'  {text} '
+    return {padded[i:i+3] for i in range(len(padded) - 2)}
+
+# Checks whether a query token is the initials of consecutive tokens starting at a position
+# e.g. 'ms' matches ['mahendra','singh'] in ['mahendra','singh','dhoni']
+
+def _matchesInitials(token, tokens, start):
+
+    if len(token) < 2 or not token.isalpha() or start + len(token) > len(tokens):
+        return False
+
+    return all(tokens[start + i][0] == token[i] for i in range(len(token)))
+
+# Aligns the query tokens against the name tokens, in order, and returns the fraction of query tokens matched
+# A query token matches a name token it prefixes, or a run of name tokens it is the initials of (and vice versa)
+
+def _alignTokens(query_tokens, name_tokens):
+
+    matched = 0
+    q, n = 0, 0
+
+    while q < len(query_tokens) and n < len(name_tokens):
+        query_token = query_tokens[q]
+        name_token = name_tokens[n]
+
+        if name_token.startswith(query_token):
+            matched += 1
+            q += 1
+            n += 1
+        elif _matchesInitials(query_token, name_tokens, n):
+            matched += 1
+            q += 1
+            n += len(query_token)
+        elif _matchesInitials(name_token, query_tokens, q):
+            matched += len(name_token)
+            q += len(name_token)
+            n += 1
+        else:
+            n += 1
+
+    return matched / len(query_tokens)
+
+# Prebuilt search index over the player names
+# The names are normalized once, and a prefix trie, a token/initials lookup and a trigram index are built over them,
+# so that every query only scores a handful of candidates instead of the whole list
+
+class PlayerSearchIndex:
+
+    def __init__(self, names):
+
+        try:
+            # Names differing only in case (e.g. 'Faf du Plessis' and 'Faf Du Plessis') are ordered by the name itself,
+            # so the selector lists them in the same order in every process
+
+            self.names = sorted(set(names), key=lambda name: (name.lower(), name))
+
+            self._normalized = [normalizeName(name) for name in self.names]
+            self._tokens = [normalized.split() for normalized in self._normalized]
+            self._trigrams = [nameTrigrams(normalized) for normalized in self._normalized]
+
+            self._exact = defaultdict(list)
+            self._trie = {}
+            self._initials = defaultdict(set)
+            self._trigram_index = defaultdict(list)
+
+            for i, tokens in enumerate(self._tokens):
+
+                self._exact[self._normalized[i]].append(i)
+                self._exact[''.join(tokens)].append(i)
+
+                for token in tokens:
+                    node = self._trie
+                    for char in token:
+                        node = node.setdefault(char, {})
+                        node.setdefault('', set()).add(i)
+
+                # Initials of every run of two or more consecutive tokens, e.g. 'msd' and 'ms' for 'Mahendra Singh Dhoni'
+
+                for start in range(len(tokens)):
+                    for end in range(start + 2, len(tokens) + 1):
+                        self._initials[''.join(token[0] for token in tokens[start:end])].add(i)
+
+                for trigram in self._trigrams[i]:
+                    self._trigram_index[trigram].append(i)
+
+            logging.info(f'Player search index built for {len(self.names)} players')
+
+        except Exception as e:
+            logging.error(CustomException(e,sys))
+            raise CustomException(e,sys)
+
+    def __len__(self):
+        return len(self.names)
+
+    # Returns the ids of the names having a token that starts with the given prefix
+
+    def _prefixMatches(self, prefix):
+
+        node = self._trie
+        for char in prefix:
+            if char not in node:
+                return set()
+            node = node[char]
+
+        return node.get('', set())
+
+    # Returns the ids of the names sharing the most trigrams with the query
+
+    def _trigramMatches(self, query_trigrams):
+
+        counts = defaultdict(int)
+        for trigram in query_trigrams:
+            for i in self._trigram_index.get(trigram, ()):
+                counts[i] += 1
+
+        return sorted(counts, key=counts.get, reverse=True)[:MAX_TRIGRAM_CANDIDATES]
+
+    # Returns the names matching the query, ranked from the best to the worst match
+
+    def query(self, text, limit=10):
+
+        try:
+            normalized = normalizeName(text)
+            if not normalized:
+                return self.names[:limit]
+
+            query_tokens = normalized.split()
+            query_trigrams = nameTrigrams(normalized)
+
+            candidates = set(self._exact.get(normalized, ()))
+
+            # Single letters in a multi word query (e.g. 'k s bharat') would match most of the names as prefixes,
+            # those are left to the initials lookup below
+
+            for token in query_tokens:
+                if len(token) > 1 or len(query_tokens) == 1:
+                    candidates |= self._prefixMatches(token)
+                candidates |= self._initials.get(token, set())
+
+            # Short tokens in the names (e.g. 'ms' in 'MS Dhoni') are matched against the initials of the query
+
+            for start in range(len(query_tokens)):
+                for end in range(start + 2, len(query_tokens) + 1):
+                    initials = ''.join(token[0] for token in query_tokens[start:end])
+                    candidates |= self._prefixMatches(initials)
+
+            candidates.update(self._trigramMatches(query_trigrams))
+
+            scores = []
+            for i in candidates:
+                if self._normalized[i] == normalized or ''.join(self._tokens[i]) == ''.join(query_tokens):
+                    score = EXACT_SCORE
+                else:
+                    similarity = len(query_trigrams & self._trigrams[i]) / len(query_trigrams | self._trigrams[i])
+                    score = TOKEN_SCORE * _alignTokens(query_tokens, self._tokens[i]) + TRIGRAM_SCORE * similarity
+
+                if score > 0:
+                    scores.append((-score, self.names[i].lower(), i))
+
+            scores.sort()
+
+            return [self.names[i] for _, _, i in scores[:limit]]
+
+        except Exception as e:
+            logging.error(CustomException(e,sys))
+            raise CustomException(e,sys)
+
+# Builds the search index over the unique player names present in the player stats
+# The index is built once for a given set of names and reused afterwards
+
+def playerSearchIndex(player_stats):
+
+    names = frozenset(player_stats['Name'].unique().tolist())
+
+    return memoryCache('player_search').getOrCompute(names, lambda: PlayerSearchIndex(names))
+
+# Returns the players matching the query, ranked from the best to the worst match
+
+def searchPlayers(player_stats, text, limit=10):
+
+    return playerSearchIndex(player_stats).query(text, limit)
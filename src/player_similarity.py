@@ -0,0 +1,152 @@
+# Module finds the players with the most similar statistical profile to a given player
+
+import numpy as np
+import pandas as pd
+import sys
+
+from src.cache import dataVersion, memoryCache
+from src.exception import CustomException
+from src.logger import logging
+
+# Columns making up a player's profile, in the order they are stored in the feature matrix
+
+FEATURES = ['Runs','StrikeRate','Average','Boundaries','Wickets','Economy']
+
+# Flags added to the feature matrix, whether the player faced a ball and whether they bowled one, telling the players
+# whose strike rate or economy is undefined apart from those with an average one
+
+FLAGS = {'Batted': 'StrikeRate', 'Bowled': 'Economy'}
+
+# Number of neighbours precomputed for every profile, and the number of rows compared at once
+
+NEIGHBOURS = 25
+BLOCK_SIZE = 256
+
+# Builds the profiles (one row per player for 'career', one row per player and season for 'season')
+
+def playerProfiles(player_stats, profile='career'):
+
+    try:
+
+        keys = ['Name'] if profile == 'career' else ['Name','Year']
+
+        totals = player_stats[keys + ['TotalRuns','Balls','Outs','Fours','Sixes','Wickets','TotalRunsConceded','BallsBowled']].groupby(keys).sum().reset_index()
+
+        balls = totals['Balls'].to_numpy(dtype=float)
+        outs = totals['Outs'].to_numpy(dtype=float)
+        balls_bowled = totals['BallsBowled'].to_numpy(dtype=float)
+
+        # Ratios are left undefined (NaN) when there is nothing to divide by (no balls faced, not dismissed or no balls bowled)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            strike_rate = np.where(balls > 0, totals['TotalRuns'] / balls * 100, np.nan)
+            average = np.where(outs > 0, totals['TotalRuns'] / outs, np.nan)
+            economy = np.where(balls_bowled > 0, totals['TotalRunsConceded'] / balls_bowled * 6, np.nan)
+
+        profiles = totals[keys].copy()
+        profiles['Runs'] = totals['TotalRuns'].astype(float)
+        profiles['StrikeRate'] = np.round(strike_rate, 2)
+        profiles['Average'] = np.round(average, 2)
+        profiles['Boundaries'] = (totals['Fours'] + totals['Sixes']).astype(float)
+        profiles['Wickets'] = totals['Wickets'].astype(float)
+        profiles['Economy'] = np.round(economy, 2)
+
+        return profiles
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Nearest neighbour index over the standardized player profiles
+# The undefined ratios of a profile are imputed with the mean of their column, and the flags of whether the player batted
+# and bowled are added to the features, so that a player who never bowled does not look like an economical bowler.
+# Every profile is z-scored and scaled to unit length, so that the dot product between two rows is their cosine similarity.
+# The neighbours of all the rows are computed up front, comparing a block of rows against the whole matrix at a time,
+# and a query is then only a lookup
+
+class PlayerSimilarityIndex:
+
+    def __init__(self, player_stats, profile='career', neighbours=NEIGHBOURS):
+
+        try:
+            self.profile = profile
+            self.profiles = playerProfiles(player_stats, profile)
+
+            features = self.profiles[FEATURES]
+            flags = pd.DataFrame({flag: features[column].notna().astype(float) for flag, column in FLAGS.items()})
+
+            features = np.column_stack([features.fillna(features.mean()).fillna(0).to_numpy(dtype=float), flags.to_numpy()])
+
+            std = features.std(axis=0)
+            std[std == 0] = 1
+            standardized = (features - features.mean(axis=0)) / std
+
+            norms = np.linalg.norm(standardized, axis=1, keepdims=True)
+            norms[norms == 0] = 1
+            self.matrix = standardized / norms
+
+            self._names = self.profiles['Name'].to_numpy()
+            self._rows = {key: i for i, key in enumerate(self._keys())}
+
+            n = self.matrix.shape[0]
+            k = min(neighbours + 1, n)
+
+            self.neighbours = np.empty((n, k), dtype=np.int32)
+            self.scores = np.empty((n, k), dtype=float)
+
+            for start in range(0, n, BLOCK_SIZE):
+                similarity = self.matrix[start:start+BLOCK_SIZE] @ self.matrix.T
+
+                top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+                top_scores = np.take_along_axis(similarity, top, axis=1)
+
+                order = np.argsort(-top_scores, axis=1, kind='stable')
+                self.neighbours[start:start+BLOCK_SIZE] = np.take_along_axis(top, order, axis=1)
+                self.scores[start:start+BLOCK_SIZE] = np.take_along_axis(top_scores, order, axis=1)
+
+            logging.info(f'Player similarity index built for {n} {profile} profiles')
+
+        except Exception as e:
+            logging.error(CustomException(e,sys))
+            raise CustomException(e,sys)
+
+    def _keys(self):
+        if self.profile == 'career':
+            return self.profiles['Name'].tolist()
+        return list(zip(self.profiles['Name'].tolist(), self.profiles['Year'].tolist()))
+
+    # Returns the k most similar profiles to the player (and season), along with the similarity scores
+    # Other seasons of the same player are left out of the results
+
+    def query(self, player, year=None, k=10):
+
+        try:
+            key = player if self.profile == 'career' else (player, year)
+            row = self._rows[key]
+
+            keep = self._names[self.neighbours[row]] != player
+
+            similar = self.profiles.iloc[self.neighbours[row][keep][:k]].reset_index(drop=True)
+            similar['Similarity'] = np.round(self.scores[row][keep][:k] * 100, 1)
+
+            return similar
+
+        except Exception as e:
+            logging.error(CustomException(e,sys))
+            raise CustomException(e,sys)
+
+# Builds the similarity index for the given profile ('career' or 'season')
+# The index is built once for a given dataset and reused afterwards
+
+def playerSimilarityIndex(player_stats, profile='career'):
+
+    key = (profile, dataVersion(player_stats))
+
+    return memoryCache('player_similarity').getOrCompute(key, lambda: PlayerSimilarityIndex(player_stats, profile))
+
+# Returns the players most similar to the given player, by career profile or by the profile of one of their seasons
+
+def similarPlayers(player_stats, player, year=None, k=10):
+
+    profile = 'career' if year is None else 'season'
+    return playerSimilarityIndex(player_stats, profile).query(player, year, k)
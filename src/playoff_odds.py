@@ -0,0 +1,297 @@
+# Module estimates the chances of every team to finish in the top 4 of the league stage, the playoff places the points
+# table graph highlights, by simulating the rest of the season many times over
+# Usage : python -m src.playoff_odds --year 2023 --played 50 [--runs 100000] [--workers 4]
+# A simulation plays every remaining fixture at random, the first team winning with its win probability, and ranks the
+# teams by points, then by their current net run rate, a tie on both being broken at random. All the simulations are
+# played at once as numpy arrays, one row per simulation and one column per fixture or team, so 100000 simulations of
+# a season take a fraction of a second. They can be split into shards played by several processes.
+# The data only holds seasons played to the end, so the remaining fixtures of a season are the league matches after the
+# first ones played, the points table being the one of the matches played. The win probability of a fixture is then
+# derived from the win rates of both teams over the matches played, unless given.
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.exception import CustomException
+from src.logger import logging
+
+# Number of teams reaching the playoffs
+
+PLAYOFF_PLACES = 4
+
+# Number of simulations of a season, and number of processes playing them, set with environment variables
+
+SIMULATIONS = int(os.environ.get('IPL_SIMULATIONS', '100000'))
+
+SIMULATION_WORKERS = int(os.environ.get('IPL_SIMULATION_WORKERS', '1'))
+
+# Number of simulations run after every match of a season by the playoff race graph
+
+RACE_SIMULATIONS = int(os.environ.get('IPL_RACE_SIMULATIONS', '2000'))
+
+# Returns the league stage matches of a season, in the order they were played
+# The league stage ends with the first match of a team having played as many matches as the teams of the points table,
+# as the data misses a few matches abandoned without a ball bowled
+
+def leagueMatches(matches, points_table, year):
+
+    season = matches[matches['Year'] == year]
+    order = np.lexsort((season['MatchRow'].to_numpy(), season['MatchTime'].astype(str).to_numpy(),
+                        season['MATCH_COMMENCE_START_DATE'].str[:10].to_numpy().astype(str)))
+    season = season.iloc[order].reset_index(drop=True)
+
+    league_matches = points_table.loc[points_table['Year'] == year, 'Matches'].max()
+    sides = pd.Series(np.stack([season['FirstBattingTeamName'], season['SecondBattingTeamName']], axis=1).ravel())
+    played = sides.groupby(sides).cumcount().to_numpy() + 1
+
+    in_league = (played <= league_matches).reshape(-1, 2).all(axis=1)
+    league_size = len(season) if in_league.all() else int(np.argmin(in_league))
+
+    return season.iloc[:league_size]
+
+# Returns the balls of a number of overs, written as overs.balls
+
+def _balls(overs):
+
+    overs = np.asarray(overs, dtype=float)
+    return np.floor(overs) * 6 + np.round((overs % 1) * 10)
+
+# Returns the results of the league matches as arrays, one column per side of the match : the index of the team, whether
+# it won, lost or had no result, and the runs and balls of its batting and bowling
+# A team bowled out is counted as having faced its full quota of overs, as for the net run rate of the league
+
+def _results(league, teams):
+
+    index = {team: position for position, team in enumerate(teams)}
+    first, second, winner = league['FirstBattingTeamName'], league['SecondBattingTeamName'], league['Winner']
+    result = (league['Overs1'] > 0).to_numpy()
+
+    quota1 = np.where(league['RevisedOver'] > 0, _balls(league['RevisedOver']), 120)
+    balls1 = np.where(league['Wickets1'] == 10, 120, _balls(league['Overs1'].clip(lower=0))) * result
+    balls2 = np.where(league['Wickets2'] == 10, quota1, _balls(league['Overs2'].clip(lower=0))) * result
+    runs1, runs2 = league['Runs1'].to_numpy() * result, league['Runs2'].to_numpy() * result
+
+    win1, win2 = (winner == first).to_numpy(dtype=bool), (winner == second).to_numpy(dtype=bool)
+
+    return {'Team': np.stack([first.map(index).to_numpy(), second.map(index).to_numpy()]),
+            'Win': np.stack([win1, win2]), 'Loss': np.stack([win2, win1]),
+            'For': np.stack([runs1, runs2]), 'Faced': np.stack([balls1, balls2]),
+            'Against': np.stack([runs2, runs1]), 'Bowled': np.stack([balls2, balls1])}
+
+# Returns the standings of the teams after every number of matches of the league results, as arrays with a row per number
+# of matches played (from none to all of them) and a column per team
+
+def _standings(results, teams):
+
+    played = results['Team'].shape[1]
+    rows = np.tile(np.arange(1, played + 1), 2)
+    team = results['Team'].ravel()
+
+    totals = {}
+    for name in ['Win','Loss','For','Faced','Against','Bowled']:
+        total = np.zeros((played + 1, teams))
+        np.add.at(total, (rows, team), results[name].ravel())
+        totals[name] = total.cumsum(axis=0)
+
+    matches = np.zeros((played + 1, teams))
+    np.add.at(matches, (rows, team), 1)
+
+    standings = {'Matches': matches.cumsum(axis=0), 'Wins': totals['Win'], 'Loss': totals['Loss']}
+    standings['NoResult'] = standings['Matches'] - standings['Wins'] - standings['Loss']
+    standings['Points'] = standings['Wins'] * 2 + standings['NoResult']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        standings['NetRunRate'] = np.nan_to_num(totals['For'] * 6 / totals['Faced'] - totals['Against'] * 6 / totals['Bowled']).round(3)
+
+    return standings
+
+# Returns the points table of the teams after the first matches of the league results, with their points and net run rate
+
+def pointsAfter(results, teams, played):
+
+    try:
+        standings = _standings(results, len(teams))
+
+        table = pd.DataFrame({'TeamName': teams})
+        for name in ['Matches','Wins','Loss','NoResult','Points']:
+            table[name] = standings[name][played].astype(int)
+        table['NetRunRate'] = standings['NetRunRate'][played]
+
+        return table
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Returns the probability of the first team winning every fixture, from the wins and losses of the teams
+# The win rates are shrunk towards a half by two wins and two losses, so that the first matches do not weigh too much
+
+def _winProbability(wins, losses, team1, team2):
+
+    rates = (wins + 2) / (wins + losses + 4)
+    rate1, rate2 = rates[team1], rates[team2]
+
+    return rate1 * (1 - rate2) / (rate1 * (1 - rate2) + rate2 * (1 - rate1))
+
+def formProbabilities(points_table, fixtures):
+
+    index = {team: position for position, team in enumerate(points_table['TeamName'])}
+
+    return _winProbability(points_table['Wins'].to_numpy(), points_table['Loss'].to_numpy(),
+                           fixtures['Team1'].map(index).to_numpy(), fixtures['Team2'].map(index).to_numpy())
+
+# Plays a shard of simulations, returning the number of times every team finished in every position, and the sum of
+# its points over the simulations
+
+def _simulate(points, nrr_rank, team1, team2, probability, runs, seed):
+
+    rng = np.random.default_rng(seed)
+    teams = len(points)
+
+    wins = rng.random((runs, len(team1)), dtype=np.float32) < probability.astype(np.float32)
+
+    final = np.tile(points.astype(np.int32), (runs, 1))
+    for team in range(teams):
+        final[:, team] += 2 * (wins[:, team1 == team].sum(axis=1) + (~wins[:, team2 == team]).sum(axis=1))
+
+    # Teams are ranked by points, then by net run rate, the random fraction only breaking the ties on both
+
+    score = final * teams + nrr_rank + rng.random((runs, teams), dtype=np.float32)
+    positions = np.argsort(np.argsort(-score, axis=1), axis=1)
+
+    counts = np.zeros((teams, teams), dtype=np.int64)
+    for position in range(teams):
+        counts[:, position] = (positions == position).sum(axis=0)
+
+    return counts, final.sum(axis=0, dtype=np.int64)
+
+# Plays the simulations split into one shard per worker, each with its own random stream, so the results only depend on
+# the seed and the number of workers
+
+def _odds(points, net_run_rate, team1, team2, probability, runs, workers, seed):
+
+    nrr_rank = np.searchsorted(np.sort(net_run_rate), net_run_rate, side='left')
+
+    shards = np.array_split(np.arange(runs), max(workers, 1))
+    seeds = np.random.SeedSequence(seed).spawn(len(shards))
+    arguments = [(points, nrr_rank, team1, team2, probability, len(shard), shard_seed) for shard, shard_seed in zip(shards, seeds)]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_simulate, *zip(*arguments)))
+    else:
+        results = [_simulate(*shard) for shard in arguments]
+
+    return sum(result[0] for result in results), sum(result[1] for result in results)
+
+# Returns the chances of every team of the points table to finish in the playoff places after the given fixtures
+# points_table holds the TeamName, Points and NetRunRate of every team (and its Wins and Loss for the default win
+# probabilities), fixtures the Team1 and Team2 of every remaining match, and probability the chance of Team1 winning
+# each of them (those of formProbabilities by default)
+
+def playoffOdds(points_table, fixtures, probability=None, runs=None, workers=None, seed=0):
+
+    try:
+        runs = SIMULATIONS if runs is None else runs
+        workers = SIMULATION_WORKERS if workers is None else workers
+
+        index = {team: position for position, team in enumerate(points_table['TeamName'])}
+        team1 = fixtures['Team1'].map(index).to_numpy()
+        team2 = fixtures['Team2'].map(index).to_numpy()
+        probability = formProbabilities(points_table, fixtures) if probability is None else np.asarray(probability)
+
+        counts, total_points = _odds(points_table['Points'].to_numpy(), points_table['NetRunRate'].to_numpy(),
+                                     team1, team2, probability, runs, workers, seed)
+
+        odds = points_table[['TeamName','Points','NetRunRate']].reset_index(drop=True)
+        odds['ExpectedPoints'] = (total_points / runs).round(1)
+        odds['Top4'] = counts[:, :PLAYOFF_PLACES].sum(axis=1) / runs
+        odds['First'] = counts[:, 0] / runs
+
+        return odds.sort_values(['Top4','ExpectedPoints'], ascending=False, kind='stable').reset_index(drop=True)
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Returns the teams of the league, from its matches as the points table misspells a few of them
+
+def _teams(league):
+
+    return sorted(set(league['FirstBattingTeamName']) | set(league['SecondBattingTeamName']))
+
+# Returns the remaining fixtures of the league, after the first matches played
+
+def _fixtures(league, played):
+
+    remaining = league.iloc[played:]
+    return pd.DataFrame({'Team1': remaining['FirstBattingTeamName'].to_numpy(), 'Team2': remaining['SecondBattingTeamName'].to_numpy()})
+
+# Returns the chances of the teams of a season to reach the playoffs after a number of its league matches were played
+
+def seasonOdds(matches, points_table, year, played, runs=None, workers=None, seed=0):
+
+    league = leagueMatches(matches, points_table, year)
+    teams = _teams(league)
+
+    return playoffOdds(pointsAfter(_results(league, teams), teams, played), _fixtures(league, played), runs=runs, workers=workers, seed=seed)
+
+# Returns the chances of every team to reach the playoffs after every league match of a season, as one row per team and
+# number of matches played
+
+def playoffRace(matches, points_table, year, runs=None):
+
+    try:
+        runs = RACE_SIMULATIONS if runs is None else runs
+
+        league = leagueMatches(matches, points_table, year)
+        teams = _teams(league)
+        results = _results(league, teams)
+        standings = _standings(results, len(teams))
+
+        # The standings after every match are computed at once, and the simulations played straight from the arrays
+
+        team1, team2 = results['Team']
+        top4 = np.empty((len(league) + 1, len(teams)))
+        for played in range(len(league) + 1):
+            probability = _winProbability(standings['Wins'][played], standings['Loss'][played], team1[played:], team2[played:])
+            counts, _ = _odds(standings['Points'][played], standings['NetRunRate'][played], team1[played:], team2[played:],
+                              probability, runs, 1, played)
+            top4[played] = counts[:, :PLAYOFF_PLACES].sum(axis=1) / runs
+
+        return pd.DataFrame({'TeamName': np.tile(teams, len(league) + 1), 'Top4': top4.ravel(),
+                             'Played': np.repeat(np.arange(len(league) + 1), len(teams))})
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+if __name__ == '__main__':
+
+    from src.data_loader import DEFAULT_LEAGUE, loadTables
+
+    parser = argparse.ArgumentParser(description='Simulates the rest of a season to estimate the chances of every team to reach the playoffs')
+    parser.add_argument('--league', default=DEFAULT_LEAGUE)
+    parser.add_argument('--year', type=int, required=True)
+    parser.add_argument('--played', type=int, required=True, help='number of league matches played')
+    parser.add_argument('--runs', type=int, default=SIMULATIONS)
+    parser.add_argument('--workers', type=int, default=SIMULATION_WORKERS)
+    args = parser.parse_args()
+
+    try:
+        tables = loadTables(league=args.league, years=[args.year])
+
+        start = time.perf_counter()
+        odds = seasonOdds(tables['matches'], tables['points_table'], args.year, args.played, runs=args.runs, workers=args.workers)
+
+        print(f'{args.runs} simulations in {(time.perf_counter() - start) * 1000:.0f} ms with {args.workers} worker(s)')
+        print(odds.to_string(index=False))
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
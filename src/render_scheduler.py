@@ -0,0 +1,87 @@
+# Module builds the independent figures of a tab, one after the other or concurrently in a thread pool shared by all the
+# sessions
+# The tab lays out a placeholder for every chart up front, and each chart is drawn into its placeholder as soon as its
+# figure is ready. The charts above the fold are built first, which only reorders the builds : the run of the script
+# still ends once every chart of the page is drawn.
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from src.exception import CustomException
+from src.logger import logging
+
+# Number of threads building the figures, set with the IPL_RENDER_WORKERS environment variable, 1 by default : with 1 or
+# less, the figures are built one after the other in the thread rendering the tab. Building a figure mostly holds the
+# GIL, so more threads are rarely faster (see python -m src.benchmark render)
+
+RENDER_WORKERS = int(os.environ.get('IPL_RENDER_WORKERS', '1'))
+
+# Switch for building the charts above the fold first, turned off with the IPL_PROGRESSIVE=0 environment variable
+# When on, the placeholders of all the charts of a page are laid out first, the charts above the fold are built and drawn
+# before the others, and the charts below it show a loading message until they are drawn, later in the same run
+
+PROGRESSIVE = os.environ.get('IPL_PROGRESSIVE', '1') != '0'
+
+# Number of charts at the top of a page considered above the fold, set with the IPL_ABOVE_THE_FOLD environment variable
+
+ABOVE_THE_FOLD = int(os.environ.get('IPL_ABOVE_THE_FOLD', '2'))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Returns the thread pool building the figures, created on first use
+
+def renderExecutor():
+
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix='render')
+        return _executor
+
+# Schedules the builds of a render, and hands their results back as they complete
+# Builds with a priority of 0 start right away, the others are deferred until the results are asked for, and then run in
+# the order of their priority
+
+class RenderScheduler:
+
+    def __init__(self, workers=None):
+        self.workers = RENDER_WORKERS if workers is None else workers
+        self._futures = {}
+        self._deferred = []
+
+    def __len__(self):
+        return len(self._futures) + len(self._deferred)
+
+    # Schedules a build, identified by the given id
+
+    def submit(self, build_id, build, priority=0):
+        if self.workers > 1 and priority == 0:
+            self._futures[renderExecutor().submit(build)] = build_id
+        else:
+            self._deferred.append((priority, len(self._deferred), build_id, build))
+
+    # Yields the id and result of every build, in the order they complete
+    # A sequential scheduler runs the builds here, by priority and then in the order they were submitted
+
+    def completed(self):
+        try:
+            deferred = sorted(self._deferred, key=lambda build: build[:2])
+            self._deferred = []
+
+            if self.workers > 1:
+                for _, _, build_id, build in deferred:
+                    self._futures[renderExecutor().submit(build)] = build_id
+
+                futures, self._futures = self._futures, {}
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+            else:
+                for _, _, build_id, build in deferred:
+                    yield build_id, build()
+
+        except Exception as e:
+            logging.error(CustomException(e,sys))
+            raise CustomException(e,sys)
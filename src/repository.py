@@ -0,0 +1,285 @@
+# Module provides the repository the app queries for the rows a chart is built from
+# Two backends answer the same queries :
+# - 'pandas' filters the dataframes held in memory
+# - 'sqlite' loads the tables once into an embedded, file-based database under the cache directory, indexed on
+#   Name, TeamName, Year and GroundName, and pushes the filtering, ordering and limits of a query down to SQL
+#   The databases of a league are kept in a directory of their own, one per set of seasons and version of the data,
+#   and the least recently used ones past IPL_SQLITE_KEEP are removed
+# Both return the matching rows in their original order, with their original index and dtypes, so a chart built from
+# the rows of either backend is the same as one built from the full dataframe
+
+import os
+import sqlite3
+import sys
+import threading
+
+import pandas as pd
+
+from src.cache import artifactPath, dataVersion, memoryCache
+from src.exception import CustomException
+from src.logger import logging
+
+# Backend used by the app, can be switched to the embedded database with the IPL_BACKEND=sqlite environment variable
+
+BACKEND = os.environ.get('IPL_BACKEND', 'pandas')
+
+# Number of embedded databases kept on disk for every league, set with the IPL_SQLITE_KEEP environment variable
+
+SQLITE_KEEP = int(os.environ.get('IPL_SQLITE_KEEP', '8'))
+
+# Columns indexed in each table of the embedded database
+
+INDEXES = {
+    'player_stats': [['Name'], ['TeamName','Year'], ['Year']],
+    'points_table': [['TeamName'], ['Year']],
+    'matches': [['Year'], ['FirstBattingTeamName'], ['SecondBattingTeamName'], ['GroundName']],
+    'ground_data': [['GroundName']]
+}
+
+# Repository answering the queries from the dataframes held in memory
+
+class PandasRepository:
+
+    backend = 'pandas'
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def playerStats(self, year=None, franchise=None, player=None, nationality=None, limit=None):
+        player_stats = self.tables['player_stats']
+
+        mask = pd.Series(True, index=player_stats.index)
+        if year is not None:
+            mask &= player_stats['Year'] == year
+        if franchise is not None:
+            mask &= player_stats['TeamName'] == franchise
+        if player is not None:
+            mask &= player_stats['Name'] == player
+        if nationality is not None and nationality != 'Indian and Overseas':
+            mask &= player_stats['Nationality'] == nationality
+
+        rows = player_stats[mask]
+        return rows.head(limit) if limit is not None else rows
+
+    def pointsTable(self, year=None, franchise=None):
+        points_table = self.tables['points_table']
+
+        mask = pd.Series(True, index=points_table.index)
+        if year is not None:
+            mask &= points_table['Year'] == year
+        if franchise is not None:
+            mask &= points_table['TeamName'] == franchise
+
+        return points_table[mask]
+
+    def matches(self, year=None, franchise=None, opponent=None, ground=None):
+        matches = self.tables['matches']
+
+        mask = pd.Series(True, index=matches.index)
+        if year is not None:
+            mask &= matches['Year'] == year
+        if franchise is not None and opponent is not None:
+            mask &= ((matches['FirstBattingTeamName'] == franchise) & (matches['SecondBattingTeamName'] == opponent)) | ((matches['FirstBattingTeamName'] == opponent) & (matches['SecondBattingTeamName'] == franchise))
+        elif franchise is not None:
+            mask &= (matches['FirstBattingTeamName'] == franchise) | (matches['SecondBattingTeamName'] == franchise)
+        if ground is not None:
+            mask &= matches['GroundName'] == ground
+
+        return matches[mask]
+
+    def grounds(self):
+        return self.tables['ground_data']
+
+    # Top run scorers of a franchise in a year, as listed in the player stats
+
+    def franchiseTopScorers(self, year, franchise, limit=5):
+        return self.playerStats(year=year, franchise=franchise, limit=limit)
+
+# Returns the path of the embedded database of the tables, within the directory of their league, named after the
+# seasons they hold and the version of their content
+
+def databasePath(tables):
+
+    player_stats = tables['player_stats']
+    league = player_stats['League'].iloc[0] if 'League' in player_stats and not player_stats.empty else 'default'
+    years = sorted(player_stats['Year'].unique().tolist())
+    seasons = 'none' if not years else str(years[0]) if len(years) == 1 else f'{years[0]}-{years[-1]}'
+
+    return artifactPath('sqlite', str(league), f'{seasons}.{dataVersion(*tables.values())}.sqlite')
+
+# Removes the databases of a league directory least recently used, keeping the given number of them
+# The last use of a database is its modification time, as it is touched whenever a repository opens it
+
+def collectDatabases(directory, keep):
+
+    last_use = {}
+    for file_name in os.listdir(directory):
+        if not file_name.endswith('.sqlite'):
+            continue
+        try:
+            last_use[file_name] = os.path.getmtime(os.path.join(directory, file_name))
+        except OSError:
+            continue
+
+    for file_name in sorted(last_use, key=last_use.get, reverse=True)[keep:]:
+        try:
+            os.remove(os.path.join(directory, file_name))
+        except OSError:
+            pass
+
+# Builds the embedded database of the tables at the given path, unless it already exists
+
+def buildDatabase(tables, path):
+
+    try:
+        if os.path.exists(path):
+            return path
+
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+        with sqlite3.connect(temp_path) as connection:
+            for name, table in tables.items():
+                table.to_sql(name, connection, index=True, index_label='RowId')
+                for columns in INDEXES.get(name, []):
+                    quoted = ','.join(f'"{column}"' for column in columns)
+                    connection.execute(f'CREATE INDEX "ix_{name}_{"_".join(columns)}" ON "{name}" ({quoted})')
+        connection.close()
+
+        os.replace(temp_path, path)
+        logging.info(f'Embedded database built at {path}')
+
+        collectDatabases(os.path.dirname(path), SQLITE_KEEP)
+
+        return path
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Repository answering the queries from the embedded database
+# Every thread opens its own read-only connection, as sqlite connections cannot be shared across threads
+# The database may be removed by another process at any time : the connections already open keep reading it, and a
+# new connection builds it again when it is missing
+
+class SQLiteRepository:
+
+    backend = 'sqlite'
+
+    def __init__(self, tables, path=None):
+        self.tables = tables
+        self.path = path or databasePath(tables)
+        self.dtypes = {name: table.dtypes.to_dict() for name, table in tables.items()}
+        self._local = threading.local()
+
+        self._open()
+
+    # Builds the database if it is missing, and touches it as its last use, which the collection of the databases goes by
+
+    def _open(self):
+        buildDatabase(self.tables, self.path)
+        try:
+            os.utime(self.path)
+        except OSError:
+            pass
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            self._open()
+            connection = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+            self._local.connection = connection
+        return connection
+
+    # Runs a query on a table, returning its rows as a dataframe in the same shape as the original one
+
+    def _select(self, table, conditions=(), params=(), limit=None):
+        query = f'SELECT * FROM "{table}"'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY RowId'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params = list(params) + [int(limit)]
+
+        rows = pd.read_sql_query(query, self._connection(), params=list(params), index_col='RowId')
+        rows.index.name = None
+
+        return rows.astype(self.dtypes[table])
+
+    def playerStats(self, year=None, franchise=None, player=None, nationality=None, limit=None):
+        conditions, params = [], []
+        if year is not None:
+            conditions.append('Year = ?')
+            params.append(int(year))
+        if franchise is not None:
+            conditions.append('TeamName = ?')
+            params.append(franchise)
+        if player is not None:
+            conditions.append('Name = ?')
+            params.append(player)
+        if nationality is not None and nationality != 'Indian and Overseas':
+            conditions.append('Nationality = ?')
+            params.append(nationality)
+
+        return self._select('player_stats', conditions, params, limit)
+
+    def pointsTable(self, year=None, franchise=None):
+        conditions, params = [], []
+        if year is not None:
+            conditions.append('Year = ?')
+            params.append(int(year))
+        if franchise is not None:
+            conditions.append('TeamName = ?')
+            params.append(franchise)
+
+        return self._select('points_table', conditions, params)
+
+    def matches(self, year=None, franchise=None, opponent=None, ground=None):
+        conditions, params = [], []
+        if year is not None:
+            conditions.append('Year = ?')
+            params.append(int(year))
+        if franchise is not None and opponent is not None:
+            conditions.append('((FirstBattingTeamName = ? AND SecondBattingTeamName = ?) OR (FirstBattingTeamName = ? AND SecondBattingTeamName = ?))')
+            params.extend([franchise, opponent, opponent, franchise])
+        elif franchise is not None:
+            conditions.append('(FirstBattingTeamName = ? OR SecondBattingTeamName = ?)')
+            params.extend([franchise, franchise])
+        if ground is not None:
+            conditions.append('GroundName = ?')
+            params.append(ground)
+
+        return self._select('matches', conditions, params)
+
+    def grounds(self):
+        return self._select('ground_data')
+
+    # Top run scorers of a franchise in a year, as listed in the player stats
+
+    def franchiseTopScorers(self, year, franchise, limit=5):
+        return self.playerStats(year=year, franchise=franchise, limit=limit)
+
+REPOSITORIES = {
+    'pandas': PandasRepository,
+    'sqlite': SQLiteRepository
+}
+
+# Returns the repository of the given tables for a backend, created once per version of the data
+
+def repository(tables, backend=None):
+
+    try:
+        backend = backend or BACKEND
+        if backend not in REPOSITORIES:
+            raise ValueError(f'Unknown backend {backend}, expected one of {", ".join(sorted(REPOSITORIES))}')
+
+        cache = memoryCache('repository')
+        key = (backend, dataVersion(*tables.values()))
+
+        return cache.getOrCompute(key, lambda: REPOSITORIES[backend](tables))
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
@@ -0,0 +1,258 @@
+# Module generates a fully static version of the dashboard, which can be served from any static file host or cache
+# Usage : python -m src.static_site [--league IPL] [--out site] [--only all-time year franchise pair player]
+# There is one page per nationality, year, franchise, pair of franchises and player, each laid out from the same views
+# as the tabs of the app. plotly.js is written once under assets/ and shared by every page, and the data of every chart
+# is written once under figures/ as a json file, which a page only fetches when the chart scrolls into view
+
+import argparse
+import html
+import os
+import re
+import shutil
+import sys
+import time
+
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+
+from src.data_loader import DEFAULT_LEAGUE, loadTables
+from src.export import chartFileName
+from src.figure_serialization import compactFigure
+from src.views import *
+from src.exception import CustomException
+from src.logger import logging
+
+SECTIONS = ['all-time','year','franchise','pair','player']
+
+# File written into the output directory by every build, the previous content of a directory is only removed when it holds it
+
+MARKER = '.static_site'
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title} - IPL Data Analysis</title>
+<style>
+body {{font-family: Verdana, sans-serif; color: #444444; max-width: 860px; margin: 0 auto; padding: 20px;}}
+.metrics {{display: flex; gap: 40px; margin: 20px 0;}}
+.metrics div {{font-size: 1.3em;}}
+.metrics b {{display: block;}}
+.chart {{min-height: 450px;}}
+.unavailable {{min-height: 0; color: #999999;}}
+table {{border-collapse: collapse; margin: 10px 0;}}
+td, th {{border-bottom: 1px solid #e6e6e6; padding: 4px 10px; text-align: left;}}
+nav a {{margin-right: 10px;}}
+</style>
+<script src="assets/plotly.min.js"></script>
+</head>
+<body>
+<nav><a href="index.html">IPL Data Analysis</a></nav>
+{body}
+<script src="assets/site.js"></script>
+</body>
+</html>
+"""
+
+# Fetches the data of a chart and plots it once the chart is about to scroll into view
+
+SITE_JS = """(function() {
+    function plot(element) {
+        fetch(element.dataset.src)
+            .then(function(response) { return response.json(); })
+            .then(function(fig) { Plotly.newPlot(element, fig.data, fig.layout, {displaylogo: false}); });
+    }
+
+    var charts = document.querySelectorAll('.chart[data-src]');
+
+    if (!('IntersectionObserver' in window)) {
+        charts.forEach(plot);
+        return;
+    }
+
+    var observer = new IntersectionObserver(function(entries) {
+        entries.forEach(function(entry) {
+            if (entry.isIntersecting) {
+                observer.unobserve(entry.target);
+                plot(entry.target);
+            }
+        });
+    }, {rootMargin: '300px'});
+
+    charts.forEach(function(chart) { observer.observe(chart); });
+})();
+"""
+
+# Returns the file name of a page
+
+def pageName(*parts):
+
+    return re.sub(r'[^a-z0-9_.-]+', '-', '_'.join(str(part) for part in parts).lower()) + '.html'
+
+# Generates the pages of the static site and the files they share
+
+class SiteBuilder:
+
+    def __init__(self, data, out_dir):
+        self.data = data
+        self.out_dir = out_dir
+        self.figures = {}
+        self.pages = []
+
+    # Writes the data of a chart once, returning its path relative to the pages, or None when it cannot be built
+
+    def figure(self, key):
+        if key not in self.figures:
+            path = f'figures/{chartFileName(key, "json")}'
+            try:
+                fig = compactFigure(viewChart(self.data, key))
+                with open(os.path.join(self.out_dir, path), 'w', encoding='utf-8') as f:
+                    f.write(pio.to_json(fig, validate=False))
+                self.figures[key] = path
+            except CustomException:
+                self.figures[key] = None
+        return self.figures[key]
+
+    # Returns the html of the blocks of a view
+
+    def render(self, view):
+        parts = []
+        for kind, *block in view:
+            if kind == 'title':
+                parts.append(f'<h1>{html.escape(block[0])}</h1>')
+            elif kind in ('header', 'subheader'):
+                tag = 'h2' if kind == 'header' else 'h3'
+                if block[0]:
+                    parts.append(f'<{tag}>{html.escape(block[0])}</{tag}>')
+            elif kind == 'metrics':
+                metrics = ''.join(f'<div><b>{html.escape(str(label))}</b>{html.escape(str(value))}</div>' for label, value in block[0])
+                parts.append(f'<div class="metrics">{metrics}</div>')
+            elif kind == 'chart':
+                path = self.figure(block[0])
+                if path is None:
+                    parts.append('<div class="chart unavailable">This chart is not available for the selection</div>')
+                else:
+                    parts.append(f'<div class="chart" data-src="{path}"></div>')
+            elif kind == 'table':
+                parts.append(viewTable(self.data, block[0]).to_html(border=0))
+            elif kind == 'html':
+                path = f'maps/{block[0][0]}.html'
+                full_path = os.path.join(self.out_dir, path)
+                if not os.path.exists(full_path):
+                    with open(full_path, 'w', encoding='utf-8') as f:
+                        f.write(viewHtml(self.data, block[0]))
+                parts.append(f'<iframe src="{path}" width="{block[1]}" height="{block[2]}" style="border: none;" loading="lazy"></iframe>')
+        return '\n'.join(parts)
+
+    def links(self, pages):
+        return '<ul>' + ''.join(f'<li><a href="{name}">{html.escape(title)}</a></li>' for title, name in pages) + '</ul>'
+
+    def page(self, section, title, name, body):
+        with open(os.path.join(self.out_dir, name), 'w', encoding='utf-8') as f:
+            f.write(PAGE.format(title=html.escape(title), body=body))
+        self.pages.append((section, title, name))
+
+    def allTimePages(self):
+        for nationality in nationalities(self.data):
+            self.page('all-time', f'All-time Analysis ({nationality})', pageName('all-time', nationality),
+                      self.render(allTimeView(self.data, nationality)))
+
+    def yearPages(self):
+        for year in sorted(years(self.data)):
+            body = [self.render(yearView(self.data, year))]
+            for franchise in yearFranchises(self.data, year):
+                body.append(f'<h2>{html.escape(franchise)}</h2>')
+                body.append(self.render(yearFranchiseView(self.data, year, franchise)))
+            self.page('year', f'{self.data.league} {year}', pageName('year', year), '\n'.join(body))
+
+    def franchisePages(self):
+        for franchise in franchises(self.data):
+            opponents = [(f'{franchise} vs {opponent}', pageName('pair', *sorted([franchise, opponent])))
+                         for opponent in franchises(self.data) if opponent != franchise]
+            body = self.render(franchiseView(self.data, franchise)) + self.links(opponents)
+            self.page('franchise', franchise, pageName('franchise', franchise), body)
+
+    def pairPages(self):
+        teams = franchises(self.data)
+        for i, franchise1 in enumerate(teams):
+            for franchise2 in teams[i+1:]:
+                title = f'{franchise1} vs {franchise2}'
+                body = f'<h1>{html.escape(title)}</h1>\n' + self.render(headToHeadView(self.data, franchise1, franchise2))
+                self.page('pair', title, pageName('pair', franchise1, franchise2), body)
+
+    def playerPages(self):
+        for player in sorted(self.data.player_stats['Name'].unique().tolist(), key=str.lower):
+            body = f'<h2>{html.escape(player)}</h2>\n' + self.render(playerView(self.data, player) + similarPlayersView(self.data, player))
+            self.page('player', player, pageName('player', player), body)
+
+    def index(self):
+        body = ['<h1>IPL Data Analysis</h1>']
+        for section, heading in [('all-time','All-time Analysis'), ('year','Year-wise Analysis'), ('franchise','Franchise-wise Analysis'),
+                                 ('pair','Franchise Comparisons'), ('player','Player-wise Analysis')]:
+            pages = [(title, name) for page_section, title, name in self.pages if page_section == section]
+            if pages:
+                body.append(f'<h2>{heading}</h2>' + self.links(pages))
+        with open(os.path.join(self.out_dir, 'index.html'), 'w', encoding='utf-8') as f:
+            f.write(PAGE.format(title='Home', body='\n'.join(body)))
+
+    def build(self, sections=SECTIONS):
+        for directory in ['assets','figures','maps']:
+            os.makedirs(os.path.join(self.out_dir, directory), exist_ok=True)
+
+        with open(os.path.join(self.out_dir, MARKER), 'w', encoding='utf-8') as f:
+            f.write('Generated by python -m src.static_site, the content of this directory is replaced by every build\n')
+
+        with open(os.path.join(self.out_dir, 'assets', 'plotly.min.js'), 'w', encoding='utf-8') as f:
+            f.write(get_plotlyjs())
+        with open(os.path.join(self.out_dir, 'assets', 'site.js'), 'w', encoding='utf-8') as f:
+            f.write(SITE_JS)
+
+        builders = {'all-time': self.allTimePages, 'year': self.yearPages, 'franchise': self.franchisePages,
+                    'pair': self.pairPages, 'player': self.playerPages}
+        for section in SECTIONS:
+            if section in sections:
+                builders[section]()
+                logging.info(f'Static site : {section} pages generated')
+
+        self.index()
+
+# Generates the static site into the output directory, replacing its previous content
+# Only a directory generated by a previous build (holding its marker file) is removed, any other directory that is not
+# empty is refused rather than deleted
+
+def buildSite(tables, out_dir, sections=SECTIONS):
+
+    try:
+        if os.path.isdir(out_dir) and os.listdir(out_dir):
+            if not os.path.isfile(os.path.join(out_dir, MARKER)):
+                raise ValueError(f'{out_dir} is not empty and was not generated by a previous build, pick another --out directory')
+            shutil.rmtree(out_dir)
+
+        builder = SiteBuilder(viewData(tables), out_dir)
+        builder.build(sections)
+
+        return builder
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Generates a fully static version of the dashboard')
+    parser.add_argument('--league', default=DEFAULT_LEAGUE)
+    parser.add_argument('--out', default='site')
+    parser.add_argument('--only', nargs='+', choices=SECTIONS, default=SECTIONS)
+    args = parser.parse_args()
+
+    try:
+        start = time.perf_counter()
+
+        builder = buildSite(loadTables(league=args.league), args.out, args.only)
+
+        charts = sum(path is not None for path in builder.figures.values())
+        print(f'{len(builder.pages)} pages and {charts} charts generated in {args.out} in {time.perf_counter() - start:.1f} s')
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
@@ -0,0 +1,276 @@
+# Module generates synthetic versions of the tables of the app at a multiple of the size of the real data, to test how
+# the app scales with more seasons, teams and leagues
+# Usage : python -m src.synthetic --scale 10 [--seed 0] [--out data/synthetic/x10] [--balls]
+# A table at scale N is made of N copies of the real table. The copies are spread over leagues and eras : every league
+# has its own franchises, grounds and players, named after the real ones with the number of the league (or of the copy
+# for the players), and every era of a league holds as many seasons as the real data, following the previous one. The
+# statistics of the players are jittered in every copy but the first, keeping the derived statistics (strike rates,
+# averages, economy) consistent, so the distributions stay close to the real ones. The first copy is the real data.
+# The tables have exactly the schemas of the real ones, and are written under the file names the app reads, so the app
+# can be pointed at them with the IPL_DATA_DIR environment variable.
+# A ball-by-ball feed of the matches can be written along with them, in the format src.ball_ingest reads : every innings
+# is played with the batters and bowlers of the team that season, over as many overs and with as many wickets as its
+# score in the matches table, the runs of every ball being drawn at random.
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.ball_ingest import BALL_COLUMNS
+from src.data_loader import DATA_FILES, readTables
+from src.exception import CustomException
+from src.logger import logging
+
+SCALES = [10, 100, 1000]
+
+TEAM_COLUMNS = ['TossTeam','HomeTeamName','AwayTeamName','FirstBattingTeamName','SecondBattingTeamName','MatchName1','MatchName2','Winner']
+
+# Returns the league and era of every copy of the data for a scale, the leagues and eras growing alike
+
+def copyLayout(scale):
+
+    leagues = max(1, round(math.sqrt(scale)))
+    return [(copy % leagues, copy // leagues) for copy in range(scale)]
+
+def leagueName(name, league):
+
+    return name if league == 0 else f'{name} (League {league + 1})'
+
+# Shifts the year of dates written as text, e.g. 2008-06-01 or 9-7-1983
+
+def shiftDates(dates, years, year_first=True):
+
+    if years == 0:
+        return dates
+
+    parts = dates.str.split('-')
+    if year_first:
+        return (parts.str[0].astype(int) + years).astype(str) + '-' + parts.str[1] + '-' + parts.str[2]
+    return parts.str[0] + '-' + parts.str[1] + '-' + (parts.str[2].astype(int) + years).astype(str)
+
+def _ratio(numerator, denominator, default):
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, np.round(numerator / denominator, 2), default)
+
+# Scales the batting and bowling of every player season by a random factor, and recomputes what derives from them
+
+def jitterPlayerStats(player_stats, rng):
+
+    stats = player_stats.copy()
+    batting = rng.uniform(0.8, 1.2, len(stats))
+    bowling = rng.uniform(0.8, 1.2, len(stats))
+    wickets = rng.uniform(0.8, 1.2, len(stats))
+
+    for column in ['TotalRuns','Balls','Fours','Sixes']:
+        stats[column] = np.round(stats[column] * batting).astype(stats[column].dtype)
+    for column in ['TotalRunsConceded','DotBallsBowled','BallsBowled','FoursConceded','SixesConceded']:
+        stats[column] = np.round(stats[column] * bowling).astype(stats[column].dtype)
+    stats['Wickets'] = np.round(stats['Wickets'] * wickets).astype(stats['Wickets'].dtype)
+
+    # The best innings and figures of a season cannot be better than the whole season
+
+    clipped = stats['HighestScore'] > stats['TotalRuns']
+    stats.loc[clipped, 'HighestScore'] = stats.loc[clipped, 'TotalRuns']
+    not_out = stats['BestScore'].str.endswith('*')
+    stats.loc[clipped, 'BestScore'] = stats.loc[clipped, 'HighestScore'].astype(str) + np.where(not_out[clipped], '*', '')
+
+    clipped = stats['BestBowlingWickets'] > stats['Wickets']
+    stats.loc[clipped, 'BestBowlingWickets'] = stats.loc[clipped, 'Wickets']
+    stats.loc[clipped, 'BestBowling'] = stats.loc[clipped, 'BestBowlingWickets'].astype(str) + '/' + stats.loc[clipped, 'BestBowlingRuns'].astype(str)
+
+    stats['StrikeRate'] = _ratio(stats['TotalRuns'] * 100, stats['Balls'], 0.0)
+    stats['BattingAverage'] = _ratio(stats['TotalRuns'], stats['Outs'], stats['BattingAverage'])
+    stats['OversBowled'] = stats['BallsBowled'] // 6 + (stats['BallsBowled'] % 6) / 10
+    stats['EconomyRate'] = _ratio(stats['TotalRunsConceded'] * 6, stats['BallsBowled'], 0.0)
+    stats['BowlingAverage'] = _ratio(stats['TotalRunsConceded'], stats['Wickets'], 0.0)
+    stats['BowlingStrikeRate'] = _ratio(stats['BallsBowled'], stats['Wickets'], 0.0)
+
+    return stats
+
+# Returns one copy of the tables, for a league and an era
+
+def copyTables(tables, copy, league, era, rng):
+
+    if copy == 0:
+        return dict(tables)
+
+    player_stats, points_table, matches, ground_data = tables['player_stats'], tables['points_table'], tables['matches'], tables['ground_data']
+
+    years = era * (player_stats['Year'].max() - player_stats['Year'].min() + 1)
+    teams = {team: leagueName(team, league) for team in pd.concat([player_stats['TeamName'], points_table['TeamName']] + [matches[column] for column in TEAM_COLUMNS]).unique()}
+    teams.update({'No Result': 'No Result', 'Tie': 'Tie'})
+    grounds = {ground: leagueName(ground, league) for ground in ground_data['GroundName']}
+
+    player_stats = jitterPlayerStats(player_stats, rng)
+    player_stats['Name'] = player_stats['Name'] + f' ({copy + 1})'
+    player_stats['PlayerDOB'] = shiftDates(player_stats['PlayerDOB'], years, year_first=False)
+    player_stats['TeamName'] = player_stats['TeamName'].map(teams)
+    player_stats['TeamCode'] = player_stats['TeamCode'] + ('' if league == 0 else str(league + 1))
+    player_stats['Year'] += years
+
+    points_table = points_table.copy()
+    points_table['TeamName'] = points_table['TeamName'].map(teams)
+    points_table['Year'] += years
+
+    matches = matches.copy()
+    for column in TEAM_COLUMNS:
+        matches[column] = matches[column].map(teams).fillna(matches[column])
+    matches['GroundName'] = matches['GroundName'].map(grounds).fillna(matches['GroundName'])
+    matches['MatchRow'] += copy * (tables['matches']['MatchRow'].max() + 1)
+    matches['Year'] += years
+    matches['MATCH_COMMENCE_START_DATE'] = shiftDates(matches['MATCH_COMMENCE_START_DATE'], years)
+    matches['MatchEndDate'] = shiftDates(matches['MatchEndDate'], years)
+
+    # Every league plays on its own grounds, laid out around the real ones
+
+    ground_data = ground_data.copy()
+    ground_data['GroundName'] = ground_data['GroundName'].map(grounds)
+    if era > 0:
+        ground_data = ground_data.iloc[:0]
+    elif league > 0:
+        ground_data['Latitude'] += rng.uniform(-0.5, 0.5, len(ground_data))
+        ground_data['Longitude'] += rng.uniform(-0.5, 0.5, len(ground_data))
+
+    return {'player_stats': player_stats, 'points_table': points_table, 'matches': matches, 'ground_data': ground_data}
+
+# Generates the tables at the given multiple of the size of the real data
+
+def generateTables(scale, seed=0, tables=None):
+
+    try:
+        tables = readTables() if tables is None else tables
+        rng = np.random.default_rng(seed)
+
+        copies = [copyTables(tables, copy, league, era, rng) for copy, (league, era) in enumerate(copyLayout(scale))]
+
+        return {name: pd.concat([copy[name] for copy in copies], ignore_index=True)[tables[name].columns].astype(tables[name].dtypes.to_dict())
+                for name in tables}
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Outcomes of a ball of the ball-by-ball feed, along with their weights
+
+BALL_RUNS = [0, 1, 2, 3, 4, 6]
+BALL_RUN_WEIGHTS = [0.38, 0.36, 0.07, 0.005, 0.12, 0.065]
+DISMISSALS = ['caught', 'bowled', 'lbw', 'run out', 'stumped']
+DISMISSAL_WEIGHTS = [0.6, 0.18, 0.1, 0.08, 0.04]
+WIDE_RATE = 0.04
+
+# Returns the number of balls of overs written as overs.balls, e.g. 16.2, none for an innings not played (-1)
+
+def _legalBalls(overs):
+
+    if pd.isna(overs) or overs < 0:
+        return 0
+    return int(overs) * 6 + int(round((overs % 1) * 10))
+
+# Returns the rows of the balls of an innings
+
+def inningsBalls(match_row, year, innings, batting_team, bowling_team, batters, bowlers, legal_balls, wickets, rng):
+
+    runs = rng.choice(BALL_RUNS, size=legal_balls, p=BALL_RUN_WEIGHTS)
+    wides = rng.random(legal_balls) < WIDE_RATE
+    wicket_balls = set(rng.choice(legal_balls, size=min(wickets, legal_balls, len(batters) - 1), replace=False).tolist())
+    dismissals = rng.choice(DISMISSALS, size=legal_balls, p=DISMISSAL_WEIGHTS)
+
+    rows = []
+    striker, non_striker, next_batter = 0, 1, 2
+    for ball in range(legal_balls):
+        over = ball // 6 + 1
+        bowler = bowlers[(over - 1) % len(bowlers)]
+        base = (match_row, year, innings, over, ball % 6 + 1, batting_team, bowling_team, batters[striker], batters[non_striker], bowler)
+
+        if wides[ball]:
+            rows.append(base + (0, 1, 'wides', 0, '', ''))
+
+        if ball in wicket_balls:
+            rows.append(base + (0, 0, '', 1, dismissals[ball], batters[striker]))
+            striker, next_batter = next_batter, next_batter + 1
+        else:
+            rows.append(base + (int(runs[ball]), 0, '', 0, '', ''))
+            if runs[ball] % 2:
+                striker, non_striker = non_striker, striker
+
+        if ball % 6 == 5:
+            striker, non_striker = non_striker, striker
+
+    return rows
+
+# Writes a ball-by-ball feed of the matches of the tables, a batch of matches at a time
+
+def writeBallFeed(tables, path, seed=0, batch=500):
+
+    try:
+        rng = np.random.default_rng(seed)
+        player_stats, matches = tables['player_stats'], tables['matches']
+
+        batters = {key: team['Name'].tolist() for key, team in player_stats.sort_values('TotalRuns', ascending=False).groupby(['Year','TeamName'])}
+        bowlers = {key: team['Name'].tolist()[:5] for key, team in player_stats.sort_values('BallsBowled', ascending=False).groupby(['Year','TeamName'])}
+
+        # Teams with fewer than 11 players that season are completed with unnamed ones
+
+        def lineUp(players, team, size):
+            return players + [f'{team} Player {number}' for number in range(len(players) + 1, size + 1)]
+
+        rows = []
+        header = True
+        for position, match in enumerate(matches.itertuples(index=False)):
+            year = match.Year
+            teams = [match.FirstBattingTeamName, match.SecondBattingTeamName]
+            for innings, (overs, wickets) in enumerate([(match.Overs1, match.Wickets1), (match.Overs2, match.Wickets2)], start=1):
+                batting_team, bowling_team = teams[innings - 1], teams[2 - innings]
+                rows += inningsBalls(int(match.MatchRow), year, innings, batting_team, bowling_team,
+                                     lineUp(batters.get((year, batting_team), []), batting_team, 11),
+                                     lineUp(bowlers.get((year, bowling_team), []), bowling_team, 5),
+                                     _legalBalls(overs), 0 if pd.isna(wickets) else max(int(wickets), 0), rng)
+
+            if (position + 1) % batch == 0 or position == len(matches) - 1:
+                pd.DataFrame(rows, columns=list(BALL_COLUMNS)).to_csv(path, mode='w' if header else 'a', header=header, index=False)
+                rows, header = [], False
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Writes the tables as csv files, under the file names the app reads
+
+def writeTables(tables, out_dir):
+
+    os.makedirs(out_dir, exist_ok=True)
+    for name, table in tables.items():
+        table.to_csv(os.path.join(out_dir, os.path.basename(DATA_FILES[name])), index=False)
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Generates synthetic tables at a multiple of the size of the real data')
+    parser.add_argument('--scale', type=int, choices=[1] + SCALES, required=True)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out')
+    parser.add_argument('--balls', action='store_true', help='also write a ball-by-ball feed of the matches')
+    args = parser.parse_args()
+
+    try:
+        start = time.perf_counter()
+
+        out_dir = args.out or os.path.join('data', 'synthetic', f'x{args.scale}')
+        tables = generateTables(args.scale, args.seed)
+        writeTables(tables, out_dir)
+
+        if args.balls:
+            writeBallFeed(tables, os.path.join(out_dir, 'ball_by_ball.csv'), args.seed)
+
+        sizes = ', '.join(f'{name} {len(table)} rows' for name, table in tables.items())
+        print(f'Tables at scale {args.scale} written to {out_dir} in {time.perf_counter() - start:.1f} s : {sizes}')
+        print(f'Run the app on them with IPL_DATA_DIR={out_dir}')
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
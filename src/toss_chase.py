@@ -0,0 +1,96 @@
+# Module analyses the toss and the chase : how often the team winning the toss wins the match, and how often the team
+# batting second chases its target down, by target, ground and season
+# The matches are counted in one vectorized pass into a cube with a cell per season, ground, band of target and toss
+# decision, which is built once as a node of the pipeline. Every table the charts are drawn from is then a slice of the
+# cube, adding up its cells. The grounds of the cube are their position in ground_data, the index the markers of the
+# map and their ground statistics are built on, so a ground slice is joined back to the statistics of the map by position
+# Matches with no result are left out of the cube
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from src.exception import CustomException
+from src.logger import logging
+
+# Bands of the target of the chase, as their lower bounds past the first one
+
+TARGET_BANDS = ['Under 140', '140 to 159', '160 to 179', '180 to 199', '200 and over']
+
+TARGET_EDGES = [140, 160, 180, 200]
+
+# Decision of the team winning the toss
+
+TOSS_DECISIONS = ['Bat', 'Field']
+
+# Counts of every cell of the cube
+
+MEASURES = ['Matches', 'TossWinnerWins', 'ChaseWins']
+
+# Builds the cube of the matches with a result, as a row per non empty cell holding its counts
+# The target is the revised one for the matches shortened by rain, and one more than the first innings otherwise
+
+def tossChaseCube(matches, ground_data):
+
+    try:
+        result = (matches['Winner'] == matches['FirstBattingTeamName']) | (matches['Winner'] == matches['SecondBattingTeamName'])
+        matches = matches[result & (matches['Runs1'] > 0)]
+
+        years, year_codes = np.unique(matches['Year'].to_numpy(), return_inverse=True)
+        grounds = pd.Index(ground_data['GroundName']).get_indexer(matches['GroundName']) + 1
+
+        target = np.where(matches['RevisedTarget'] > 0, matches['RevisedTarget'], matches['Runs1'] + 1)
+        bands = np.searchsorted(TARGET_EDGES, target, side='right')
+        decisions = (matches['TossTeam'] != matches['FirstBattingTeamName']).to_numpy(dtype=int)
+
+        # Every match falls into a single cell of the cube, whose counts are added up at once
+
+        shape = (len(years), len(ground_data) + 1, len(TARGET_BANDS), len(TOSS_DECISIONS))
+        cells = np.ravel_multi_index((year_codes, grounds, bands, decisions), shape)
+        size = int(np.prod(shape))
+
+        counts = {'Matches': np.bincount(cells, minlength=size),
+                  'TossWinnerWins': np.bincount(cells, weights=(matches['TossTeam'] == matches['Winner']).to_numpy(dtype=float), minlength=size),
+                  'ChaseWins': np.bincount(cells, weights=(matches['SecondBattingTeamName'] == matches['Winner']).to_numpy(dtype=float), minlength=size)}
+
+        filled = np.flatnonzero(counts['Matches'])
+        year_code, ground, band, decision = np.unravel_index(filled, shape)
+
+        cube = pd.DataFrame({'Year': years[year_code], 'GroundIndex': ground - 1, 'TargetBand': band, 'TossDecision': decision})
+        for measure in MEASURES:
+            cube[measure] = counts[measure][filled].astype(int)
+
+        return cube
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Returns a slice of the cube, adding up its cells by one of its dimensions (Year, GroundIndex, TargetBand or
+# TossDecision), for a single season if given, with the share of the matches won by the toss winner and by the chasing team
+# The grounds are joined back to their name and city in the ground statistics of the map, the bands and decisions to their labels
+
+def tossChaseSlice(cube, by, year=None, ground_stats=None):
+
+    try:
+        rows = cube if year is None else cube[cube['Year'] == year]
+        table = rows.groupby(by, as_index=False)[MEASURES].sum()
+
+        table['TossWinRate'] = (table['TossWinnerWins'] * 100 / table['Matches']).round(1)
+        table['ChaseWinRate'] = (table['ChaseWins'] * 100 / table['Matches']).round(1)
+
+        if by == 'GroundIndex':
+            table = table[table['GroundIndex'] >= 0].copy()
+            table['GroundName'] = ground_stats['GroundName'].to_numpy()[table['GroundIndex']]
+            table['City'] = ground_stats['City'].to_numpy()[table['GroundIndex']]
+        elif by == 'TargetBand':
+            table['TargetBand'] = pd.Categorical(np.asarray(TARGET_BANDS)[table['TargetBand']], categories=TARGET_BANDS)
+        elif by == 'TossDecision':
+            table['TossDecision'] = np.asarray(TOSS_DECISIONS)[table['TossDecision']]
+
+        return table.reset_index(drop=True)
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
@@ -0,0 +1,540 @@
+# Module describes what each tab of the app shows, as lightweight view descriptors
+# A view is a list of blocks, each one a tuple starting with its kind :
+# ('title', text), ('header', text), ('subheader', text), ('metrics', [(label, value), ...]), ('chart', key),
+# ('table', key) and ('html', key, width, height)
+# Charts, tables and html are only referenced by their key, i.e. their name followed by their arguments. The objects
+# themselves are built once per version of the data and held in caches shared by all the sessions, so the state held
+# for a session is the same small set of selections and keys whatever the number of users
+
+import sys
+
+import pandas as pd
+
+from src.cache import dataVersion, memoryCache
+from src.data_loader import DEFAULT_LEAGUE, SHARED_TABLES, fileStamps, leagueFiles, loadTables
+from src.elo import INITIAL_RATING, eloHistory
+from src.components.all_time_analysis import *
+from src.components.yearwise_analysis import *
+from src.components.franchisewise_analysis import *
+from src.components.playerwise_analysis import *
+from src.ground_map import groundMapHtml
+from src.phase_stats import loadPhaseStats, playerPhases, teamPhases
+from src.playoff_odds import playoffRace
+from src.pipeline import Pipeline
+from src.player_similarity import similarPlayers
+from src.repository import repository
+from src.toss_chase import tossChaseSlice
+from src.win_margins import closestFinishes, victoryMargins
+from src.exception import CustomException
+from src.logger import logging
+
+IPL_WINNERS = {
+    2008:'Rajasthan Royals',
+    2009:'Deccan Chargers',
+    2010:'Chennai Super Kings',
+    2011:'Chennai Super Kings',
+    2012:'Kolkata Knight Riders',
+    2013:'Mumbai Indians',
+    2014:'Kolkata Knight Riders',
+    2015:'Mumbai Indians',
+    2016:'Sunrisers Hyderabad',
+    2017:'Mumbai Indians',
+    2018:'Chennai Super Kings',
+    2019:'Mumbai Indians',
+    2020:'Mumbai Indians',
+    2021:'Chennai Super Kings',
+    2022:'Gujarat Titans',
+    2023:'Chennai Super Kings'
+}
+
+# Data the views are built from : the tables of a league, their repository and the version of their content
+
+class ViewData:
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.league = tables['player_stats']['League'].iloc[0] if 'League' in tables['player_stats'] and not tables['player_stats'].empty else DEFAULT_LEAGUE
+        self.player_stats = tables['player_stats']
+        self.points_table = tables['points_table']
+        self.matches = tables['matches']
+        self.ground_data = tables['ground_data']
+        self.repo = repository(tables)
+        self.pipeline = Pipeline(tables)
+        self.version = dataVersion(*tables.values())
+
+        # Phase splits of the players and teams, when the league has a ball-by-ball feed ingested
+
+        self.phases = loadPhaseStats(self.league)
+
+    # Returns a derived table of the pipeline, by its name
+
+    def node(self, name):
+        return self.pipeline.node(name)
+
+# Returns the view data of the given tables, shared by all the sessions as long as the content of the tables is the same
+
+def viewData(tables):
+
+    try:
+        version = dataVersion(*tables.values())
+        cache = memoryCache('view_data')
+
+        return cache.getOrCompute(version, lambda: ViewData(tables))
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Returns the view data of a league as the tabs load it : the whole league, or only the given season of it
+# The view data is looked up by the stamps of the data files of the league (path, modification time and size) before
+# anything is loaded or hashed, so a rerun of a session only stats the files
+
+def leagueData(league=None, year=None):
+
+    league = league or DEFAULT_LEAGUE
+    key = ('league', league, year, SHARED_TABLES, fileStamps(leagueFiles(league).values()))
+
+    return memoryCache('view_data').getOrCompute(key, lambda: viewData(loadTables(league=league, years=None if year is None else [year])))
+
+# Returns the toss and chase cube of the whole league of the view data, which the charts of a single season slice by
+# year rather than building a cube per season
+
+def leagueCube(data):
+
+    return leagueData(data.league).node('tossChaseCube')
+
+# Returns the object of a key from the given cache, building it on first use for this version of the data
+
+def _cached(cache_name, data, key, build):
+
+    return memoryCache(cache_name).getOrCompute((data.version, key), build)
+
+# Tables shown in the tabs, or shared by several of their charts
+
+def titlesTable(data):
+
+    winners = IPL_WINNERS if data.league == DEFAULT_LEAGUE else {year: champion(data, year) for year in years(data)}
+
+    teamwise_winners = {}
+    for year,team in winners.items():
+        teamwise_winners.setdefault(team, []).append(year)
+
+    win_count = {team: len(years) for team, years in teamwise_winners.items()}
+
+    return pd.DataFrame({'Team Name':list(win_count.keys()),'Wins':list(win_count.values())}).sort_values(['Wins','Team Name'],ascending=[False,True])
+
+def bestBattingTable(data, nationality):
+
+    player_stats = data.repo.playerStats(nationality=nationality)
+    return player_stats[player_stats['BestScore'] != 'Not Available'].sort_values(['HighestScore','IsNotDismissed'],ascending=[False,True])[['Name','BestScore','Year']].head(20)
+
+def bestBowlingTable(data, nationality):
+
+    player_stats = data.repo.playerStats(nationality=nationality)
+    return player_stats.sort_values(['BestBowlingWickets','BestBowlingRuns','Year'],ascending=[False,True,True])[['Name','BestBowling','Year']].drop_duplicates(['Name','BestBowling']).head(20)
+
+def closestFinishesTable(data):
+
+    return closestFinishes(data.matches).head(20)
+
+def pointsTableView(data, year):
+
+    table = data.repo.pointsTable(year=year)[['Standings','TeamName','Matches','Wins','Loss','Tied','NoResult','Points','NetRunRate']]
+    return table.rename(columns={'TeamName':'Team','Wins':'Win','Tied':'Tie','NoResult':'No Result','NetRunRate':'Net Run Rate'})
+
+def teamsRepresentedTable(data, player):
+
+    return data.repo.playerStats(player=player)[['TeamName','Year']].rename(columns={'TeamName':'Team Name'})
+
+def franchiseRunsTable(data):
+
+    return data.node('franchiseTotals').set_index(['TeamName','Name'])[['TotalRuns']].sort_values('TotalRuns',ascending=False).reset_index()
+
+def franchiseWicketsTable(data):
+
+    return data.node('franchiseTotals').set_index(['TeamName','Name'])[['Wickets']].sort_values('Wickets',ascending=False).reset_index()
+
+# Outcomes of the matches between two franchises, along with the color of each outcome in the head to head charts
+# Has no Wins column when the franchises never met
+
+def headToHeadTable(data, franchise1, franchise2):
+
+    counts = data.node('headToHeadCounts')
+    team1, team2 = sorted([franchise1, franchise2])
+    pair = counts[(counts['Team1'] == team1) & (counts['Team2'] == team2)]
+    head_to_head = pd.DataFrame({'Team':pair['Winner'].tolist(),'Wins':pair['Wins'].tolist()})
+
+    if head_to_head.empty:
+        head_to_head = pd.DataFrame({'Team':[franchise1,franchise2]})
+        head_to_head['Color'] = '#F8D210'
+        head_to_head.iloc[0,-1] = '#FA26A0'
+        return head_to_head
+
+    winners = head_to_head.Team.tolist()
+    results = head_to_head.Wins.tolist()
+
+    if 'No Result' in winners:
+        position = winners.index('No Result')
+        winners.pop(position)
+        no_result = results.pop(position)
+
+        head_to_head = pd.DataFrame({'Team':winners,'Wins':results})
+        temp = pd.DataFrame({'Team':['No Result'],'Wins':[no_result]})
+
+        head_to_head = head_to_head.sort_values('Wins',ascending=False)
+
+        head_to_head['Color'] = '#F8D210'
+        head_to_head.iloc[0,-1] = '#FA26A0'
+
+        temp['Color'] = '#2FF3E0'
+
+        head_to_head = pd.concat([head_to_head,temp],ignore_index=True)
+        head_to_head = head_to_head.sort_values('Wins',ascending=False)
+
+    else:
+        head_to_head['Color'] = '#F8D210'
+        head_to_head.iloc[0,-1] = '#FA26A0'
+
+    return head_to_head
+
+TABLES = {
+    'titles': titlesTable,
+    'bestBatting': bestBattingTable,
+    'bestBowling': bestBowlingTable,
+    'closestFinishes': closestFinishesTable,
+    'pointsTable': pointsTableView,
+    'teamsRepresented': teamsRepresentedTable,
+    'franchiseRuns': franchiseRunsTable,
+    'franchiseWickets': franchiseWicketsTable,
+    'headToHead': headToHeadTable
+}
+
+# Charts shown in the tabs, each one built from the view data and the arguments of its key
+
+CHARTS = {
+    'topTitlesGraph': lambda data: topTitlesGraph(viewTable(data, ('titles',))),
+    'topWinsTeamGraph': lambda data: topWinsTeamGraph(data.matches),
+    'playerStrength': lambda data: playerStrength(data.player_stats),
+    'topRunsGraph': lambda data, nationality: topRunsGraph(data.node('careerTotals'),nationality),
+    'topWicketsGraph': lambda data, nationality: topWicketsGraph(data.node('careerTotals'),nationality),
+    'battingLandmark': lambda data, nationality: battingLandmark(data.node('seasonTotals'),nationality),
+    'bowlingLandmark': lambda data, nationality: bowlingLandmark(data.node('seasonTotals'),nationality),
+    'boundaryCount': lambda data, nationality: boundaryCount(data.node('seasonTotals'),nationality),
+    'tossChaseSeasonGraph': lambda data: tossChaseSeasonGraph(tossChaseSlice(data.node('tossChaseCube'),'Year')),
+    'chaseTargetGraph': lambda data: chaseTargetGraph(tossChaseSlice(data.node('tossChaseCube'),'TargetBand')),
+    'chaseGroundGraph': lambda data: chaseGroundGraph(tossChaseSlice(data.node('tossChaseCube'),'GroundIndex',ground_stats=data.node('groundStats'))),
+    'largestWinsGraph': lambda data: largestWinsGraph(victoryMargins(data.matches)),
+    'marginsByTeamGraph': lambda data: marginDistributionGraph(victoryMargins(data.matches),'Winner'),
+    'marginsByGroundGraph': lambda data: marginDistributionGraph(victoryMargins(data.matches),'GroundName',min_wins=15),
+    'pointsTableGraph': lambda data, year: pointsTableGraph(viewTable(data, ('pointsTable', year))),
+    'tossDecisionGraph': lambda data, year: tossDecisionGraph(tossChaseSlice(leagueCube(data),'TossDecision',year=year),year),
+    'chaseTargetYearGraph': lambda data, year: chaseTargetGraph(tossChaseSlice(leagueCube(data),'TargetBand',year=year)),
+    'playoffRaceGraph': lambda data, year: playoffRaceGraph(playoffRace(data.repo.matches(year=year),data.repo.pointsTable(year=year),year),year),
+    'topRunsYearGraph': lambda data, year: topRunsYearGraph(data.repo.playerStats(year=year),year),
+    'topWicketsYearGraph': lambda data, year: topWicketsYearGraph(data.repo.playerStats(year=year),year),
+    'topStrikerBat': lambda data, year: topStrikerBat(data.repo.playerStats(year=year),year),
+    'topStrikerBowl': lambda data, year: topStrikerBowl(data.repo.playerStats(year=year),year),
+    'teamPhaseGraph': lambda data, year: teamPhaseGraph(teamPhases(data.phases,year),year),
+    'franchiseRunsGraph': lambda data, year, franchise: franchiseRunsGraph(data.repo.franchiseTopScorers(year,franchise),year,franchise),
+    'franchiseWicketsGraph': lambda data, year, franchise: franchiseWicketsGraph(data.repo.playerStats(year=year,franchise=franchise),year,franchise),
+    'franchiseTotalRuns': lambda data, franchise: franchiseTotalRuns(data.node('franchiseTotals'),franchise),
+    'franchiseTotalWickets': lambda data, franchise: franchiseTotalWickets(data.node('franchiseTotals'),franchise),
+    'standings': lambda data, franchise: standings(data.repo.pointsTable(franchise=franchise),franchise),
+    'eloRating': lambda data, franchise: eloRating(eloHistory(data.matches,league=data.league),franchise,INITIAL_RATING),
+    'avgAge': lambda data, franchise: avgAge(data.player_stats,franchise),
+    'headToHead': lambda data, franchise1, franchise2: headToHead(viewTable(data, ('headToHead', franchise1, franchise2))),
+    'headToHeadRuns': lambda data, franchise1, franchise2: headToHeadRuns(viewTable(data, ('franchiseRuns',)),franchise1,franchise2,viewTable(data, ('headToHead', franchise1, franchise2))),
+    'headToHeadWickets': lambda data, franchise1, franchise2: headToHeadWickets(viewTable(data, ('franchiseWickets',)),franchise1,franchise2,viewTable(data, ('headToHead', franchise1, franchise2))),
+    'headToHeadStandings': lambda data, franchise1, franchise2: headToHeadStandings(data.points_table,franchise1,franchise2,viewTable(data, ('headToHead', franchise1, franchise2))),
+    'headToHeadAge': lambda data, franchise1, franchise2: headToHeadAge(data.player_stats,franchise1,franchise2,viewTable(data, ('headToHead', franchise1, franchise2))),
+    'batStats': lambda data, player: batStats(data.repo.playerStats(player=player),player),
+    'bowlStats': lambda data, player: bowlStats(data.repo.playerStats(player=player),player),
+    'runsPerSeason': lambda data, player: runsPerSeason(data.repo.playerStats(player=player),player),
+    'strikeRatePerSeason': lambda data, player: strikeRatePerSeason(data.repo.playerStats(player=player),player),
+    'averagePerSeason': lambda data, player: averagePerSeason(data.repo.playerStats(player=player),player),
+    'wicketsPerSeason': lambda data, player: wicketsPerSeason(data.repo.playerStats(player=player),player),
+    'bowlingStrikeRatePerSeason': lambda data, player: bowlingStrikeRatePerSeason(data.repo.playerStats(player=player),player),
+    'economyPerSeason': lambda data, player: economyPerSeason(data.repo.playerStats(player=player),player),
+    'phaseStrikeRatePerSeason': lambda data, player: phaseStrikeRatePerSeason(playerPhases(data.phases,player),player),
+    'phaseEconomyPerSeason': lambda data, player: phaseEconomyPerSeason(playerPhases(data.phases,player),player),
+    'similarPlayersGraph': lambda data, player, season: similarPlayersGraph(similarPlayers(data.player_stats,player,season),player if season is None else f'{player} ({season})')
+}
+
+# Charts of the year-wise tab, which the app draws from the partitions of the selected season only
+
+SEASON_CHARTS = ['pointsTableGraph','playoffRaceGraph','topRunsYearGraph','topWicketsYearGraph','topStrikerBat','topStrikerBowl','teamPhaseGraph','franchiseRunsGraph','franchiseWicketsGraph']
+
+# Returns the view data a chart is drawn from in the app
+
+def chartData(league, key):
+
+    return leagueData(league, key[1] if key[0] in SEASON_CHARTS else None)
+
+# Html components shown in the tabs
+
+HTML = {
+    'groundMap': lambda data: groundMapHtml(data.ground_data,data.matches,stats=data.node('groundStats') if data.pipeline.enabled else None,version=data.version)
+}
+
+# Returns the table, chart or html of a key, from the caches shared by all the sessions
+
+def viewTable(data, key):
+
+    return _cached('view_tables', data, key, lambda: TABLES[key[0]](data, *key[1:]))
+
+def viewChart(data, key):
+
+    return _cached('figures', data, key, lambda: CHARTS[key[0]](data, *key[1:]))
+
+def viewHtml(data, key):
+
+    return HTML[key[0]](data, *key[1:])
+
+# Returns the view of a tab for the given selection, built once per version of the data
+
+def _view(data, name, build, *args):
+
+    return _cached('views', data, (name, *args), lambda: build(data, *args))
+
+# Options of the selectors of the tabs
+
+def nationalities(data):
+
+    return _cached('views', data, ('nationalities',), lambda: ['Indian and Overseas'] + data.player_stats['Nationality'].unique().tolist())
+
+def years(data):
+
+    return _cached('views', data, ('years',), lambda: data.player_stats['Year'].unique().tolist())
+
+def yearFranchises(data, year):
+
+    def build():
+        franchises = sorted(data.repo.playerStats(year=year)['TeamName'].unique().tolist())
+        if data.league == DEFAULT_LEAGUE and year == 2009 and 'Delhi Capitals' in franchises:
+            franchises.remove('Delhi Capitals')
+        return franchises
+
+    return _cached('views', data, ('yearFranchises', year), build)
+
+def franchises(data):
+
+    return _cached('views', data, ('franchises',), lambda: sorted(data.player_stats['TeamName'].unique().tolist()))
+
+def playerSeasons(data, player):
+
+    return _cached('views', data, ('playerSeasons', player), lambda: data.repo.playerStats(player=player)['Year'].unique().tolist())
+
+# Returns the champion of a season, or the team on top of its points table for the seasons with no known champion, such
+# as those of the other leagues or of a synthetic dataset
+
+def champion(data, year):
+
+    if data.league == DEFAULT_LEAGUE and year in IPL_WINNERS:
+        return IPL_WINNERS[year]
+
+    table = data.repo.pointsTable(year=year)
+    return table.sort_values('Standings', kind='stable')['TeamName'].iloc[0] if not table.empty else 'Not Available'
+
+# Generates the view of the all-time analysis tab
+
+def _allTimeView(data, nationality):
+
+    editions = data.player_stats['Year'].unique().shape[0]
+    teams_participated = data.player_stats['TeamName'].unique().shape[0]
+    matches_played = data.matches.shape[0]
+
+    return [('title', 'All-time Analysis'),
+            ('header', ''),
+            ('metrics', [('Editions', editions), ('Teams', teams_participated), ('Matches', matches_played)]),
+            ('chart', ('topTitlesGraph',)),
+            ('subheader', 'Distribution of Wins'),
+            ('chart', ('topWinsTeamGraph',)),
+            ('subheader', 'Player Participation over the Years'),
+            ('chart', ('playerStrength',)),
+            ('subheader', f'Top 10 Run Scorers of All Time ({nationality})'),
+            ('chart', ('topRunsGraph', nationality)),
+            ('subheader', f'Top 10 Wicket Takers of All Time ({nationality})'),
+            ('chart', ('topWicketsGraph', nationality)),
+            ('subheader', f'Highest Individual Scores ({nationality})'),
+            ('table', ('bestBatting', nationality)),
+            ('subheader', f'Best Bowling Figures ({nationality})'),
+            ('table', ('bestBowling', nationality)),
+            ('subheader', f'50s and 100s over the Years ({nationality})'),
+            ('chart', ('battingLandmark', nationality)),
+            ('subheader', f'4 and 5 Wicket Hauls over the Years ({nationality})'),
+            ('chart', ('bowlingLandmark', nationality)),
+            ('subheader', f'Boundary Count over the Years ({nationality})'),
+            ('chart', ('boundaryCount', nationality)),
+            ('subheader', 'Toss and Chase over the Years'),
+            ('chart', ('tossChaseSeasonGraph',)),
+            ('chart', ('chaseTargetGraph',)),
+            ('chart', ('chaseGroundGraph',)),
+            ('subheader', 'Largest Wins'),
+            ('chart', ('largestWinsGraph',)),
+            ('subheader', 'Closest Finishes'),
+            ('table', ('closestFinishes',)),
+            ('subheader', 'Margins of Victory by Team'),
+            ('chart', ('marginsByTeamGraph',)),
+            ('subheader', 'Margins of Victory by Ground (at least 15 wins)'),
+            ('chart', ('marginsByGroundGraph',)),
+            ('subheader', 'Ground-wise statistics'),
+            ('html', ('groundMap',), 800, 500)]
+
+def allTimeView(data, nationality):
+
+    return _view(data, 'allTime', _allTimeView, nationality)
+
+# Generates the view of the year-wise analysis tab, up to the franchise selector
+
+def _yearView(data, year):
+
+    players = data.repo.playerStats(year=year)['Name'].unique().shape[0]
+    matches_played = data.repo.matches(year=year).shape[0]
+
+    phase_blocks = []
+    if data.phases is not None and len(data.phases['teams'].rows(Year=year)):
+        phase_blocks = [('subheader', 'Run Rate and Economy by Phase (Powerplay, Middle and Death Overs)'),
+                        ('chart', ('teamPhaseGraph', year))]
+
+    return [('title', 'Year-wise Analysis'),
+            ('header', ''),
+            ('header', f'Champions : {champion(data, year)}'),
+            ('header', ''),
+            ('metrics', [('Matches', matches_played), ('Players', players)]),
+            ('header', ''),
+            ('subheader', f'Points Table {year}'),
+            ('table', ('pointsTable', year)),
+            ('chart', ('pointsTableGraph', year)),
+            ('subheader', f'Chances of Reaching the Playoffs over the Season {year}'),
+            ('chart', ('playoffRaceGraph', year)),
+            ('subheader', f'Top 10 Run Scorers in {data.league} {year}'),
+            ('chart', ('topRunsYearGraph', year)),
+            ('subheader', f'Top 10 Wicket Takers in {data.league} {year}'),
+            ('chart', ('topWicketsYearGraph', year)),
+            ('subheader', 'Highest Batting Strike Rate (with atleast 200 runs)'),
+            ('chart', ('topStrikerBat', year))] + phase_blocks + [
+            ('subheader', 'Highest Bowling Strike Rate (with atleast 10 wickets)'),
+            ('chart', ('topStrikerBowl', year)),
+            ('subheader', f'Toss and Chase in {year}'),
+            ('chart', ('tossDecisionGraph', year)),
+            ('chart', ('chaseTargetYearGraph', year))]
+
+def yearView(data, year):
+
+    return _view(data, 'year', _yearView, year)
+
+# Generates the view of a franchise within the year-wise analysis tab
+
+def _yearFranchiseView(data, year, franchise):
+
+    franchise_matches = data.repo.matches(year=year,franchise=franchise)
+
+    wins = franchise_matches[franchise_matches['Winner'] == franchise].Winner.value_counts().sum()
+    loss = franchise_matches[(franchise_matches['Winner'] != franchise) & (franchise_matches['Winner'] != 'No Result')].Winner.value_counts().sum()
+    ties = franchise_matches[(franchise_matches['Winner'] == 'Tie') | (franchise_matches['Winner'] == 'No Result')].Winner.value_counts().sum()
+
+    return [('header', ''),
+            ('metrics', [('Wins', wins), ('Losses', loss), ('Ties/No Result', ties)]),
+            ('header', ''),
+            ('subheader', f'Top 5 Run Scorers for {franchise} in {data.league} {year}'),
+            ('chart', ('franchiseRunsGraph', year, franchise)),
+            ('subheader', f'Top 5 Wicket Takers for {franchise} in {data.league} {year}'),
+            ('chart', ('franchiseWicketsGraph', year, franchise))]
+
+def yearFranchiseView(data, year, franchise):
+
+    return _view(data, 'yearFranchise', _yearFranchiseView, year, franchise)
+
+# Generates the view of the franchise-wise analysis tab, up to the selector of the franchise to compare with
+
+def _franchiseView(data, franchise):
+
+    franchise_matches = data.repo.matches(franchise=franchise)
+
+    seasons = franchise_matches['Year'].unique().shape[0]
+    matches_played = franchise_matches.shape[0]
+    wins = franchise_matches[franchise_matches['Winner'] == franchise].shape[0]
+
+    return [('title', 'Franchise-wise Analysis'),
+            ('header', ''),
+            ('metrics', [('Seasons', seasons), ('Matches', matches_played), ('Wins', wins)]),
+            ('header', ''),
+            ('subheader', f'Top 10 Run Scorers for {franchise} (All Time)'),
+            ('chart', ('franchiseTotalRuns', franchise)),
+            ('subheader', f'Top 10 Wicket Takers for {franchise} (All Time)'),
+            ('chart', ('franchiseTotalWickets', franchise)),
+            ('subheader', f'Group Stage Standings - {franchise}'),
+            ('chart', ('standings', franchise)),
+            ('subheader', f'Elo Rating over the Matches - {franchise}'),
+            ('chart', ('eloRating', franchise)),
+            ('subheader', f'Average Age Comparison - {franchise}'),
+            ('chart', ('avgAge', franchise)),
+            ('header', ''),
+            ('subheader', 'Compare with a Franchise'),
+            ('header', '')]
+
+def franchiseView(data, franchise):
+
+    return _view(data, 'franchise', _franchiseView, franchise)
+
+# Generates the view comparing two franchises within the franchise-wise analysis tab
+
+def _headToHeadView(data, franchise1, franchise2):
+
+    blocks = []
+    if 'Wins' in viewTable(data, ('headToHead', franchise1, franchise2)).columns:
+        blocks.append(('chart', ('headToHead', franchise1, franchise2)))
+
+    return blocks + [('subheader', 'Top Run Scorers (All Time)'),
+                     ('chart', ('headToHeadRuns', franchise1, franchise2)),
+                     ('subheader', 'Top Wicket Takers (All Time)'),
+                     ('chart', ('headToHeadWickets', franchise1, franchise2)),
+                     ('subheader', 'Standings over the Years'),
+                     ('chart', ('headToHeadStandings', franchise1, franchise2)),
+                     ('subheader', 'Average Age Comparison'),
+                     ('chart', ('headToHeadAge', franchise1, franchise2))]
+
+def headToHeadView(data, franchise1, franchise2):
+
+    return _view(data, 'headToHead', _headToHeadView, franchise1, franchise2)
+
+# Generates the view of the player-wise analysis tab, up to the similar players selectors
+
+def _playerView(data, player):
+
+    player_rows = data.repo.playerStats(player=player)
+
+    style = player_rows['BattingStyle'].iloc[0]
+    batting_style = 'Right Handed Batsman' if style == 'rhb' else 'Left Handed Batsman'
+
+    phase_strike_rate, phase_economy = [], []
+    if data.phases is not None and len(data.phases['players'].rows(Name=player)):
+        phase_strike_rate, phase_economy = [('chart', ('phaseStrikeRatePerSeason', player))], [('chart', ('phaseEconomyPerSeason', player))]
+
+    return [('title', 'Player-wise Analysis'),
+            ('header', ''),
+            ('metrics', [('Date of Birth', player_rows['PlayerDOB'].iloc[0]), ('Batting Style', batting_style), ('Nationality', player_rows['Nation'].iloc[0])]),
+            ('header', ''),
+            ('subheader', 'Teams Represented'),
+            ('table', ('teamsRepresented', player)),
+            ('subheader', 'Career Stats'),
+            ('chart', ('batStats', player)),
+            ('chart', ('bowlStats', player)),
+            ('subheader', 'Year-wise Stats'),
+            ('chart', ('runsPerSeason', player)),
+            ('chart', ('strikeRatePerSeason', player))] + phase_strike_rate + [
+            ('chart', ('averagePerSeason', player)),
+            ('chart', ('wicketsPerSeason', player)),
+            ('chart', ('bowlingStrikeRatePerSeason', player)),
+            ('chart', ('economyPerSeason', player))] + phase_economy + [
+            ('subheader', 'Similar Players')]
+
+def playerView(data, player):
+
+    return _view(data, 'player', _playerView, player)
+
+# Generates the view of the players most similar to a player, by career or by one of their seasons
+
+def similarPlayersView(data, player, season=None):
+
+    return [('chart', ('similarPlayersGraph', player, season))]
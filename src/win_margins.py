@@ -0,0 +1,90 @@
+# Module parses the result of every match, held as text in the WinDetails column of the matches (e.g. "won by 3 wickets",
+# "won by 24 runs (d/l method)", "Match tied( won the Super Over)"), into typed columns : the type of the margin (Runs,
+# Wickets, Super Over or No Result), its value and whether the target was revised by the DLS method
+# The column is parsed with vectorized regular expressions when the tables are loaded (see src.data_loader.enrichTables),
+# so the charts only ever read the typed columns
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from src.exception import CustomException
+from src.logger import logging
+
+MARGIN_TYPES = ['Runs', 'Wickets', 'Super Over', 'No Result']
+
+# Columns added to the matches
+
+MARGIN_COLUMNS = ['MarginType', 'MarginValue', 'DLS']
+
+# Margins up to which a finish is counted as close
+
+CLOSE_RUNS = 5
+
+CLOSE_WICKETS = 2
+
+# Parses the results of the matches into their margin type, margin value and DLS flag, aligned with the given results
+# Ties decided by a super over or by an eliminator over have no margin value, nor do the matches with no result
+
+def parseWinDetails(details):
+
+    try:
+        details = details.fillna('').str.lower()
+        margin = details.str.extract(r'won by\s+(\d+)\s+(run|wicket)', expand=True)
+
+        margin_type = np.select([margin[1] == 'run', margin[1] == 'wicket',
+                                 details.str.contains('super over|eliminator'), details.str.contains('no result|abandoned')],
+                                MARGIN_TYPES, None)
+
+        return pd.DataFrame({'MarginType': margin_type,
+                             'MarginValue': pd.to_numeric(margin[0]).astype(float),
+                             'DLS': details.str.contains(r'd/l|dls', regex=True).astype(bool)},
+                            index=details.index)
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Returns the matches won by a margin of runs or wickets, with their winner, loser and margin
+
+def victoryMargins(matches):
+
+    try:
+        won = matches[matches['MarginType'].isin(['Runs','Wickets'])]
+        loser = np.where(won['Winner'] == won['FirstBattingTeamName'], won['SecondBattingTeamName'], won['FirstBattingTeamName'])
+
+        return pd.DataFrame({'Year': won['Year'].to_numpy(), 'Date': won['MATCH_COMMENCE_START_DATE'].str[:10].to_numpy(),
+                             'Winner': won['Winner'].to_numpy(), 'Loser': loser, 'GroundName': won['GroundName'].to_numpy(),
+                             'MarginType': won['MarginType'].to_numpy(), 'MarginValue': won['MarginValue'].to_numpy().astype(int),
+                             'DLS': won['DLS'].to_numpy(), 'Overs2': won['Overs2'].to_numpy()})
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
+
+# Returns the closest finishes : the ties decided by a super over, and the wins by at most CLOSE_RUNS runs or
+# CLOSE_WICKETS wickets, the closest first and the latest first among as close ones
+
+def closestFinishes(matches):
+
+    try:
+        close = matches[(matches['MarginType'] == 'Super Over')
+                        | ((matches['MarginType'] == 'Runs') & (matches['MarginValue'] <= CLOSE_RUNS))
+                        | ((matches['MarginType'] == 'Wickets') & (matches['MarginValue'] <= CLOSE_WICKETS))]
+
+        loser = np.where(close['Winner'] == close['FirstBattingTeamName'], close['SecondBattingTeamName'], close['FirstBattingTeamName'])
+        margin = np.where(close['MarginType'] == 'Super Over', 'Super Over',
+                          'by ' + close['MarginValue'].fillna(0).astype(int).astype(str) + ' ' + close['MarginType'].astype(object).str.lower().str.rstrip('s')
+                          + np.where(close['MarginValue'] == 1, '', 's'))
+
+        table = pd.DataFrame({'Year': close['Year'].to_numpy(), 'Date': close['MATCH_COMMENCE_START_DATE'].str[:10].to_numpy(),
+                              'Winner': close['Winner'].to_numpy(), 'Loser': loser,
+                              'Result': np.where(close['DLS'], margin + ' (DLS)', margin), 'Ground': close['GroundName'].to_numpy(),
+                              'Order': np.where(close['MarginType'] == 'Super Over', 0, np.where(close['MarginType'] == 'Runs', close['MarginValue'], close['MarginValue'] * CLOSE_RUNS / CLOSE_WICKETS))})
+
+        return table.sort_values(['Order','Date'], ascending=[True,False], kind='stable').drop(columns='Order').reset_index(drop=True)
+
+    except Exception as e:
+        logging.error(CustomException(e,sys))
+        raise CustomException(e,sys)
@@ -0,0 +1,41 @@
+# Tests of the ingestion of a ball-by-ball feed, read in chunks or all at once
+
+import pandas as pd
+import pytest
+
+from src.ball_ingest import PARTIALS, ingestTotals
+from src.data_loader import loadTables
+from src.synthetic import writeBallFeed
+
+@pytest.fixture(scope='module')
+def feed(tmp_path_factory):
+
+    tables = loadTables()
+    years = sorted(tables['matches']['Year'].unique())[:2]
+    tables = {name: table[table['Year'].isin(years)] for name, table in tables.items() if name in ['player_stats', 'matches']}
+
+    path = str(tmp_path_factory.mktemp('feed') / 'balls.csv')
+    writeBallFeed(tables, path, seed=0)
+
+    return path
+
+def assertSameTotals(totals, reference):
+
+    assert set(totals) == set(PARTIALS)
+    for name in PARTIALS:
+        pd.testing.assert_frame_equal(totals[name].sort_index(), reference[name].sort_index(), check_dtype=False, obj=name)
+
+# Chunks cutting through the overs, innings and matches add up to the totals of the feed read in one go
+
+@pytest.mark.parametrize('chunk_rows', [97, 1000, 25000])
+def test_chunked_ingest_matches_whole(feed, chunk_rows):
+
+    assertSameTotals(ingestTotals(feed, chunk_rows=chunk_rows), ingestTotals(feed, chunk_rows=None))
+
+def test_totals_count_every_ball(feed):
+
+    balls = pd.read_csv(feed)
+    totals = ingestTotals(feed, chunk_rows=500)
+
+    assert totals['innings']['Runs'].sum() == balls['BatterRuns'].sum() + balls['ExtraRuns'].sum()
+    assert totals['batting']['TotalRuns'].sum() == balls['BatterRuns'].sum()
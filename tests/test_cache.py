@@ -0,0 +1,103 @@
+# Tests of the caches shared by the sessions : a missing entry is computed once for concurrent requests, and the least
+# recently used entries are evicted beyond the memory budget
+
+import itertools
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src import cache
+from src.cache import MemoryCache, memoryCache
+
+_names = itertools.count()
+
+@pytest.fixture
+def memory_cache():
+
+    return memoryCache(f'test_{next(_names)}')
+
+def test_get_or_compute(memory_cache):
+
+    calls = []
+    build = lambda: calls.append(1) or 'value'
+
+    assert memory_cache.getOrCompute('key', build) == 'value'
+    assert memory_cache.getOrCompute('key', build) == 'value'
+    assert len(calls) == 1
+
+# Concurrent requests for a missing entry wait for the value of the first one rather than each computing it
+
+def test_single_flight(memory_cache):
+
+    calls = []
+    release = threading.Event()
+
+    def build():
+        calls.append(1)
+        release.wait(5)
+        return object()
+
+    results = [None] * 8
+
+    def request(position):
+        results[position] = memory_cache.getOrCompute('key', build)
+
+    threads = [threading.Thread(target=request, args=(position,)) for position in range(len(results))]
+    for thread in threads:
+        thread.start()
+
+    deadline = time.time() + 5
+    while memory_cache.coalesced < len(threads) - 1 and time.time() < deadline:
+        time.sleep(0.01)
+    release.set()
+
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert memory_cache.coalesced == len(threads) - 1
+    assert all(result is results[0] for result in results)
+
+# The requests waiting on a build that fails get its error, and the next request computes the entry again
+
+def test_single_flight_error(memory_cache):
+
+    def fail():
+        raise ValueError('build failed')
+
+    with pytest.raises(ValueError):
+        memory_cache.getOrCompute('key', fail)
+
+    assert 'key' not in memory_cache
+    assert memory_cache.getOrCompute('key', lambda: 'value') == 'value'
+
+# Beyond the budget, the least recently used entries across all the caches are evicted first
+
+def test_eviction(monkeypatch):
+
+    monkeypatch.setattr(cache, 'BUDGET_MB', 1.0)
+    first, second = memoryCache(f'test_{next(_names)}'), memoryCache(f'test_{next(_names)}')
+    block = lambda: np.zeros(400 * 1024 // 8)
+
+    first.getOrCompute('a', block)
+    second.getOrCompute('b', block)
+    first.get('a')
+    second.getOrCompute('c', block)
+
+    assert 'a' in first and 'c' in second
+    assert 'b' not in second
+    assert second.evictions == 1
+    assert sum(memory_cache.totalSize() for memory_cache in cache.memoryCaches()) <= 1024 * 1024
+
+def test_no_budget(monkeypatch):
+
+    monkeypatch.setattr(cache, 'BUDGET_MB', 0)
+    memory_cache = MemoryCache('unregistered')
+
+    for key in range(20):
+        memory_cache.set(key, np.zeros(100 * 1024))
+
+    assert len(memory_cache) == 20
+    assert memory_cache.evictions == 0
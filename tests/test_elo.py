@@ -0,0 +1,70 @@
+# Tests of the Elo engine, rating the matches it has not rated yet rather than the whole history again
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_loader import loadTables
+from src.elo import EloEngine
+
+@pytest.fixture(scope='module')
+def matches():
+
+    return loadTables()['matches']
+
+def replay(matches):
+
+    engine = EloEngine()
+    engine.update(matches)
+
+    return engine
+
+def assertSameRatings(engine, reference):
+
+    assert engine.teams == reference.teams
+    np.testing.assert_array_equal(engine.ratings, reference.ratings)
+    pd.testing.assert_frame_equal(engine.ratingHistory(), reference.ratingHistory())
+
+# Rating the seasons as they are added gives the ratings of rating the whole history at once
+
+def test_incremental_update_matches_replay(matches):
+
+    engine = EloEngine()
+    for year in sorted(matches['Year'].unique()):
+        engine.update(matches[matches['Year'] <= year])
+
+    assert engine.rated == len(matches)
+    assertSameRatings(engine, replay(matches))
+
+def test_update_without_new_matches(matches):
+
+    engine = replay(matches)
+
+    assert engine.update(matches) == 0
+    assertSameRatings(engine, replay(matches))
+
+# A match rated before changing rates the whole history again
+
+def test_changed_history_is_replayed(matches):
+
+    first_season = matches['Year'] == matches['Year'].min()
+
+    engine = EloEngine()
+    engine.update(matches[first_season])
+
+    changed = matches.copy()
+    changed.loc[first_season, 'Winner'] = changed.loc[first_season, 'SecondBattingTeamName']
+
+    assert engine.update(changed) == len(changed)
+    assertSameRatings(engine, replay(changed))
+
+def test_save_and_load(matches, tmp_path):
+
+    engine = replay(matches)
+    path = str(tmp_path / 'elo.npz')
+    engine.save(path)
+
+    loaded = EloEngine.load(path)
+
+    assert loaded.update(matches) == 0
+    assertSameRatings(loaded, engine)
@@ -0,0 +1,51 @@
+# Tests of the search index over the player names
+
+import pytest
+
+from src.player_search import PlayerSearchIndex, normalizeName
+
+NAMES = ['MS Dhoni', 'Mahendra Singh Dhoni', 'Virat Kohli', 'KS Bharat', 'K.S Bharat', 'Faf du Plessis', 'Faf Du Plessis',
+         'Rohit Sharma', 'Ishant Sharma', 'José Muñoz', 'Virat Kohli']
+
+@pytest.fixture(scope='module')
+def index():
+
+    return PlayerSearchIndex(NAMES)
+
+def test_normalize_name():
+
+    assert normalizeName('K.S Bharat') == 'k s bharat'
+    assert normalizeName('José Muñoz') == 'jose munoz'
+
+# Duplicates are dropped, and names differing only in case are ordered by the name itself
+
+def test_names(index):
+
+    assert len(index) == len(set(NAMES))
+    assert index.names == sorted(set(NAMES), key=lambda name: (name.lower(), name))
+    assert index.names.index('Faf Du Plessis') < index.names.index('Faf du Plessis')
+
+def test_exact_match_first(index):
+
+    assert index.query('virat kohli')[0] == 'Virat Kohli'
+    assert index.query('ks bharat')[:2] == ['K.S Bharat', 'KS Bharat']
+
+def test_prefix(index):
+
+    assert set(index.query('sharma')) >= {'Rohit Sharma', 'Ishant Sharma'}
+    assert index.query('roh')[0] == 'Rohit Sharma'
+
+def test_initials(index):
+
+    assert index.query('msd')[0] == 'Mahendra Singh Dhoni'
+    assert 'MS Dhoni' in index.query('ms dhoni')[:2]
+
+def test_typos_and_accents(index):
+
+    assert index.query('viart kohli')[0] == 'Virat Kohli'
+    assert index.query('jose munoz')[0] == 'José Muñoz'
+
+def test_empty_query_and_limit(index):
+
+    assert index.query('', limit=3) == index.names[:3]
+    assert len(index.query('a', limit=2)) <= 2
@@ -0,0 +1,44 @@
+# Tests of the simulation of the playoff odds, whose results only depend on the seed and the number of workers
+
+import pandas as pd
+import pytest
+
+from src.data_loader import loadTables
+from src.playoff_odds import seasonOdds
+
+@pytest.fixture(scope='module')
+def season():
+
+    tables = loadTables()
+    return tables['matches'], tables['points_table'], int(tables['matches']['Year'].max())
+
+def test_same_seed_same_odds(season):
+
+    matches, points_table, year = season
+
+    first = seasonOdds(matches, points_table, year, 30, runs=5000, seed=7)
+    second = seasonOdds(matches, points_table, year, 30, runs=5000, seed=7)
+
+    pd.testing.assert_frame_equal(first, second)
+
+def test_odds_are_probabilities(season):
+
+    matches, points_table, year = season
+
+    odds = seasonOdds(matches, points_table, year, 30, runs=5000, seed=7)
+
+    assert odds['Top4'].between(0, 1).all()
+    assert odds['First'].between(0, 1).all()
+    assert odds['Top4'].sum() == pytest.approx(4)
+    assert odds['First'].sum() == pytest.approx(1)
+
+# The simulations split over worker processes give the same odds for the same seed and number of workers
+
+def test_same_seed_same_odds_with_workers(season):
+
+    matches, points_table, year = season
+
+    first = seasonOdds(matches, points_table, year, 30, runs=4000, workers=2, seed=3)
+    second = seasonOdds(matches, points_table, year, 30, runs=4000, workers=2, seed=3)
+
+    pd.testing.assert_frame_equal(first, second)
@@ -0,0 +1,42 @@
+# Tests of the parsing of the match results into their margin type, margin value and DLS flag
+
+import numpy as np
+import pandas as pd
+
+from src.win_margins import parseWinDetails
+
+def test_runs_and_wickets():
+
+    parsed = parseWinDetails(pd.Series(['won by 24 runs', 'won by 3 wickets', 'won by 1 run']))
+
+    assert parsed['MarginType'].tolist() == ['Runs', 'Wickets', 'Runs']
+    assert parsed['MarginValue'].tolist() == [24.0, 3.0, 1.0]
+    assert not parsed['DLS'].any()
+
+# Both the older (d/l method) and the newer (dls method) notes flag a revised target
+
+def test_dls():
+
+    parsed = parseWinDetails(pd.Series(['won by 3 runs (d/l method)', 'won by 7 wickets (dls method)', 'Won by 10 Runs (D/L Method)']))
+
+    assert parsed['MarginType'].tolist() == ['Runs', 'Wickets', 'Runs']
+    assert parsed['MarginValue'].tolist() == [3.0, 7.0, 10.0]
+    assert parsed['DLS'].all()
+
+# Ties decided by a super over or an eliminator over have no margin value
+
+def test_super_over_and_eliminator():
+
+    parsed = parseWinDetails(pd.Series(['Match tied( won the Super Over)', 'won the one-over eliminator', 'won the 1-over eliminator']))
+
+    assert parsed['MarginType'].tolist() == ['Super Over'] * 3
+    assert parsed['MarginValue'].isna().all()
+    assert not parsed['DLS'].any()
+
+def test_no_result():
+
+    parsed = parseWinDetails(pd.Series(['No result', 'Match abandoned without a ball bowled', np.nan], index=[5, 7, 9]))
+
+    assert parsed['MarginType'].tolist() == ['No Result', 'No Result', None]
+    assert parsed['MarginValue'].isna().all()
+    assert parsed.index.tolist() == [5, 7, 9]